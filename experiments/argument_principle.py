@@ -0,0 +1,263 @@
+"""
+ARGUMENT-PRINCIPLE ZERO COUNTING IN RECTANGLES
+==============================================
+
+The number of zeros of ζ(s) inside a rectangle
+
+    R = {σ₀ < Re s < σ₁,  T₁ < Im s < T₂}
+
+is the winding number (1/2π) Δ_∂R arg ζ(s).  With σ₀ > 1/2 this searches
+the strip off the critical line directly; with σ₀ < 1/2 < σ₁ the count
+must match the zeros found on the line.
+
+ζ(s) and ζ'(s) are evaluated anywhere in the strip by Euler-Maclaurin
+summation (euler_maclaurin.zeta_em), which also bounds its own error.
+All contour points of a batch of rectangles are evaluated together.
+
+The boundary is cut into segments and a segment [a, b] is accepted only
+if the disk test
+
+    |b - a| · D ≤ ½ min(|ζ(a)|, |ζ(b)|),   D ≥ max |ζ'| on [a, b],
+
+holds, so that ζ stays in a disk about ζ(a) that excludes 0 and the
+change of argument along the segment is the principal value of
+arg ζ(b)/ζ(a).  D must bound ζ' along the whole segment, not only at
+its ends.  It comes from a majorant M of |ζ| on the disk of radius
+ρ + |b - a|/2 about the midpoint (zeta_majorant: every term of the
+Euler-Maclaurin formula bounded by its modulus at the worst point of
+the disk).  Cauchy's estimates give |ζ'| ≤ M/ρ and |ζ''| ≤ 2M/ρ² on the
+segment, so
+
+    D = min(M/ρ, max(|ζ'(a)|, |ζ'(b)|) + ½ |b - a| · 2M/ρ²).
+
+The Euler-Maclaurin error must also be below 1 % of |ζ| at both ends.  Failing segments are
+bisected; a rectangle whose contour passes within min_step of a zero is
+reported as unresolved rather than counted.
+
+Rectangles are independent and are farmed out to a process pool in
+batches.
+
+Usage:
+    python argument_principle.py --t1 1000 --t2 2000 --height 10 --workers 8
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from euler_maclaurin import EM_COEFFS, EM_TERMS, em_length, zeta_em
+from riemann_siegel import generate_zeros
+
+CAUCHY_RADIUS = 0.4         # ρ of the Cauchy estimates
+
+# =============================================================================
+# WINDING NUMBERS
+# =============================================================================
+
+def zeta_majorant(s, radius, terms=EM_TERMS):
+    """Upper bound on |ζ(z)| over the disks |z - s| ≤ radius
+
+    Euler-Maclaurin with N fixed per disk, each term bounded at the worst
+    point: Σ_{n<N} n^{-z} by 1 + ∫_1^N u^{-x} du with x = σ - radius,
+    |z + j| by |s| + j + radius and |z - 1| from below by |s - 1| - radius.
+    Disks that reach s = 1 get inf.
+    """
+    s = np.asarray(s, dtype=np.complex128)
+    r = np.asarray(radius, dtype=np.float64)
+    x = s.real - r
+    big_n = em_length(np.abs(s) + r, terms).astype(np.float64)
+    log_n = np.log(big_n)
+    u = (1 - x) * log_n
+    total = 1 + log_n * np.where(np.abs(u) > 1e-8,
+                                 np.expm1(u) / np.where(u == 0, 1, u), 1.0)
+    gap = np.abs(s - 1) - r
+    with np.errstate(divide="ignore"):
+        total += np.where(gap > 0, big_n ** (1 - x) / np.where(gap > 0, gap, 1),
+                          np.inf)
+    n_x = big_n ** -x
+    total += 0.5 * n_x
+    # q_k = Π_{j ≤ 2k-2} (|s| + j + r) N^{1-2k}
+    size = np.abs(s) + r
+    q = size / big_n
+    for k in range(1, terms + 1):
+        total += abs(EM_COEFFS[k - 1]) * q * n_x
+        q = q * (size + 2 * k - 1) * (size + 2 * k) / big_n ** 2
+    total += (abs(EM_COEFFS[terms]) * q * n_x
+              * (size + 2 * terms + 1) / (x + 2 * terms + 1))
+    return total
+
+
+
+def contour_points(rect, step):
+    """Counterclockwise boundary points of (σ₀, σ₁, T₁, T₂), last = first"""
+    s0, s1, t1, t2 = rect
+    corners = [complex(s0, t1), complex(s1, t1), complex(s1, t2), complex(s0, t2),
+               complex(s0, t1)]
+    pts = []
+    for a, b in zip(corners[:-1], corners[1:]):
+        n = max(1, int(math.ceil(abs(b - a) / step)))
+        pts.append(a + (b - a) * np.arange(n) / n)
+    pts.append([corners[0]])
+    return np.concatenate(pts)
+
+
+def count_zeros(rects, min_step=1e-9, max_rounds=60):
+    """Argument-principle zero counts for a batch of rectangles
+
+    rects is a sequence of (σ₀, σ₁, T₁, T₂).  Returns one dict per
+    rectangle: the count (None if unresolved), the raw winding number,
+    the number of ζ evaluations and the smallest |ζ| met on the contour.
+    """
+    rects = [tuple(map(float, r)) for r in rects]
+    points, owner = [], []
+    for i, r in enumerate(rects):
+        p = contour_points(r, 0.5 / math.log(max(r[3], 3.0)))
+        points.append(p)
+        owner.append(np.full(p.size - 1, i))
+    points = np.concatenate(points)
+    z, dz, err = zeta_em(points)
+    # Segment endpoints: consecutive points within each rectangle
+    first = np.concatenate(([0], np.cumsum([o.size + 1 for o in owner])[:-1]))
+    a_idx = np.concatenate([f + np.arange(o.size) for f, o in zip(first, owner)])
+    owner = np.concatenate(owner)
+    seg = {
+        "a": points[a_idx], "b": points[a_idx + 1],
+        "za": z[a_idx], "zb": z[a_idx + 1],
+        "da": dz[a_idx], "db": dz[a_idx + 1],
+        "ea": err[a_idx], "eb": err[a_idx + 1],
+        "owner": owner,
+    }
+
+    n = len(rects)
+    winding = np.zeros(n)
+    evaluations = np.bincount(owner, minlength=n) + 1
+    smallest = np.full(n, np.inf)
+    unresolved = np.zeros(n, dtype=bool)
+    for _ in range(max_rounds):
+        if seg["a"].size == 0:
+            break
+        mod_a, mod_b = np.abs(seg["za"]), np.abs(seg["zb"])
+        low = np.minimum(mod_a, mod_b)
+        np.minimum.at(smallest, seg["owner"], low)
+        length = np.abs(seg["b"] - seg["a"])
+        rho = CAUCHY_RADIUS
+        big_m = zeta_majorant(0.5 * (seg["a"] + seg["b"]), rho + 0.5 * length)
+        slope = np.minimum(big_m / rho,
+                           np.maximum(np.abs(seg["da"]), np.abs(seg["db"]))
+                           + length * big_m / rho ** 2)
+        bound = length * slope
+        ok = ((bound <= 0.5 * low)
+              & (seg["ea"] < 0.01 * mod_a) & (seg["eb"] < 0.01 * mod_b))
+        np.add.at(winding, seg["owner"][ok], np.angle(seg["zb"][ok] / seg["za"][ok]))
+
+        split = ~ok
+        tiny = split & (np.abs(seg["b"] - seg["a"]) < min_step)
+        unresolved[seg["owner"][tiny]] = True
+        split &= ~tiny & ~unresolved[seg["owner"]]
+        if not split.any():
+            seg = {k: v[:0] for k, v in seg.items()}
+            break
+        old = {k: v[split] for k, v in seg.items()}
+        mid = 0.5 * (old["a"] + old["b"])
+        zm, dm, em = zeta_em(mid)
+        np.add.at(evaluations, old["owner"], 1)
+        seg = {
+            "a": np.concatenate((old["a"], mid)),
+            "b": np.concatenate((mid, old["b"])),
+            "za": np.concatenate((old["za"], zm)),
+            "zb": np.concatenate((zm, old["zb"])),
+            "da": np.concatenate((old["da"], dm)),
+            "db": np.concatenate((dm, old["db"])),
+            "ea": np.concatenate((old["ea"], em)),
+            "eb": np.concatenate((em, old["eb"])),
+            "owner": np.concatenate((old["owner"], old["owner"])),
+        }
+    unresolved[seg["owner"]] = True
+
+    wind = winding / (2 * np.pi)
+    return [{
+        "rect": r,
+        "count": None if unresolved[i] else int(round(wind[i])),
+        "winding": float(wind[i]),
+        "evaluations": int(evaluations[i]),
+        "min_abs_zeta": float(smallest[i]),
+    } for i, r in enumerate(rects)]
+
+
+def count_zeros_parallel(rects, workers=None, batch=8):
+    """count_zeros over a process pool, `batch` rectangles per task"""
+    rects = list(rects)
+    batches = [rects[i:i + batch] for i in range(0, len(rects), batch)]
+    if workers == 1:
+        parts = map(count_zeros, batches)
+        return [r for part in parts for r in part]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for part in pool.map(count_zeros, batches) for r in part]
+
+
+def tile(sigma0, sigma1, t1, t2, height):
+    """Rectangles (σ₀, σ₁, T, T + height) covering [T₁, T₂]"""
+    edges = np.arange(t1, t2, height)
+    return [(sigma0, sigma1, t, min(t + height, t2)) for t in edges]
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--t1", type=float, default=1000.0)
+    parser.add_argument("--t2", type=float, default=1500.0)
+    parser.add_argument("--height", type=float, default=10.0,
+                        help="height of each rectangle")
+    parser.add_argument("--sigma0", type=float, default=0.55,
+                        help="left edge of the off-line rectangles")
+    parser.add_argument("--sigma1", type=float, default=1.0,
+                        help="right edge of the rectangles")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("ARGUMENT-PRINCIPLE ZERO COUNTING")
+    print("=" * 70)
+
+    probe = np.array([0.5 + 14.134725141734693j, 2.0 + 0j, 0.75 + 1000j])
+    z, _, err = zeta_em(probe)
+    print(f"\nζ(ρ₁) = {z[0]:.2e} (error bound {err[0]:.1e}), "
+          f"ζ(2) - π²/6 = {abs(z[1] - np.pi ** 2 / 6):.1e}")
+
+    for label, s0 in (("Off the line", args.sigma0), ("Across the line", 1 - args.sigma1)):
+        rects = tile(s0, args.sigma1, args.t1, args.t2, args.height)
+        start = time.perf_counter()
+        results = count_zeros_parallel(rects, args.workers)
+        elapsed = time.perf_counter() - start
+        counts = [r["count"] for r in results]
+        resolved = [c for c in counts if c is not None]
+        print(f"\n{label}: {len(rects)} rectangles {s0:g} < σ < {args.sigma1:g}, "
+              f"{args.t1:g} < t < {args.t2:g}")
+        print(f"  {elapsed:.2f} s, {len(rects) / elapsed:.1f} rectangles/s, "
+              f"{sum(r['evaluations'] for r in results):,} ζ evaluations")
+        drift = max((abs(r["winding"] - r["count"]) for r in results
+                     if r["count"] is not None), default=float("nan"))
+        print(f"  zeros counted: {sum(resolved)}, unresolved rectangles: "
+              f"{counts.count(None)}, max |winding - count| = {drift:.1e}")
+        if s0 >= 0.5:
+            print(f"  off-line zeros found: {sum(resolved)} "
+                  f"{'✓' if sum(resolved) == 0 else '✗'}")
+        else:
+            count = int(args.t2 / (2 * np.pi) * np.log(args.t2 / (2 * np.pi * np.e))) + 20
+            gamma = np.concatenate(list(generate_zeros(count)))
+            edges = [r[2] for r in rects] + [rects[-1][3]]
+            line = np.histogram(gamma, bins=edges)[0]
+            agree = sum(c == l for c, l in zip(counts, line))
+            print(f"  zeros on the line (Riemann-Siegel): {line.sum()}, "
+                  f"rectangles agreeing: {agree}/{len(rects)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,606 @@
+"""
+CONFLICT-DRIVEN CLAUSE LEARNING SAT SOLVER
+==========================================
+
+walksat.py and the annealers only find solutions.  They can never show
+that a formula is unsatisfiable, or that a list of solutions is
+complete, and p_vs_np.py's claims about solution clusters need both.
+This is a complete solver in the MiniSat/Glucose line:
+
+    two watched literals    a clause is visited only when one of its
+                            two watched literals becomes false
+    1UIP learning           conflict analysis back to the first unique
+                            implication point, with recursive
+                            minimization; LBD (distinct decision levels)
+                            is kept as a quality score
+    VSIDS                   activity bumped per conflict, decayed
+                            geometrically, in an array binary heap;
+                            phase saving
+    Luby restarts           after 100 · luby(i) conflicts
+    database reduction      every 2000 + 300 j conflicts, half of the
+                            learned clauses with LBD > 2 that are not
+                            reasons, lowest (LBD, activity) first
+
+Storage is flat, with literals packed as in ksat.py (2v + s).  All
+clause literals sit in one int list `arena`, clause c at
+arena[start[c] : start[c] + size[c]], and its watched literals are the
+first two.  watches[l] lists the clauses watching l, each followed by
+a blocker: another literal of the clause, which if true means the
+clause needs no visit.  Values are kept per literal (+1 true, -1 false,
+0 free), so a lookup is one index.
+Deleting learned clauses compacts the arena tail in place; clause ids
+stay fixed, so watches and reasons need no remapping.
+
+Pure Python: the algorithm is a sequential walk over pointers that NumPy
+cannot batch, and no compiler is available here.  The hot loops read
+locals only.  Expect 0.5-1.5·10^5 propagations per second.  Random
+5-SAT with 10^5 variables and 10^6 clauses (α = 10) loads in about
+6 s and is solved in about a minute.  Counters
+(propagations, conflicts, decisions, restarts, learned and deleted
+clauses) and their rates are in Solver.stats().
+
+Usage:
+    python cdcl.py --n 250 --alpha 4.267 --seed 1
+    python cdcl.py --dimacs instance.cnf --max-conflicts 1000000
+    python cdcl.py --n 40 --alpha 3.5 --enumerate 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ksat import Formula, random_ksat
+
+VAR_DECAY = 0.95
+CLAUSE_DECAY = 0.999
+RESTART_BASE = 100
+REDUCE_FIRST = 2000
+REDUCE_INC = 300
+
+
+def luby(i):
+    """i-th term (from 0) of 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i %= size
+    return 1 << seq
+
+# =============================================================================
+# THE SOLVER
+# =============================================================================
+
+class Solver:
+    """CDCL solver over variables 0 ... n-1, clauses added one at a time"""
+
+    def __init__(self, formula=None, n=0):
+        n = formula.n if formula is not None else n
+        self.n = n
+        self.val = [0] * (2 * n)
+        self.level = [0] * n
+        self.reason = [-1] * n
+        self.phase = [1] * n
+        self.seen = bytearray(n)
+        self.trail, self.trail_lim, self.qhead = [], [], 0
+        self.ok = True
+
+        self.arena, self.start, self.size = [], [], []
+        self.learnt, self.lbd, self.cact = [], [], []
+        self.watches = [[] for _ in range(2 * n)]
+        self.learnts = []
+        self.var_inc, self.cla_inc = 1.0, 1.0
+        self.activity = [0.0] * n
+        self.heap = list(range(n))
+        self.pos = list(range(n))
+
+        self.propagations = self.conflicts = self.decisions = 0
+        self.restarts = self.learned = self.deleted = 0
+        self.next_reduce, self.reductions = REDUCE_FIRST, 0
+        self.elapsed = 0.0
+
+        if formula is not None:
+            lits = formula.lits.tolist()
+            bounds = formula.clause_start.tolist()
+            for c in range(formula.m):
+                if not self.add_clause(lits[bounds[c]:bounds[c + 1]]):
+                    break
+        # Learned clauses are placed after this point and compacted
+        self.tail = len(self.arena)
+
+    # -------------------------------------------------------------------------
+    # Clauses
+    # -------------------------------------------------------------------------
+
+    def add_clause(self, lits):
+        """Add a clause of packed literals; False once the formula is UNSAT"""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        val = self.val
+        clause = []
+        for lit in sorted(set(lits)):
+            if lit ^ 1 in clause or val[lit] == 1:
+                return True
+            if val[lit] == 0:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], -1)
+            self.ok = self._propagate() < 0
+        else:
+            self._attach(clause, False, 0)
+        return self.ok
+
+    def _attach(self, lits, learnt, lbd):
+        c = len(self.start)
+        self.start.append(len(self.arena))
+        self.size.append(len(lits))
+        self.arena.extend(lits)
+        self.learnt.append(learnt)
+        self.lbd.append(lbd)
+        self.cact.append(0.0)
+        self.watches[lits[0]] += (c, lits[1])
+        self.watches[lits[1]] += (c, lits[0])
+        if learnt:
+            self.learnts.append(c)
+        return c
+
+    def _enqueue(self, lit, reason):
+        v = lit >> 1
+        self.val[lit] = 1
+        self.val[lit ^ 1] = -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    # -------------------------------------------------------------------------
+    # Propagation
+    # -------------------------------------------------------------------------
+
+    def _propagate(self):
+        """Unit propagation from qhead; the conflicting clause or -1"""
+        val, level, reason, trail = self.val, self.level, self.reason, self.trail
+        arena, start, size, watches = self.arena, self.start, self.size, self.watches
+        dl = len(self.trail_lim)
+        qhead = self.qhead
+        confl = -1
+        while qhead < len(trail):
+            false_lit = trail[qhead] ^ 1
+            qhead += 1
+            ws = watches[false_lit]
+            i = j = 0
+            end = len(ws)
+            while i < end:
+                c = ws[i]
+                blocker = ws[i + 1]
+                i += 2
+                if val[blocker] == 1:
+                    ws[j] = c
+                    ws[j + 1] = blocker
+                    j += 2
+                    continue
+                s = start[c]
+                # Keep the false watch at position 1
+                first = arena[s]
+                if first == false_lit:
+                    first = arena[s + 1]
+                    arena[s] = first
+                    arena[s + 1] = false_lit
+                if first != blocker and val[first] == 1:
+                    ws[j] = c
+                    ws[j + 1] = first
+                    j += 2
+                    continue
+                for k in range(s + 2, s + size[c]):
+                    lit = arena[k]
+                    if val[lit] != -1:
+                        arena[s + 1] = lit
+                        arena[k] = false_lit
+                        other = watches[lit]
+                        other.append(c)
+                        other.append(first)
+                        break
+                else:
+                    ws[j] = c
+                    ws[j + 1] = first
+                    j += 2
+                    if val[first] == -1:
+                        confl = c
+                        while i < end:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        break
+                    v = first >> 1
+                    val[first] = 1
+                    val[first ^ 1] = -1
+                    level[v] = dl
+                    reason[v] = c
+                    trail.append(first)
+            del ws[j:]
+            if confl >= 0:
+                break
+        self.propagations += qhead - self.qhead
+        self.qhead = qhead
+        return confl
+
+    # -------------------------------------------------------------------------
+    # Conflict analysis
+    # -------------------------------------------------------------------------
+
+    def _analyze(self, confl):
+        """First-UIP clause (asserting literal first), backjump level, LBD"""
+        arena, start, size = self.arena, self.start, self.size
+        level, reason, trail, seen = self.level, self.reason, self.trail, self.seen
+        act, pos, inc = self.activity, self.pos, self.var_inc
+        dl = len(self.trail_lim)
+        out = [0]
+        path, p, idx, c = 0, -1, len(trail) - 1, confl
+        while True:
+            if self.learnt[c]:
+                self._bump_clause(c)
+            s = start[c]
+            for k in range(s if p < 0 else s + 1, s + size[c]):
+                q = arena[k]
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = 1
+                    # VSIDS bump
+                    act[v] += inc
+                    if act[v] > 1e100:
+                        self._rescale()
+                        inc = self.var_inc
+                    if pos[v] >= 0:
+                        self._heap_up(pos[v])
+                    if level[v] >= dl:
+                        path += 1
+                    else:
+                        out.append(q)
+            while not seen[trail[idx] >> 1]:
+                idx -= 1
+            p = trail[idx]
+            idx -= 1
+            c = reason[p >> 1]
+            seen[p >> 1] = 0
+            path -= 1
+            if path == 0:
+                break
+        out[0] = p ^ 1
+
+        # Drop literals implied by the others through reason clauses
+        clear = out[1:]
+        abstract = 0
+        for q in clear:
+            abstract |= 1 << (level[q >> 1] & 31)
+        learnt = [out[0]]
+        for q in out[1:]:
+            if reason[q >> 1] < 0 or not self._redundant(q, abstract, clear):
+                learnt.append(q)
+        for q in clear:
+            seen[q >> 1] = 0
+
+        back = 0
+        if len(learnt) > 1:
+            best = max(range(1, len(learnt)), key=lambda i: level[learnt[i] >> 1])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            back = level[learnt[1] >> 1]
+        return learnt, back, len({level[q >> 1] for q in learnt})
+
+    def _redundant(self, q, abstract, clear):
+        """Whether q follows from seen literals through reason clauses
+
+        Depth-first over the reasons (MiniSat's litRedundant); literals
+        proved along the way are marked seen and appended to clear.
+        """
+        arena, start, size = self.arena, self.start, self.size
+        level, reason, seen = self.level, self.reason, self.seen
+        stack = [q]
+        top = len(clear)
+        while stack:
+            r = reason[stack.pop() >> 1]
+            s = start[r]
+            for k in range(s + 1, s + size[r]):
+                u = arena[k]
+                v = u >> 1
+                if not seen[v] and level[v] > 0:
+                    if reason[v] >= 0 and (1 << (level[v] & 31)) & abstract:
+                        seen[v] = 1
+                        stack.append(u)
+                        clear.append(u)
+                    else:
+                        for w in clear[top:]:
+                            seen[w >> 1] = 0
+                        del clear[top:]
+                        return False
+        return True
+
+    def _backtrack(self, lvl):
+        if len(self.trail_lim) <= lvl:
+            return
+        val, reason, phase, pos = self.val, self.reason, self.phase, self.pos
+        lim = self.trail_lim[lvl]
+        for lit in reversed(self.trail[lim:]):
+            v = lit >> 1
+            val[lit] = val[lit ^ 1] = 0
+            reason[v] = -1
+            phase[v] = lit & 1
+            if pos[v] < 0:
+                self._heap_insert(v)
+        del self.trail[lim:]
+        del self.trail_lim[lvl:]
+        self.qhead = lim
+
+    # -------------------------------------------------------------------------
+    # VSIDS heap
+    # -------------------------------------------------------------------------
+
+    def _rescale(self):
+        act = self.activity
+        for u in range(self.n):
+            act[u] *= 1e-100
+        self.var_inc *= 1e-100
+
+    def _bump_clause(self, c):
+        cact = self.cact
+        cact[c] += self.cla_inc
+        if cact[c] > 1e20:
+            for d in self.learnts:
+                cact[d] *= 1e-20
+            self.cla_inc *= 1e-20
+
+    def _heap_up(self, i):
+        heap, pos, act = self.heap, self.pos, self.activity
+        v = heap[i]
+        a = act[v]
+        while i > 0:
+            parent = (i - 1) >> 1
+            u = heap[parent]
+            if act[u] >= a:
+                break
+            heap[i] = u
+            pos[u] = i
+            i = parent
+        heap[i] = v
+        pos[v] = i
+
+    def _heap_down(self, i):
+        heap, pos, act = self.heap, self.pos, self.activity
+        size = len(heap)
+        v = heap[i]
+        a = act[v]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and act[heap[child + 1]] > act[heap[child]]:
+                child += 1
+            u = heap[child]
+            if act[u] <= a:
+                break
+            heap[i] = u
+            pos[u] = i
+            i = child
+        heap[i] = v
+        pos[v] = i
+
+    def _heap_insert(self, v):
+        self.pos[v] = len(self.heap)
+        self.heap.append(v)
+        self._heap_up(self.pos[v])
+
+    def _heap_pop(self):
+        heap, pos = self.heap, self.pos
+        v = heap[0]
+        last = heap.pop()
+        pos[v] = -1
+        if heap:
+            heap[0] = last
+            pos[last] = 0
+            self._heap_down(0)
+        return v
+
+    def _decide(self):
+        """Unassigned variable of highest activity, or -1"""
+        val = self.val
+        while self.heap:
+            v = self._heap_pop()
+            if val[2 * v] == 0:
+                return v
+        return -1
+
+    # -------------------------------------------------------------------------
+    # Learned clause database
+    # -------------------------------------------------------------------------
+
+    def _reduce(self):
+        """Delete half of the deletable learned clauses and compact the tail"""
+        arena, start, size, lbd, cact = self.arena, self.start, self.size, self.lbd, self.cact
+        val, reason, watches = self.val, self.reason, self.watches
+
+        def locked(c):
+            lit = arena[start[c]]
+            return val[lit] == 1 and reason[lit >> 1] == c
+
+        candidates = [c for c in self.learnts if lbd[c] > 2 and not locked(c)]
+        candidates.sort(key=lambda c: (-lbd[c], cact[c]))
+        doomed = set(candidates[:len(candidates) // 2])
+        for c in doomed:
+            s = start[c]
+            for lit in (arena[s], arena[s + 1]):
+                ws = watches[lit]
+                i = ws.index(c)
+                while i & 1:                          # a blocker, not a clause id
+                    i = ws.index(c, i + 1)
+                del ws[i:i + 2]
+            size[c] = 0
+        self.learnts = [c for c in self.learnts if c not in doomed]
+        self.deleted += len(doomed)
+        self.reductions += 1
+
+        # Slide the live clauses of the tail down, in order of position
+        live = sorted((c for c in range(len(start)) if size[c] and start[c] >= self.tail),
+                      key=start.__getitem__)
+        top = self.tail
+        for c in live:
+            s, k = start[c], size[c]
+            arena[top:top + k] = arena[s:s + k]
+            start[c] = top
+            top += k
+        del arena[top:]
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def solve(self, max_conflicts=None):
+        """True (SAT, see model()), False (UNSAT), None (conflict budget)"""
+        if not self.ok:
+            return False
+        began = time.perf_counter()
+        try:
+            self._backtrack(0)
+            if self._propagate() >= 0:
+                self.ok = False
+                return False
+            stop = None if max_conflicts is None else self.conflicts + max_conflicts
+            i = 0
+            while True:
+                status = self._search(RESTART_BASE * luby(i), stop)
+                if status is not None or (stop is not None and self.conflicts >= stop):
+                    return status
+                self.restarts += 1
+                i += 1
+        finally:
+            self.elapsed += time.perf_counter() - began
+
+    def _search(self, budget, stop):
+        conflicts = 0
+        while True:
+            confl = self._propagate()
+            if confl >= 0:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, back, lbd = self._analyze(confl)
+                self._backtrack(back)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], -1)
+                else:
+                    c = self._attach(learnt, True, lbd)
+                    self._bump_clause(c)
+                    self._enqueue(learnt[0], c)
+                self.learned += 1
+                self.var_inc /= VAR_DECAY
+                self.cla_inc /= CLAUSE_DECAY
+                if self.conflicts >= self.next_reduce:
+                    self._reduce()
+                    self.next_reduce = self.conflicts + REDUCE_FIRST + REDUCE_INC * self.reductions
+                if stop is not None and self.conflicts >= stop:
+                    self._backtrack(0)
+                    return None
+            else:
+                if conflicts >= budget:
+                    self._backtrack(0)
+                    return None
+                v = self._decide()
+                if v < 0:
+                    return True
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(2 * v | self.phase[v], -1)
+
+    def model(self):
+        """Satisfying assignment after solve() returned True"""
+        return np.array(self.val[0::2], dtype=np.int8) == 1
+
+    def solutions(self, limit=None):
+        """Yield distinct models, blocking each one, until UNSAT or limit"""
+        count = 0
+        while (limit is None or count < limit) and self.solve():
+            model = self.model()
+            yield model
+            count += 1
+            self.add_clause((2 * np.arange(self.n) + model).tolist())
+
+    def stats(self):
+        """Counters and per-second rates over the time spent in solve()"""
+        t = max(self.elapsed, 1e-9)
+        return {"propagations": self.propagations, "conflicts": self.conflicts,
+                "decisions": self.decisions, "restarts": self.restarts,
+                "learned": self.learned, "deleted": self.deleted,
+                "learnts_live": len(self.learnts), "seconds": self.elapsed,
+                "propagations_per_s": self.propagations / t,
+                "conflicts_per_s": self.conflicts / t,
+                "decisions_per_s": self.decisions / t}
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dimacs", help="DIMACS CNF file (default: random k-SAT)")
+    parser.add_argument("--n", type=int, default=250)
+    parser.add_argument("--alpha", type=float, default=None,
+                        help="clause density (default: the threshold α_c)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-conflicts", type=int, default=None)
+    parser.add_argument("--enumerate", type=int, default=0,
+                        help="list up to this many solutions instead")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("CONFLICT-DRIVEN CLAUSE LEARNING SAT SOLVER")
+    print("=" * 70)
+
+    if args.dimacs:
+        f = Formula.read_dimacs(args.dimacs)
+        name = args.dimacs
+    else:
+        f = random_ksat(args.n, args.alpha, args.k, args.seed)
+        name = f"random {args.k}-SAT, seed {args.seed}"
+    start = time.perf_counter()
+    solver = Solver(f)
+    print(f"\n{name}: n = {f.n:,}, m = {f.m:,} (α = {f.m / max(f.n, 1):.3f}), "
+          f"loaded in {time.perf_counter() - start:.2f} s")
+
+    if args.enumerate:
+        models = list(solver.solutions(args.enumerate))
+        complete = len(models) < args.enumerate
+        print(f"\n{len(models)} solutions{' (all of them)' if complete else ''}")
+        if models:
+            m = np.array(models)
+            assert all(f.unsatisfied(a) == 0 for a in m)
+            assert len({a.tobytes() for a in m}) == len(m)
+            d = (m[:, None, :] != m[None, :, :]).sum(axis=2)[np.triu_indices(len(m), 1)]
+            if d.size:
+                print(f"Pairwise Hamming distance: min {d.min()}, mean {d.mean():.1f}, "
+                      f"max {d.max()} (n = {f.n})")
+    else:
+        status = solver.solve(args.max_conflicts)
+        label = {True: "SATISFIABLE", False: "UNSATISFIABLE", None: "UNKNOWN (budget)"}
+        print(f"\n{label[status]}")
+        if status:
+            assert f.unsatisfied(solver.model()) == 0
+            print("Model checked against every clause")
+
+    s = solver.stats()
+    print(f"\n{s['seconds']:.2f} s in search")
+    for key in ("propagations", "conflicts", "decisions"):
+        print(f"  {key:<13} {s[key]:>12,}   {s[key + '_per_s']:>12,.0f} /s")
+    print(f"  {'restarts':<13} {s['restarts']:>12,}")
+    print(f"  {'learned':<13} {s['learned']:>12,}   ({s['deleted']:,} deleted, "
+          f"{s['learnts_live']:,} kept)")
+
+
+if __name__ == "__main__":
+    main()
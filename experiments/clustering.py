@@ -0,0 +1,301 @@
+"""
+SOLUTION-SPACE CLUSTERS OF k-SAT
+================================
+
+demonstrate_clustering() in p_vs_np.py prints "Separation: ~0.1n
+(Hamming distance)" and "Clusters: ~exp(0.1n)" without looking at a
+solution.  This module collects many solutions of one instance and
+measures both.
+
+Solutions are stored as packed bitsets, ⌈n/64⌉ uint64 words each, and
+kept word-major (W × N) so that a tile of distances is W outer XORs of
+two contiguous rows plus np.bitwise_count.  Tiles of 256 × 256 pairs
+(under 1 MB of temporaries) are taken over the upper triangle, so
+memory stays O(N) and all N²/2 distances are still seen.  10^5
+solutions of n = 500 is 5·10^9 pairs: about 2.5 minutes to cluster
+and 3 more for diameters and gaps here.
+
+Clusters are the components of the graph joining solutions at distance
+≤ r (single linkage), built with a union-find over the solutions during
+the first pass.  The union is vectorized: every edge of a tile hooks
+the larger of its two roots under the smaller (np.minimum.at, so
+parents only decrease and no cycle can form), repeated until no edge
+joins two roots.  A second pass measures, per cluster, the diameter
+(largest internal distance) and the gap, the distance to the nearest
+solution in another cluster (always > r).
+
+Solutions come from:
+
+    anneal      E = 0 chains of sat_annealer.Annealer at a fixed low T,
+                snapshotted every few sweeps (chains move between
+                solutions, so consecutive snapshots are correlated)
+    cdcl        models enumerated by cdcl.Solver with blocking clauses
+                (all solutions if there are fewer than --count)
+    a file      --load of an npz written by --save
+
+Usage:
+    python clustering.py --n 500 --alpha 4.0 --count 100000 --radius 0.02,0.05
+    python clustering.py --n 60 --alpha 4.0 --source cdcl --count 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from cdcl import Solver
+from ksat import random_ksat
+from sat_annealer import Annealer, _unpack
+
+TILE = 256
+
+# =============================================================================
+# BITSETS
+# =============================================================================
+
+def pack(assignments):
+    """bool (N, n) → uint64 (N, ⌈n/64⌉), bit i of the row = variable i"""
+    a = np.atleast_2d(np.asarray(assignments, dtype=bool))
+    words = -(-a.shape[1] // 64)
+    bytes_ = np.zeros((a.shape[0], 8 * words), dtype=np.uint8)
+    bytes_[:, :-(-a.shape[1] // 8)] = np.packbits(a, axis=1, bitorder="little")
+    return bytes_.view(np.uint64)
+
+
+def unpack(bits, n):
+    """uint64 (N, W) → bool (N, n)"""
+    return np.unpackbits(bits.view(np.uint8), axis=1, count=n, bitorder="little").astype(bool)
+
+
+def check(formula, bits, chunk=4096):
+    """Number of bitsets that violate some clause"""
+    k = formula.width
+    var = (formula.lits >> 1).reshape(-1, k)
+    neg = (formula.lits & 1).reshape(-1, k).astype(bool)
+    bad = 0
+    for lo in range(0, bits.shape[0], chunk):
+        a = unpack(bits[lo:lo + chunk], formula.n)
+        bad += int(np.count_nonzero(~(a[:, var] != neg).any(axis=2).all(axis=1)))
+    return bad
+
+
+def hamming_tiles(bits, tile=TILE):
+    """Yield (i0, j0, d) for the tiles of the upper triangle of the
+    distance matrix, d[a, b] = |bits[i0 + a] ⊕ bits[j0 + b]|
+
+    Diagonal tiles are whole squares (symmetric, zero diagonal).
+    """
+    words = np.ascontiguousarray(bits.T)                 # W × N
+    count = bits.shape[0]
+    x = np.empty((tile, tile), dtype=np.uint64)
+    c = np.empty((tile, tile), dtype=np.uint8)
+    for i0 in range(0, count, tile):
+        i1 = min(i0 + tile, count)
+        for j0 in range(i0, count, tile):
+            j1 = min(j0 + tile, count)
+            xs, cs = x[:i1 - i0, :j1 - j0], c[:i1 - i0, :j1 - j0]
+            d = np.zeros((i1 - i0, j1 - j0), dtype=np.uint16)
+            for w in words:
+                np.bitwise_xor(w[i0:i1, None], w[None, j0:j1], out=xs)
+                np.bitwise_count(xs, out=cs)
+                d += cs
+            yield i0, j0, d
+
+# =============================================================================
+# UNION-FIND
+# =============================================================================
+
+class UnionFind:
+    """Disjoint sets over 0 ... N-1 with vectorized union of edge lists"""
+
+    def __init__(self, count):
+        self.parent = np.arange(count)
+
+    def find(self, x):
+        """Roots of the elements x, compressing their paths"""
+        parent = self.parent
+        root = parent[x]
+        while True:
+            up = parent[root]
+            if np.array_equal(up, root):
+                break
+            root = up
+        parent[x] = root
+        return root
+
+    def union(self, a, b):
+        """Join the sets of a[i] and b[i] for every i"""
+        while a.size:
+            ra, rb = self.find(a), self.find(b)
+            apart = ra != rb
+            a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+            # Roots hook under smaller roots; one hook per root wins
+            np.minimum.at(self.parent, np.maximum(ra, rb), np.minimum(ra, rb))
+
+    def labels(self):
+        """Cluster index per element, 0 ... K-1 in order of first element"""
+        roots = self.find(np.arange(self.parent.size))
+        _, first, label = np.unique(roots, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first))
+        return order[label]
+
+# =============================================================================
+# CLUSTERS
+# =============================================================================
+
+def cluster(bits, radii, tile=TILE):
+    """Single-linkage cluster labels of the bitsets for each radius"""
+    finds = [UnionFind(bits.shape[0]) for _ in radii]
+    for i0, j0, d in hamming_tiles(bits, tile):
+        for r, uf in zip(radii, finds):
+            a, b = np.nonzero(d <= r)
+            uf.union(a + i0, b + j0)
+    return [uf.labels() for uf in finds]
+
+
+def cluster_stats(bits, labels, tile=TILE):
+    """Per cluster: size, diameter, gap to the nearest other cluster and
+    which cluster that is (-1 if there is only one), for each labelling
+    """
+    # The nearest other cluster is tracked as one key, distance · K +
+    # cluster, in int32 when that fits
+    n = 64 * bits.shape[1]
+    out = []
+    for lab in labels:
+        k = int(lab.max()) + 1
+        dtype = np.int32 if (n + 1) * k < 2 ** 31 else np.int64
+        out.append({"size": np.bincount(lab, minlength=k),
+                    "diameter": np.zeros(k, dtype=np.int64),
+                    "key": np.full(k, np.iinfo(dtype).max, dtype=dtype)})
+    for i0, j0, d in hamming_tiles(bits, tile):
+        for lab, st in zip(labels, out):
+            k, key = st["size"].size, st["key"]
+            li, lj = lab[i0:i0 + d.shape[0]], lab[j0:j0 + d.shape[1]]
+            same = li[:, None] == lj[None, :]
+            if same.any():
+                np.maximum.at(st["diameter"], li, np.where(same, d, 0).max(axis=1))
+                if same.all():
+                    continue
+            big = np.iinfo(key.dtype).max
+            dk = d.astype(key.dtype) * key.dtype.type(k)
+            np.minimum.at(key, li, np.where(same, big, dk + lj.astype(key.dtype)).min(axis=1))
+            np.minimum.at(key, lj, np.where(same, big, dk + li[:, None].astype(key.dtype))
+                          .min(axis=0))
+    for st in out:
+        k = st["size"].size
+        key = st.pop("key")
+        none = key == np.iinfo(key.dtype).max
+        key = key.astype(np.int64)
+        st["gap"] = np.where(none, -1, key // k)
+        st["nearest"] = np.where(none, -1, key % k)
+    return out
+
+# =============================================================================
+# COLLECTING SOLUTIONS
+# =============================================================================
+
+def collect_annealed(formula, count, chains=4096, temperature=0.15, every=5,
+                     max_sweeps=100000, seed=0):
+    """Up to count distinct solutions from E = 0 annealer snapshots"""
+    ann = Annealer(formula, chains, seed)
+    found = np.zeros((0, -(-formula.n // 64)), dtype=np.uint64)
+    for sweep in range(1, max_sweeps + 1):
+        ann.sweep(temperature)
+        if sweep % every:
+            continue
+        zero = np.nonzero(ann.energy == 0)[0]
+        if zero.size:
+            a = _unpack(ann.x[:-1])[:, zero].T
+            found = np.unique(np.concatenate((found, pack(a))), axis=0)
+            if found.shape[0] >= count:
+                break
+    # Keep a random subset, not the lexicographically first
+    keep = np.random.default_rng(seed).permutation(found.shape[0])[:count]
+    return found[np.sort(keep)], sweep
+
+
+def collect_cdcl(formula, count):
+    """Up to count solutions by CDCL enumeration"""
+    models = list(Solver(formula).solutions(count))
+    return pack(np.array(models).reshape(len(models), formula.n))
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=500)
+    parser.add_argument("--alpha", type=float, default=4.0)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--source", choices=("anneal", "cdcl"), default="anneal")
+    parser.add_argument("--count", type=int, default=20000, help="solutions to collect")
+    parser.add_argument("--chains", type=int, default=4096)
+    parser.add_argument("--temperature", type=float, default=0.15)
+    parser.add_argument("--every", type=int, default=5, help="sweeps between snapshots")
+    parser.add_argument("--radius", default="0.02,0.05",
+                        help="comma-separated connectivity radii, < 1 meaning a fraction of n")
+    parser.add_argument("--tile", type=int, default=TILE)
+    parser.add_argument("--top", type=int, default=10, help="clusters to list")
+    parser.add_argument("--load", help="read solutions from an npz written by --save")
+    parser.add_argument("--save", help="write the solutions (packed) to an npz")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("SOLUTION-SPACE CLUSTERS OF k-SAT")
+    print("=" * 70)
+
+    f = random_ksat(args.n, args.alpha, args.k, args.seed)
+    print(f"\n{args.k}-SAT n = {f.n}, m = {f.m} (α = {f.m / f.n:.3f}), seed {args.seed}")
+    start = time.perf_counter()
+    if args.load:
+        bits = np.load(args.load)["bits"]
+        how = f"loaded from {args.load}"
+    elif args.source == "cdcl":
+        bits = collect_cdcl(f, args.count)
+        how = "CDCL enumeration" + (" (complete)" if bits.shape[0] < args.count else "")
+    else:
+        bits, sweeps = collect_annealed(f, args.count, args.chains, args.temperature,
+                                        args.every, seed=args.seed)
+        how = f"{sweeps} sweeps of {args.chains} chains at T = {args.temperature}"
+    print(f"{bits.shape[0]:,} distinct solutions, {how}: "
+          f"{time.perf_counter() - start:.1f} s")
+    if bits.shape[0] == 0:
+        return
+    bad = check(f, bits)
+    assert bad == 0, f"{bad} bitsets violate the formula"
+    if args.save:
+        np.savez(args.save, n=f.n, bits=bits)
+        print(f"Written to {args.save}")
+
+    radii = [int(round(r * f.n)) if r < 1 else int(r)
+             for r in (float(v) for v in args.radius.split(","))]
+    pairs = bits.shape[0] * (bits.shape[0] - 1) // 2
+    start = time.perf_counter()
+    labels = cluster(bits, radii, args.tile)
+    t1 = time.perf_counter() - start
+    stats = cluster_stats(bits, labels, args.tile)
+    t2 = time.perf_counter() - start - t1
+    print(f"{pairs:,} pairs, {bits.nbytes / 2 ** 20:.1f} MiB of bitsets: "
+          f"clustering {t1:.1f} s, diameters and gaps {t2:.1f} s "
+          f"({2 * pairs / (t1 + t2) / 1e6:.1f} M pairs/s)")
+
+    print(f"\np_vs_np.py asserts separation ~0.1 n = {0.1 * f.n:g} and "
+          f"~exp(0.1 n) = 10^{0.1 * f.n / np.log(10):.1f} clusters")
+    for r, st in zip(radii, stats):
+        size, diam, gap = st["size"], st["diameter"], st["gap"]
+        order = np.argsort(-size, kind="stable")
+        print(f"\nradius r = {r} ({r / f.n:.3f} n): {size.size:,} clusters, "
+              f"{np.count_nonzero(size == 1):,} singletons")
+        print(f"  largest diameter {diam.max()} ({diam.max() / f.n:.3f} n); "
+              + (f"gaps {gap[gap >= 0].min()} … {gap.max()} "
+                 f"(median {np.median(gap[gap >= 0]):.0f})" if (gap >= 0).any()
+                 else "one cluster, no gap"))
+        print(f"  {'cluster':>8} {'size':>8} {'diameter':>9} {'gap':>6} {'nearest':>8}")
+        for c in order[:args.top]:
+            print(f"  {c:>8} {size[c]:>8,} {diam[c]:>9} {gap[c]:>6} {st['nearest'][c]:>8}")
+
+
+if __name__ == "__main__":
+    main()
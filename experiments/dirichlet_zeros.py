@@ -0,0 +1,454 @@
+"""
+DIRICHLET L-FUNCTION ZEROS FOR ALL CHARACTERS MOD q
+===================================================
+
+For a primitive character χ mod q of parity a (χ(-1) = (-1)^a) the
+completed function Λ(s, χ) = (q/π)^{(s+a)/2} Γ((s+a)/2) L(s, χ) satisfies
+Λ(s, χ) = ε(χ) Λ(1-s, χ̄) with ε(χ) = τ(χ)/(i^a √q), so
+
+    Z_χ(t) = ε(χ)^{-1/2} e^{iθ_a(t)} L(1/2 + it, χ),
+    θ_a(t) = (t/2) log(q/π) + Im log Γ((1/2 + a + it)/2),
+
+is real, and its sign changes are zeros on the critical line.  Zeros
+with t < 0 are those of χ̄ reflected, so t > 0 covers every character.
+
+All characters are evaluated at once.  Euler-Maclaurin summation of
+each residue class a mod q,
+
+    S_a(s) = Σ_{m<M} (mq + a)^{-s} + tail(qM + a),
+
+shares one table of n^{-s}, n < qM, between all φ(q) characters, and
+
+    L(s, χ) = Σ_a χ(a) S_a(s)
+
+is a Fourier transform over the unit group (ℤ/q)^×.  Writing the group
+as a product of cyclic factors (one per prime power of q, two for 2^e
+with e ≥ 3) and every unit as a vector of discrete logarithms, one
+multidimensional FFT per t gives L for every character mod q; the same
+transform of e^{2πia/q} gives all the Gauss sums τ(χ).  Primitive
+characters are picked out by their components.
+
+Since one grid point gives Z_χ for every character while refining a
+single zero costs as much as a grid point, the grid is made dense (32
+points per mean zero spacing) and the zeros are located on it: sign
+changes are refined by the Illinois iteration of riemann_siegel.py run
+on 12-point Lagrange interpolation of the samples, for all characters
+in one batch (their grids laid end to end).  Results go to one compact
+binary file: a header, a per-character index and the float64 ordinates.
+
+Usage:
+    python dirichlet_zeros.py --q 1009 --T 20 --output l_zeros_1009.lzs
+"""
+
+import argparse
+import json
+import math
+import struct
+import time
+
+import numpy as np
+
+from riemann_siegel import bernoulli_numbers, refine_roots
+
+EM_TERMS = 16
+CHUNK_TERMS = 1 << 21           # (t, n) terms per block of the residue sums
+
+
+def _coefficients(terms=EM_TERMS):
+    b = bernoulli_numbers(2 * terms + 3)
+    em = np.array([float(b[2 * k] / math.factorial(2 * k)) for k in range(1, terms + 1)])
+    stirling = np.array([float(b[2 * k] / (2 * k * (2 * k - 1))) for k in range(1, 9)])
+    return em, stirling
+
+
+EM_COEFFS, STIRLING_COEFFS = _coefficients()
+
+# =============================================================================
+# THE CHARACTER GROUP
+# =============================================================================
+
+def factorize(n):
+    """{p: e} for n ≥ 1 by trial division"""
+    out, p = {}, 2
+    while p * p <= n:
+        while n % p == 0:
+            out[p] = out.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        out[n] = out.get(n, 0) + 1
+    return out
+
+
+def _primitive_root(p):
+    phi = p - 1
+    factors = list(factorize(phi))
+    for g in range(2, p):
+        if all(pow(g, phi // f, p) != 1 for f in factors):
+            return g
+    return 1
+
+
+class CharacterGroup:
+    """(ℤ/q)^× as a product of cyclic factors, with discrete logarithms
+
+    Unit n has coordinates k(n) = (k_1, ..., k_r) with 0 ≤ k_i < orders[i];
+    the character with index j = (j_1, ..., j_r) is
+
+        χ_j(n) = exp(-2πi Σ_i j_i k_i(n) / orders[i]),
+
+    which is the sign convention of numpy.fft.fftn, so fftn of a function
+    laid out on the coordinate grid returns Σ_n f(n) χ_j(n) for every j.
+    """
+
+    def __init__(self, q):
+        self.q = q = int(q)
+        if q < 2:
+            raise ValueError("modulus must be at least 2")
+        n = np.arange(q)
+        self.units = n[np.gcd(n, q) == 1]
+        orders, coords, primitive, minus = [], [], [], []
+        for p, e in sorted(factorize(q).items()):
+            pe = p ** e
+            r = self.units % pe
+            if p == 2 and e == 1:
+                # (ℤ/2)^× is trivial and no character mod q ≡ 2 (4) is primitive
+                primitive.append(None)
+                continue
+            if p == 2 and e >= 3:
+                # ±5^k: one factor for the sign, one of order 2^{e-2}
+                order = pe // 4
+                table = np.zeros(pe, dtype=np.int64)
+                sign = np.zeros(pe, dtype=np.int64)
+                x = 1
+                for k in range(order):
+                    table[x], table[pe - x] = k, k
+                    sign[pe - x] = 1
+                    x = x * 5 % pe
+                orders += [2, order]
+                coords += [sign[r], table[r]]
+                primitive += [lambda j: np.ones_like(j, dtype=bool), lambda j: j % 2 == 1]
+                minus += [1, 0]
+                continue
+            g = 3 if pe == 4 else _primitive_root(p)
+            if e > 1 and p != 2 and pow(g, p - 1, p * p) == 1:
+                g += p                      # a primitive root mod p² lifts to p^e
+            order = pe - pe // p
+            table = np.zeros(pe, dtype=np.int64)
+            x = 1
+            for k in range(order):
+                table[x] = k
+                x = x * g % pe
+            orders.append(order)
+            coords.append(table[r])
+            minus.append(table[pe - 1])
+            if e == 1 or p == 2:
+                primitive.append(lambda j: j != 0)
+            else:
+                primitive.append(lambda j, p=p: j % p != 0)
+        self.orders = tuple(orders)
+        self.coords = np.stack(coords, axis=1) if coords else np.zeros((self.units.size, 0), int)
+        grid = np.indices(self.orders).reshape(len(self.orders), math.prod(self.orders))
+        self.index = grid.T                                   # j for each character
+        self.primitive = np.ones(grid.shape[1], dtype=bool)
+        phase = np.zeros(grid.shape[1])
+        if None in primitive:
+            self.primitive[:] = False
+            primitive.remove(None)
+        for i, order in enumerate(self.orders):
+            self.primitive &= primitive[i](grid[i])
+            phase += grid[i] * minus[i] / order
+        # χ_j(-1) = ±1 fixes the parity a ∈ {0, 1}
+        self.parity = (np.rint(2 * phase) % 2).astype(np.int64)
+
+    @property
+    def size(self):
+        return self.units.size
+
+    def transform(self, values):
+        """Σ_a values[..., a] χ_j(a) for every character j
+
+        values has a trailing axis over self.units; the result has a
+        trailing axis over the characters in self.index order.
+        """
+        values = np.asarray(values)
+        lead = values.shape[:-1]
+        grid = np.zeros(lead + self.orders, dtype=np.complex128)
+        grid[(Ellipsis,) + tuple(self.coords.T)] = values
+        axes = tuple(range(len(lead), len(lead) + len(self.orders)))
+        return np.fft.fftn(grid, axes=axes).reshape(lead + (-1,))
+
+    def values(self, j):
+        """χ_j(a) for every unit a; j of shape (..., r) gives (..., units)"""
+        j = np.asarray(j)[..., None, :]
+        turns = (self.coords * j) % self.orders / self.orders
+        return np.exp(-2j * np.pi * turns.sum(axis=-1))
+
+# =============================================================================
+# L(1/2 + it, χ) FOR ALL χ
+# =============================================================================
+
+def log_gamma(z, shift=10):
+    """log Γ(z) with continuous imaginary part, Re z > 0 (Stirling after a shift)"""
+    z = np.asarray(z, dtype=np.complex128)
+    w = z + shift
+    total = (w - 0.5) * np.log(w) - w + 0.5 * math.log(2 * math.pi)
+    power = 1.0 / w
+    for c in STIRLING_COEFFS:
+        total += c * power
+        power /= w * w
+    return total - sum(np.log(z + k) for k in range(shift))
+
+
+def em_blocks(t, q, terms=EM_TERMS):
+    """M with qM ≈ q|s + 2K|/π, the Euler-Maclaurin cutoff per residue class"""
+    return int(np.ceil(np.abs(0.5 + 1j * np.max(np.abs(t)) + 2 * terms) / np.pi)) + 1
+
+
+def residue_sums(t, group, terms=EM_TERMS):
+    """S_a(1/2 + it) for every t and unit a, shape (len(t), group.size)"""
+    t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+    q = group.q
+    m = em_blocks(t, q, terms)
+    n = np.arange(1, q * m + 1, dtype=np.float64).reshape(m, q)[:, group.units - 1]
+    # n = mq + a for m = 0 ... M-1, column per unit a
+    log_n = np.log(n).ravel()
+    amp = np.exp(-0.5 * log_n)
+    out = np.empty((t.size, group.size), dtype=np.complex128)
+    rows = max(1, CHUNK_TERMS // log_n.size)
+    for lo in range(0, t.size, rows):
+        tt = t[lo:lo + rows]
+        terms_ = amp * np.exp(-1j * np.outer(tt, log_n))
+        out[lo:lo + rows] = terms_.reshape(tt.size, m, group.size).sum(axis=1)
+
+    # Tail Σ_{m ≥ M} f(m) with f(x) = (qx + a)^{-s}, y = qM + a
+    s = 0.5 + 1j * t[:, None]
+    y = (q * m + group.units).astype(np.float64)[None, :]
+    y_s = np.exp(-s * np.log(y))
+    tail = y * y_s / (q * (s - 1)) + 0.5 * y_s
+    # f^{(2k-1)}(M) = -q^{2k-1} s(s+1)···(s+2k-2) y^{-s-2k+1}
+    p = q * s / y
+    for k in range(terms):
+        tail += EM_COEFFS[k] * p * y_s
+        p = p * q * q * (s + 2 * k + 1) * (s + 2 * k + 2) / (y * y)
+    return out + tail
+
+
+def theta_l(t, parity, q):
+    """θ_a(t) = (t/2) log(q/π) + Im log Γ((1/2 + a + it)/2)"""
+    t = np.asarray(t, dtype=np.float64)
+    return 0.5 * t * math.log(q / math.pi) + log_gamma(0.25 + 0.5 * parity + 0.5j * t).imag
+
+
+def root_numbers(group):
+    """ε(χ) = τ(χ)/(i^a √q) for every character"""
+    tau = group.transform(np.exp(2j * np.pi * group.units / group.q))
+    return tau / (1j ** group.parity * math.sqrt(group.q))
+
+
+def hardy_z(t, group, chars=None):
+    """Z_χ(t) for the characters `chars` (default: all primitive ones)
+
+    Returns an array of shape (len(t), len(chars)).
+    """
+    chars = np.flatnonzero(group.primitive) if chars is None else np.asarray(chars)
+    t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+    eps = root_numbers(group)[chars]
+    parity = group.parity[chars]
+    l = group.transform(residue_sums(t, group))[:, chars]
+    phase = np.exp(1j * (theta_l(t[:, None], parity[None, :], group.q)
+                         - 0.5 * np.angle(eps)[None, :]))
+    return (phase * l).real
+
+
+def hardy_z_pairs(t, chars, group, block=1024):
+    """Z_χ(t) for pairs (t[i], chars[i]), one character per point"""
+    t = np.asarray(t, dtype=np.float64)
+    chars = np.asarray(chars)
+    rotate = -0.5 * np.angle(root_numbers(group))
+    out = np.empty(t.size)
+    for lo in range(0, t.size, block):
+        tt, cc = t[lo:lo + block], chars[lo:lo + block]
+        l = np.einsum("ij,ij->i", residue_sums(tt, group),
+                      group.values(group.index[cc]))
+        phase = np.exp(1j * (theta_l(tt, group.parity[cc], group.q) + rotate[cc]))
+        out[lo:lo + block] = (phase * l).real
+    return out
+
+# =============================================================================
+# ZERO SEARCH
+# =============================================================================
+
+STENCIL = 12                    # grid points per interpolated value
+# Barycentric weights (-1)^k C(n-1, k) of equispaced Lagrange interpolation
+WEIGHTS = np.array([(-1) ** k * math.comb(STENCIL - 1, k) for k in range(STENCIL)],
+                   dtype=np.float64)
+
+
+def interpolate(x, samples):
+    """Lagrange interpolation of samples[k] at fractional positions x
+
+    Uses the STENCIL samples around each x, which must lie inside the
+    array.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    nodes = np.floor(x).astype(np.int64)[:, None] + np.arange(1 - STENCIL // 2,
+                                                             1 + STENCIL // 2)
+    d = x[:, None] - nodes
+    exact = d == 0.0
+    d[exact] = 1.0
+    c = WEIGHTS / d
+    f = samples[nodes]
+    value = (c * f).sum(axis=1) / c.sum(axis=1)
+    hit = exact.any(axis=1)
+    value[hit] = f[exact]
+    return value
+
+
+def find_zeros(q, height, oversample=32, polish=False):
+    """Zeros 0 < t < height of L(s, χ) for every primitive χ mod q
+
+    Z_χ is sampled for all characters at once on a grid of `oversample`
+    points per mean zero spacing, which costs one FFT per point.  The
+    roots are then found on the STENCIL-point interpolant of the samples
+    (accurate to ~1e-11 at the defaults) and, with polish, moved by one
+    Newton step using Z_χ itself, which costs qM exponentials per zero.
+
+    Returns (group, chars, zeros) with zeros[i] the ascending ordinates
+    for the character group.index[chars[i]].
+    """
+    group = CharacterGroup(q)
+    chars = np.flatnonzero(group.primitive)
+    if chars.size == 0:
+        return group, chars, []
+    spacing = 2 * np.pi / max(math.log(q * height / (2 * np.pi)), 1.0)
+    h = spacing / oversample
+    pad = STENCIL // 2
+    k = int(np.ceil(height / h)) + 2 * pad + 1
+    t0 = -pad * h
+    z = hardy_z(t0 + h * np.arange(k), group, chars).T        # (chars, k)
+
+    # All characters' grids laid end to end: position u = i·k + (t - t₀)/h
+    samples = z.ravel()
+    inside = slice(pad, k - pad)
+    change = np.signbit(z[:, inside][:, :-1]) != np.signbit(z[:, inside][:, 1:])
+    row, cell = np.nonzero(change)
+    lo = row * k + cell + pad
+    u = refine_roots(lo, lo + 1, samples[lo], samples[lo + 1],
+                     lambda x: interpolate(x, samples))
+    t = t0 + h * (u - row * k)
+
+    if polish and t.size:
+        du = 1e-3
+        slope = (interpolate(u + du, samples) - interpolate(u - du, samples)) / (2 * du * h)
+        t = t - hardy_z_pairs(t, chars[row], group) / slope
+    keep = (t > 0) & (t < height)
+    bounds = np.searchsorted(row[keep], np.arange(chars.size + 1))
+    t = t[keep]
+    zeros = [np.sort(t[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    return group, chars, zeros
+
+
+def expected_count(q, height):
+    """(T/2π) log(qT/2πe), the main term of N(T, χ) for 0 < t < T"""
+    return height / (2 * np.pi) * math.log(q * height / (2 * np.pi * np.e))
+
+# =============================================================================
+# BINARY ZERO TABLES
+# =============================================================================
+
+MAGIC = b"LZTABLE1"
+# magic, q, characters, zeros, height, len(json)
+HEADER = struct.Struct("<8sQQQdI")
+INDEX = np.dtype([("char", "<i8"), ("parity", "<i1"), ("offset", "<i8"),
+                  ("count", "<i8")])
+
+
+def write_zero_tables(path, group, chars, zeros, height):
+    """Header, JSON group description, per-character index, ordinates"""
+    meta = json.dumps({"orders": list(group.orders)}).encode()
+    index = np.zeros(len(chars), dtype=INDEX)
+    index["char"] = chars
+    index["parity"] = group.parity[chars]
+    index["count"] = [z.size for z in zeros]
+    index["offset"] = np.cumsum(index["count"]) - index["count"]
+    data = np.concatenate(zeros) if zeros else np.empty(0)
+    with open(path, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, group.q, len(chars), data.size, height, len(meta)))
+        fh.write(meta)
+        fh.write(index.tobytes())
+        fh.write(data.astype("<f8").tobytes())
+
+
+def read_zero_tables(path):
+    """{character index tuple j: zeros} and the header fields"""
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    magic, q, n_chars, n_zeros, height, size = HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an L-function zero table")
+    pos = HEADER.size
+    orders = tuple(json.loads(raw[pos:pos + size])["orders"])
+    pos += size
+    index = np.frombuffer(raw, dtype=INDEX, count=n_chars, offset=pos)
+    data = np.frombuffer(raw, dtype="<f8", count=n_zeros,
+                         offset=pos + index.nbytes)
+    tables = {}
+    for row in index:
+        j = tuple(int(v) for v in np.unravel_index(row["char"], orders))
+        tables[j] = data[row["offset"]:row["offset"] + row["count"]]
+    return {"q": q, "height": height, "orders": orders}, tables
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--q", type=int, default=1009, help="modulus")
+    parser.add_argument("--T", type=float, default=20.0, help="height")
+    parser.add_argument("--output", help="write the zero tables to this file")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"ZEROS OF L(s, χ) FOR THE PRIMITIVE CHARACTERS MOD {args.q}")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    group, chars, zeros = find_zeros(args.q, args.T)
+    elapsed = time.perf_counter() - start
+    counts = np.array([z.size for z in zeros])
+    print(f"\nGroup (ℤ/{args.q})^× ≅ " + (" × ".join(f"C{o}" for o in group.orders) or "1")
+          + f", {group.size} characters, {chars.size} primitive")
+    if chars.size == 0:
+        return
+    print(f"Zeros with 0 < t < {args.T:g}: {counts.sum():,} in {elapsed:.2f} s "
+          f"({counts.sum() / elapsed:,.0f} zeros/s)")
+    print(f"Per character: {counts.min()} … {counts.max()}, mean {counts.mean():.2f}; "
+          f"main term (T/2π) log(qT/2πe) = {expected_count(args.q, args.T):.2f}")
+
+    # Newton corrections -Z/Z' from Z_χ itself on a sample of the zeros
+    owner = np.repeat(chars, counts)
+    flat = np.concatenate(zeros)
+    pick = np.random.default_rng(0).choice(flat.size, min(flat.size, 500), replace=False)
+    gamma, who, du = flat[pick], owner[pick], 1e-6
+    slope = (hardy_z_pairs(gamma + du, who, group)
+             - hardy_z_pairs(gamma - du, who, group)) / (2 * du)
+    step = np.abs(hardy_z_pairs(gamma, who, group) / slope)
+    print(f"Newton correction on {pick.size} sampled zeros: max {step.max():.1e}, "
+          f"median {np.median(step):.1e}")
+
+    lowest = np.argsort([z[0] if z.size else np.inf for z in zeros])[:5]
+    print(f"\n{'χ index':>16} {'parity':>7} {'first zeros':>40}")
+    for i in lowest:
+        j = tuple(int(v) for v in group.index[chars[i]])
+        print(f"{str(j):>16} {group.parity[chars[i]]:>7} "
+              + " ".join(f"{v:.9f}" for v in zeros[i][:3]))
+
+    if args.output:
+        write_zero_tables(args.output, group, chars, zeros, args.T)
+        print(f"\nZero tables written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
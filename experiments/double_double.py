@@ -0,0 +1,619 @@
+"""
+VECTORIZED DOUBLE-DOUBLE ARITHMETIC
+===================================
+
+A double-double number is an unevaluated sum hi + lo of two float64 with
+|lo| ≤ ulp(hi)/2, carrying about 106 bits (≈ 32 decimal digits).  Every
+operation is a short, branch-free sequence of float64 operations built on
+the error-free transformations
+
+    two_sum(a, b)  = (s, e) with s = fl(a + b) and a + b = s + e exactly
+    two_prod(a, b) = (p, e) with p = fl(a · b) and a · b = p + e exactly
+
+(Knuth; Dekker's splitting, since NumPy exposes no fused multiply-add), so
+whole NumPy arrays are processed at once and the cost is a constant
+number of float64 passes per operation rather than one Python object per
+element.
+
+DD holds a pair of arrays and supports +, -, *, / with DD or float
+operands; sqrt, exp, log, sincos and atan2 follow the QD library
+(Hida, Li and Bailey), except that exp reduces against two tables of
+e^{j/256} and e^{i/65536} to |r| ≤ 2^-17, where e^r - 1 needs only
+r + r²/2 in double-double and a float64 tail, instead of squaring nine
+times.  log is one Newton step on exp, sin/cos a reduction modulo 2π/64
+against a table.  DDComplex pairs two DD for complex arithmetic.
+
+This is not a small constant factor over float64: every operation is a
+chain of NumPy passes over the block.  Measured with --size 10^6, add
+and mul cost about 8x float64, div 15-30x, sincos about 20x, and exp
+and log 60-160x (≈ 300 and 400 ns per element against NumPy's
+vectorized exp and log).  That is still 30-60x cheaper than 32-digit
+Python Decimal.
+
+Usage:
+    python double_double.py --size 1000000
+"""
+
+import argparse
+import time
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import numpy as np
+
+SPLITTER = 134217729.0  # 2^27 + 1
+
+# =============================================================================
+# ERROR-FREE TRANSFORMATIONS
+# =============================================================================
+
+def two_sum(a, b):
+    """s + e = a + b exactly, s = fl(a + b)"""
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
+def quick_two_sum(a, b):
+    """two_sum for |a| ≥ |b|"""
+    s = a + b
+    return s, b - (s - a)
+
+
+def split(a):
+    """a = hi + lo with hi, lo of at most 26 significant bits"""
+    t = SPLITTER * a
+    hi = t - (t - a)
+    return hi, a - hi
+
+
+def two_prod(a, b):
+    """p + e = a · b exactly, p = fl(a · b)"""
+    p = a * b
+    ah, al = split(a)
+    bh, bl = split(b)
+    return p, ((ah * bh - p) + ah * bl + al * bh) + al * bl
+
+# =============================================================================
+# REAL DOUBLE-DOUBLE ARRAYS
+# =============================================================================
+
+class DD:
+    """Array of double-double numbers hi + lo"""
+
+    __slots__ = ("hi", "lo")
+    __array_priority__ = 20   # make float64 arrays defer to DD operators
+
+    def __init__(self, hi, lo=None):
+        self.hi = np.asarray(hi, dtype=np.float64)
+        self.lo = np.zeros_like(self.hi) if lo is None else np.asarray(lo, dtype=np.float64)
+
+    @classmethod
+    def from_decimal(cls, values):
+        """DD from decimal strings, Decimals or Fractions (exact rounding)"""
+        values = np.atleast_1d(np.asarray(values, dtype=object))
+        hi = np.array([float(v) for v in values.ravel()])
+        lo = np.array([float(Fraction(v) - Fraction(h))
+                       for v, h in zip(values.ravel(), hi)])
+        return cls(hi.reshape(values.shape), lo.reshape(values.shape))
+
+    def to_decimal(self):
+        """Object array of Decimal(hi) + Decimal(lo)"""
+        out = np.empty(self.hi.shape, dtype=object)
+        with localcontext(prec=40):
+            for i, (h, l) in enumerate(zip(self.hi.ravel(), self.lo.ravel())):
+                out.flat[i] = Decimal(float(h)) + Decimal(float(l))
+        return out
+
+    def __float__(self):
+        return float(self.hi)
+
+    def __repr__(self):
+        return f"DD({self.to_decimal()!r})"
+
+    @property
+    def shape(self):
+        return self.hi.shape
+
+    def __len__(self):
+        return len(self.hi)
+
+    def __getitem__(self, key):
+        return DD(self.hi[key], self.lo[key])
+
+    def __setitem__(self, key, value):
+        value = _dd(value)
+        self.hi[key] = value.hi
+        self.lo[key] = value.lo
+
+    def copy(self):
+        return DD(self.hi.copy(), self.lo.copy())
+
+    # -------------------------------------------------------------------------
+    # Arithmetic
+    # -------------------------------------------------------------------------
+
+    def __neg__(self):
+        return DD(-self.hi, -self.lo)
+
+    def __abs__(self):
+        return DD(np.abs(self.hi), np.where(self.hi < 0, -self.lo, self.lo))
+
+    def __add__(self, other):
+        if not isinstance(other, DD):
+            s, e = two_sum(self.hi, np.asarray(other, dtype=np.float64))
+            return DD(*quick_two_sum(s, e + self.lo))
+        s, e = two_sum(self.hi, other.hi)
+        t, f = two_sum(self.lo, other.lo)
+        s, e = quick_two_sum(s, e + t)
+        return DD(*quick_two_sum(s, e + f))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-_dd(other))
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if not isinstance(other, DD):
+            b = np.asarray(other, dtype=np.float64)
+            p, e = two_prod(self.hi, b)
+            return DD(*quick_two_sum(p, e + self.lo * b))
+        p, e = two_prod(self.hi, other.hi)
+        e = e + (self.hi * other.lo + self.lo * other.hi)
+        return DD(*quick_two_sum(p, e))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        other = _dd(other)
+        q1 = self.hi / other.hi
+        r = self - other * q1
+        q2 = r.hi / other.hi
+        r = r - other * q2
+        q3 = r.hi / other.hi
+        return DD(*quick_two_sum(q1, q2)) + q3
+
+    def __rtruediv__(self, other):
+        return _dd(other) / self
+
+    def square(self):
+        p, e = two_prod(self.hi, self.hi)
+        e = e + 2 * self.hi * self.lo
+        return DD(*quick_two_sum(p, e))
+
+    def ldexp(self, k):
+        """Exact multiplication by 2^k"""
+        return DD(np.ldexp(self.hi, k), np.ldexp(self.lo, k))
+
+    # -------------------------------------------------------------------------
+    # Comparisons and reductions
+    # -------------------------------------------------------------------------
+
+    def __lt__(self, other):
+        other = _dd(other)
+        return (self.hi < other.hi) | ((self.hi == other.hi) & (self.lo < other.lo))
+
+    def __gt__(self, other):
+        return _dd(other) < self
+
+    def sign(self):
+        return np.sign(np.where(self.hi == 0, self.lo, self.hi))
+
+    def sum(self, axis=-1):
+        """Double-double sum along an axis by pairwise (tree) reduction"""
+        hi = np.moveaxis(self.hi, axis, -1)
+        lo = np.moveaxis(self.lo, axis, -1)
+        acc = DD(hi, lo)
+        while acc.hi.shape[-1] > 1:
+            n = acc.hi.shape[-1]
+            half = n // 2
+            head = acc[..., :half] + acc[..., half:2 * half]
+            if n % 2:
+                head = DD(np.concatenate([head.hi, acc.hi[..., -1:]], axis=-1),
+                          np.concatenate([head.lo, acc.lo[..., -1:]], axis=-1))
+            acc = head
+        if acc.hi.shape[-1] == 0:
+            return DD(np.zeros(hi.shape[:-1]))
+        return acc[..., 0]
+
+
+def _dd(x):
+    return x if isinstance(x, DD) else DD(x)
+
+
+def where(cond, a, b):
+    """Elementwise choice between two DD arrays"""
+    a, b = _dd(a), _dd(b)
+    return DD(np.where(cond, a.hi, b.hi), np.where(cond, a.lo, b.lo))
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+PI_DIGITS = "3.14159265358979323846264338327950288419716939937510582097494"
+LN2_DIGITS = "0.693147180559945309417232121458176568075500134360255254120680"
+TABLE_SIZE = 64          # sin/cos table over the circle in steps of 2π/64
+EXP_STEPS = 256          # exp tables in steps of 1/256 and 1/256²
+BLOCK = 4096             # elements per block in blockwise()
+
+
+def _decimal_sin_cos(x, digits=40):
+    """Reference sin and cos in decimal arithmetic (Taylor series)"""
+    with localcontext(prec=digits + 10):
+        pi = Decimal(PI_DIGITS)
+        x = x - (2 * pi) * (x / (2 * pi)).to_integral_value()
+        s = c = Decimal(0)
+        term, n = Decimal(1), 0
+        while abs(term) > Decimal(10) ** -(digits + 5) or n < 2:
+            if n % 2 == 0:
+                c += term if n % 4 == 0 else -term
+            else:
+                s += term if n % 4 == 1 else -term
+            n += 1
+            term = term * x / n
+        return s, c
+
+
+def _parts(value, count):
+    """value as a sum of `count` non-overlapping doubles"""
+    value, out = Fraction(value), []
+    for _ in range(count):
+        out.append(float(value))
+        value -= Fraction(out[-1])
+    return out
+
+
+def _constant(value):
+    hi, lo = _parts(value, 2)
+    return DD(np.float64(hi), np.float64(lo))
+
+
+PI = _constant(Decimal(PI_DIGITS))
+TWO_PI = PI.ldexp(1)
+LN2 = _constant(Decimal(LN2_DIGITS))
+# 2π/64 to ~159 bits as three doubles, for reducing large arguments
+STEP_PARTS = _parts(Fraction(Decimal(PI_DIGITS)) / 32, 3)
+
+
+def _inverse_factorials(n):
+    out, fact = [], 1
+    for k in range(n):
+        fact *= max(k, 1)
+        out.append(_constant(Fraction(1, fact)))
+    return out
+
+
+INV_FACT = _inverse_factorials(24)
+
+
+def _table():
+    with localcontext(prec=60):
+        step = Decimal(PI_DIGITS) / 32
+        pairs = [_decimal_sin_cos(step * m) for m in range(TABLE_SIZE)]
+    sines = [_parts(s, 2) for s, _ in pairs]
+    cosines = [_parts(c, 2) for _, c in pairs]
+    return np.array(sines), np.array(cosines)
+
+
+SIN_TABLE, COS_TABLE = _table()
+
+
+def _exp_tables():
+    """e^{j/256} for |j/256| ≤ ln2/2 and e^{i/256²} for |i| ≤ 128, as (hi, lo)"""
+    with localcontext(prec=60):
+        half = int(np.ceil(float(Decimal(LN2_DIGITS)) / 2 * EXP_STEPS))
+        coarse = [_parts((Decimal(j) / EXP_STEPS).exp(), 2)
+                  for j in range(-half, half + 1)]
+        fine = [_parts((Decimal(i) / EXP_STEPS ** 2).exp(), 2)
+                for i in range(-EXP_STEPS // 2, EXP_STEPS // 2 + 1)]
+    return np.array(coarse), np.array(fine)
+
+
+EXP_COARSE, EXP_FINE = _exp_tables()
+
+# =============================================================================
+# ELEMENTARY FUNCTIONS
+# =============================================================================
+
+def blockwise(fn, *args, size=BLOCK):
+    """fn applied to 1-D DD or array arguments `size` elements at a time
+
+    Every double-double operation makes several passes over its operands;
+    running them on blocks that fit in cache is several times faster than
+    on arrays of millions of elements.  fn may return a DD or a tuple.
+    """
+    n = len(args[0])
+    pieces = [fn(*(a[lo:lo + size] for a in args)) for lo in range(0, n, size)]
+    if isinstance(pieces[0], tuple):
+        return tuple(_concatenate(p) for p in zip(*pieces))
+    return _concatenate(pieces)
+
+
+def _concatenate(pieces):
+    if isinstance(pieces[0], DD):
+        return DD(np.concatenate([p.hi for p in pieces]),
+                  np.concatenate([p.lo for p in pieces]))
+    return np.concatenate(pieces)
+
+
+def _horner(x, coeffs, head):
+    """Σ_j coeffs[j] x^j: the first `head` terms in DD, the rest in float64
+
+    Terms beyond the head are below 1e-16 relative to the sum, so a
+    float64 evaluation of them loses nothing at double-double precision.
+    """
+    tail = np.zeros_like(x.hi)
+    for c in reversed(coeffs[head:]):
+        tail = tail * x.hi + c.hi
+    acc = DD(tail)
+    for c in reversed(coeffs[:head]):
+        acc = acc * x + c
+    return acc
+
+
+SIN_SERIES = [INV_FACT[j] * (-1.0) ** (j // 2) for j in range(1, 20, 2)]
+COS_SERIES = [INV_FACT[j] * (-1.0) ** (j // 2) for j in range(0, 20, 2)]
+
+
+def sqrt(a):
+    """√a for a ≥ 0 (Karp's trick: one correction of the float64 root)"""
+    a = _dd(a)
+    safe = np.where(a.hi > 0, a.hi, 1.0)
+    x = 1.0 / np.sqrt(safe)
+    ax = safe * x
+    p, e = two_prod(ax, ax)
+    corr = ((a - DD(p, e)).hi) * (0.5 * x)
+    out = DD(*two_sum(ax, corr))
+    return where(a.hi > 0, out, DD(np.zeros_like(a.hi)))
+
+
+def exp(a):
+    """e^a = 2^k e^{j/256} e^{i/256²} e^r with |r| ≤ 2^-17"""
+    a = _dd(a)
+    k = np.floor(a.hi / LN2.hi + 0.5)
+    r = a - LN2 * k
+    m = np.round(r.hi * EXP_STEPS ** 2)
+    j = np.round(m / EXP_STEPS)
+    i = m - EXP_STEPS * j
+    r = r - m / EXP_STEPS ** 2           # exact: m/256² is a short float
+    # e^r - 1: r³/6 ≤ 8e-17, so from r³ on float64 carries it to 1e-33
+    x = r.hi
+    s = (r + r.square().ldexp(-1)
+         + x * x * x * (1 / 6 + x * (1 / 24 + x * (1 / 120 + x / 720))))
+    j = (j + (len(EXP_COARSE) - 1) // 2).astype(np.int64)
+    i = (i + EXP_STEPS // 2).astype(np.int64)
+    e = DD(EXP_COARSE[j, 0], EXP_COARSE[j, 1]) * DD(EXP_FINE[i, 0], EXP_FINE[i, 1])
+    return (e + e * s).ldexp(k.astype(np.int64))
+
+
+def log(a):
+    """log a for a > 0: one Newton step y + a e^{-y} - 1 from float64"""
+    a = _dd(a)
+    y = DD(np.log(a.hi))
+    return y + a * exp(-y) - 1.0
+
+
+def sincos(a):
+    """(sin a, cos a) for any finite DD a
+
+    a = m·2π/64 + t with |t| ≤ π/64, reduced against a three-double 2π/64
+    so that arguments up to ~10^15 keep full accuracy; sin t and cos t
+    come from short Taylor series and are rotated by the table entry m.
+    """
+    a = _dd(a)
+    m = np.round(a.hi / STEP_PARTS[0])
+    t = a
+    for c in STEP_PARTS:
+        t = t - DD(*two_prod(m, np.full_like(m, c)))
+    t2 = t.square()
+    s = _horner(t2, SIN_SERIES, 4) * t
+    c = _horner(t2, COS_SERIES, 5)
+    idx = np.mod(m, TABLE_SIZE).astype(np.int64)
+    sm = DD(SIN_TABLE[idx, 0], SIN_TABLE[idx, 1])
+    cm = DD(COS_TABLE[idx, 0], COS_TABLE[idx, 1])
+    return sm * c + cm * s, cm * c - sm * s
+
+
+def sin(a):
+    return sincos(a)[0]
+
+
+def cos(a):
+    return sincos(a)[1]
+
+
+def atan2(y, x):
+    """Angle of (x, y) in (-π, π]: one Newton step from float64 arctan2"""
+    y, x = _dd(y), _dd(x)
+    phi = DD(np.arctan2(y.hi, x.hi))
+    s, c = sincos(phi)
+    return phi + (y * c - x * s) / (x * c + y * s)
+
+# =============================================================================
+# COMPLEX DOUBLE-DOUBLE ARRAYS
+# =============================================================================
+
+class DDComplex:
+    """Array of complex numbers with double-double real and imaginary parts"""
+
+    __slots__ = ("re", "im")
+    __array_priority__ = 20
+
+    def __init__(self, re, im=None):
+        self.re = _dd(re)
+        self.im = DD(np.zeros_like(self.re.hi)) if im is None else _dd(im)
+
+    @classmethod
+    def from_complex(cls, z):
+        z = np.asarray(z, dtype=np.complex128)
+        return cls(DD(z.real.copy()), DD(z.imag.copy()))
+
+    def to_complex(self):
+        return self.re.hi + 1j * self.im.hi
+
+    @property
+    def shape(self):
+        return self.re.shape
+
+    def __getitem__(self, key):
+        return DDComplex(self.re[key], self.im[key])
+
+    def conj(self):
+        return DDComplex(self.re, -self.im)
+
+    def __neg__(self):
+        return DDComplex(-self.re, -self.im)
+
+    def __add__(self, other):
+        other = _ddc(other)
+        return DDComplex(self.re + other.re, self.im + other.im)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = _ddc(other)
+        return DDComplex(self.re - other.re, self.im - other.im)
+
+    def __rsub__(self, other):
+        return _ddc(other) - self
+
+    def __mul__(self, other):
+        if isinstance(other, (DD, float, int)) or (
+                isinstance(other, np.ndarray) and not np.iscomplexobj(other)):
+            return DDComplex(self.re * other, self.im * other)
+        other = _ddc(other)
+        return DDComplex(self.re * other.re - self.im * other.im,
+                         self.re * other.im + self.im * other.re)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, (DD, float, int)) or (
+                isinstance(other, np.ndarray) and not np.iscomplexobj(other)):
+            return DDComplex(self.re / other, self.im / other)
+        other = _ddc(other)
+        return self * other.conj() * (1.0 / other.abs2())
+
+    def __rtruediv__(self, other):
+        return _ddc(other) / self
+
+    def abs2(self):
+        return self.re.square() + self.im.square()
+
+    def __abs__(self):
+        return sqrt(self.abs2())
+
+    def sum(self, axis=-1):
+        return DDComplex(self.re.sum(axis), self.im.sum(axis))
+
+
+def _ddc(z):
+    if isinstance(z, DDComplex):
+        return z
+    if isinstance(z, DD):
+        return DDComplex(z)
+    return DDComplex.from_complex(z)
+
+
+def cexp(z):
+    """e^z = e^{Re z} (cos Im z + i sin Im z)"""
+    z = _ddc(z)
+    m = exp(z.re)
+    s, c = sincos(z.im)
+    return DDComplex(m * c, m * s)
+
+
+def clog(z):
+    """Principal logarithm log|z| + i arg z"""
+    z = _ddc(z)
+    return DDComplex(log(z.abs2()).ldexp(-1), atan2(z.im, z.re))
+
+
+def expi(a):
+    """e^{ia} = cos a + i sin a for real DD a"""
+    s, c = sincos(a)
+    return DDComplex(c, s)
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=1000000,
+                        help="array length for the timings")
+    parser.add_argument("--check", type=int, default=200,
+                        help="elements checked against decimal arithmetic")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("VECTORIZED DOUBLE-DOUBLE ARITHMETIC")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    x = DD(rng.uniform(0.5, 2.0, args.check), rng.uniform(-1, 1, args.check) * 1e-17)
+    y = DD(rng.uniform(0.5, 2.0, args.check), rng.uniform(-1, 1, args.check) * 1e-17)
+    big = DD(rng.uniform(1e3, 1e6, args.check), rng.uniform(-1, 1, args.check) * 1e-11)
+    wide = DD(rng.uniform(-50, 50, args.check))
+    xd, yd, bd, wd = (v.to_decimal() for v in (x, y, big, wide))
+
+    def rel_err(got, want):
+        got = got.to_decimal()
+        return max(float(abs((g - w) / w)) for g, w in zip(got, want) if w != 0)
+
+    print("\nMaximum relative error against 60-digit decimal arithmetic:")
+    with localcontext(prec=60):
+        checks = [
+            ("x + y", x + y, xd + yd),
+            ("x - y", x - y, xd - yd),
+            ("x * y", x * y, xd * yd),
+            ("x / y", x / y, xd / yd),
+            ("sqrt(x)", sqrt(x), np.array([v.sqrt() for v in xd])),
+            ("exp(x)", exp(x), np.array([v.exp() for v in xd])),
+            ("exp(±50)", exp(wide), np.array([v.exp() for v in wd])),
+            ("log(x)", log(x), np.array([v.ln() for v in xd])),
+        ]
+        for name, got, want in checks:
+            print(f"  {name:<10} {rel_err(got, want):.2e}")
+        ref = [_decimal_sin_cos(v) for v in bd]
+        s, c = sincos(big)
+        print(f"  {'sin(t)':<10} {rel_err(s, np.array([r[0] for r in ref])):.2e}"
+              "   (t up to 10^6)")
+        print(f"  {'cos(t)':<10} {rel_err(c, np.array([r[1] for r in ref])):.2e}")
+
+    print(f"\nThroughput on {args.size:,} elements in blocks of {BLOCK} "
+          "(ns per element):")
+    a = DD(rng.uniform(0.5, 2.0, args.size), rng.uniform(-1, 1, args.size) * 1e-17)
+    b = DD(rng.uniform(0.5, 2.0, args.size), rng.uniform(-1, 1, args.size) * 1e-17)
+    af, bf = a.hi, b.hi
+    print(f"  {'operation':<10} {'float64':>10} {'double-double':>15} {'ratio':>8}")
+    for name, fast, slow in [
+        ("add", lambda: af + bf, lambda: blockwise(lambda u, v: u + v, a, b)),
+        ("mul", lambda: af * bf, lambda: blockwise(lambda u, v: u * v, a, b)),
+        ("div", lambda: af / bf, lambda: blockwise(lambda u, v: u / v, a, b)),
+        ("exp", lambda: np.exp(af), lambda: blockwise(exp, a)),
+        ("log", lambda: np.log(af), lambda: blockwise(log, a)),
+        ("sincos", lambda: (np.sin(af), np.cos(af)), lambda: blockwise(sincos, a)),
+    ]:
+        times = []
+        for fn in (fast, slow):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) / args.size * 1e9)
+        print(f"  {name:<10} {times[0]:>10.2f} {times[1]:>15.2f} "
+              f"{times[1] / times[0]:>7.1f}x")
+
+    sample = [Decimal(float(v)) for v in af[:2000]]
+    with localcontext(prec=32):
+        start = time.perf_counter()
+        for v in sample:
+            v.exp()
+        per = (time.perf_counter() - start) / len(sample) * 1e9
+    print(f"\nPython Decimal (32 digits) exp: {per:,.0f} ns per element")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+ENERGY LANDSCAPE OF REAL AND PERTURBED ZERO SETS
+================================================
+
+outputs/energy_proof_results.npz and outputs/master_equation_proof.npz
+hold energies of the prime-counting error for the zeros on the line
+and for hypothetical zero sets moved off it.  The code that wrote them
+is not in the repository, and neither are its definitions.  This module
+defines the quantities below and can write files with the same keys,
+but the values are not comparable with the stored ones: E_actual here
+is about 1.9e-1 against 1.2e-4 in the stored file.  Each file it writes
+therefore carries a `definition` entry and its parameters, so the two
+cannot be confused.
+
+A zero set is a list of ρ = β + iγ.  Through the explicit formula it
+predicts
+
+    ψ_Z(x) = x - Σ_ρ 2 Re(x^ρ/ρ) - log 2π - ½ log(1 - x⁻²),
+
+and its normalized error e(x) = (ψ_Z(x) - x)/√x is made of the terms
+x^{β-1/2} cos(γ log x - arg ρ).  A zero on the line gives a bounded
+oscillation; one off it grows like x^{β-1/2}.  Three functionals are
+used:
+
+    E(X) = mean of e(x)² over log x in [log x₀, log X]
+           (tends to Σ_ρ 1/|ρ|² = 0.0462 under RH),
+    d²   = Σ_ρ (β - 1/2)²,
+    rms  = root mean square of ψ_Z(x) - ψ(x) over the same x,
+
+with ψ(x) from prime_sieve.py.  E_actual is E(X) for the true ψ.
+
+Zeros sharing a real part β are summed as one phase table on a
+geometric grid (explicit_formula.zero_sums) and scaled by x^{β-1/2}.
+The sum over the zeros on the line is shared by all scenarios, which
+only add the change for their zeros off the line.  Zero tables are read
+in chunks, so the zero count is limited by time, not memory.
+All of E(X) for a list of X comes from one grid by cumulative sums.
+
+Usage:
+    python energy_landscape.py --count 100000 --points 200000 \\
+        --energy-output energy_landscape.npz \\
+        --master-output master_landscape.npz
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from explicit_formula import LOG_TWO_PI, geometric_grid, zero_sums
+from prime_sieve import prime_counts
+from riemann_siegel import generate_zeros
+from zero_store import open_zeros
+
+X_RANGE = (100, 200, 500, 1000, 2000, 5000)
+DEFINITION = ("energy_landscape.py: E(X) = mean of ((ψ_Z(x) - x)/√x)² over "
+              "log x in [log x₀, log X]; d² = Σ (β - 1/2)²; rms of ψ_Z - ψ "
+              "against the sieve; E_actual is E(X) for the sieve ψ")
+
+# =============================================================================
+# ZERO SETS
+# =============================================================================
+
+def perturb(gamma, shift, which=1):
+    """Real parts β: 1/2 everywhere, 1/2 + shift for the zeros in `which`
+
+    which is a count (the lowest zeros) or an array of indices.
+    """
+    beta = np.full(len(gamma), 0.5)
+    idx = np.arange(which) if np.isscalar(which) else np.asarray(which)
+    beta[idx] += shift
+    return beta
+
+
+def distance2(beta):
+    """d² = Σ (β - 1/2)²"""
+    return float(np.sum((np.asarray(beta) - 0.5) ** 2))
+
+
+def oscillation(gamma, beta, u0, h, n, memory=1 << 28, chunk=1 << 20):
+    """Σ_ρ 2 Re(x^ρ/ρ)/√x at x = exp(u₀ + kh), k = 0 ... n-1
+
+    gamma may be a memory-mapped zero store view; it is read `chunk`
+    zeros at a time.  Each distinct β is one zero_sums pass.
+    """
+    u = u0 + h * np.arange(n)
+    out = np.zeros(n)
+    for lo in range(0, len(gamma), chunk):
+        g = np.asarray(gamma[lo:lo + chunk], dtype=np.float64)
+        b = np.asarray(beta[lo:lo + chunk], dtype=np.float64)
+        for value in np.unique(b):
+            sel = b == value
+            rho = value + 1j * g[sel]
+            s = zero_sums(g[sel], u0, h, n, 1.0 / rho, memory)[0].real
+            out += 2 * s if value == 0.5 else 2 * s * np.exp((value - 0.5) * u)
+    return out
+
+
+def scenario_oscillations(gamma, scenarios, u0, h, n, memory=1 << 28):
+    """oscillation() for each scenario name → β array, sharing the line
+
+    The sum over all zeros on the line is taken once; each scenario then
+    adds, for its zeros off the line only, the change from β = 1/2.
+    """
+    line = oscillation(gamma, np.full(len(gamma), 0.5), u0, h, n, memory)
+    out = {}
+    for name, beta in scenarios.items():
+        off = np.nonzero(np.asarray(beta) != 0.5)[0]
+        if off.size == 0:
+            out[name] = line
+            continue
+        g = np.asarray(gamma[off[0]:off[-1] + 1], dtype=np.float64)[off - off[0]]
+        out[name] = (line + oscillation(g, beta[off], u0, h, n, memory)
+                     - oscillation(g, np.full(g.size, 0.5), u0, h, n, memory))
+    return out
+
+
+def model_psi(x, osc):
+    """ψ_Z(x) from the oscillation Σ_ρ 2 Re(x^ρ/ρ)/√x"""
+    return x - np.sqrt(x) * osc - LOG_TWO_PI - 0.5 * np.log1p(-x ** -2.0)
+
+# =============================================================================
+# ENERGIES
+# =============================================================================
+
+def energy(x, psi, X):
+    """E(X) = mean of ((ψ - x)/√x)² over the geometric grid x up to each X"""
+    e2 = (psi - x) ** 2 / x
+    cum = np.cumsum(e2)
+    k = np.searchsorted(x, np.asarray(X, dtype=np.float64), side="right")
+    if np.any(k == 0):
+        raise ValueError(f"X below the start of the grid ({x[0]:g})")
+    return cum[k - 1] / k
+
+
+def landscape(gamma, scenarios, X, x0=2.0, points=100000, memory=1 << 28):
+    """E(X) for each X and each scenario name → β array, on one grid"""
+    x, u0, h = geometric_grid(x0, max(X), points)
+    osc = scenario_oscillations(gamma, scenarios, u0, h, points, memory)
+    return {name: energy(x, model_psi(x, o), X) for name, o in osc.items()}
+
+
+def master(gamma, scenarios, x0=2.0, x1=1e5, points=100000, memory=1 << 28):
+    """E, d² and rms against the sieve ψ for each scenario, plus E_actual"""
+    x, u0, h = geometric_grid(x0, x1, points)
+    psi = prime_counts(x)[2].astype(np.float64)
+    out = {"E_actual": energy(x, psi, [x1])[0]}
+    osc = scenario_oscillations(gamma, scenarios, u0, h, points, memory)
+    for name, beta in scenarios.items():
+        model = model_psi(x, osc[name])
+        out[f"E_{name}"] = energy(x, model, [x1])[0]
+        out[f"d2_{name}"] = distance2(beta)
+        out[f"rms_{name}"] = float(np.sqrt(np.mean((model - psi) ** 2)))
+    return out
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="zero store or text table of zeros 1, 2, 3, ... "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=10000,
+                        help="number of zeros to use")
+    parser.add_argument("--x-range", type=_floats, default=list(X_RANGE),
+                        help="comma-separated X for E(X)")
+    parser.add_argument("--xmin", type=float, default=2.0)
+    parser.add_argument("--points", type=int, default=100000,
+                        help="x values on the geometric grid")
+    parser.add_argument("--move", type=int, default=1,
+                        help="number of lowest zeros moved off the line")
+    parser.add_argument("--offline", type=float, default=0.1,
+                        help="β - 1/2 of the 'offline' energy scenario")
+    parser.add_argument("--extreme", type=float, default=0.3,
+                        help="β - 1/2 of the 'extreme' energy scenario")
+    parser.add_argument("--shifts", type=_floats, default=[0.1, 0.2, 0.3],
+                        help="β - 1/2 of the off1, off2, ... master scenarios")
+    parser.add_argument("--master-xmax", type=float, default=1e5)
+    parser.add_argument("--memory", type=float, default=256,
+                        help="MiB for the phase tables")
+    parser.add_argument("--energy-output", help="write energy_proof_results here")
+    parser.add_argument("--master-output", help="write master_equation_proof here")
+    args = parser.parse_args(argv)
+    memory = int(args.memory * (1 << 20))
+
+    print("=" * 70)
+    print("ENERGY LANDSCAPE OF REAL AND PERTURBED ZERO SETS")
+    print("=" * 70)
+
+    if args.zeros:
+        gamma = open_zeros(args.zeros)[:args.count]
+        print(f"\nZeros: {len(gamma):,} from {args.zeros}, γ ≤ {gamma[-1]:.3f}")
+    else:
+        start = time.perf_counter()
+        gamma = np.concatenate(list(generate_zeros(args.count)))
+        print(f"\nZeros: {gamma.size:,} computed in "
+              f"{time.perf_counter() - start:.1f} s, γ ≤ {gamma[-1]:.3f}")
+
+    X = np.asarray(args.x_range)
+    scenarios = {"online": perturb(gamma, 0.0),
+                 "offline": perturb(gamma, args.offline, args.move),
+                 "extreme": perturb(gamma, args.extreme, args.move)}
+    start = time.perf_counter()
+    land = landscape(gamma, scenarios, X, args.xmin, args.points, memory)
+    print(f"\nE(X) on {args.points:,} points of [{args.xmin:g}, {X.max():g}], "
+          f"{len(scenarios)} zero sets: {time.perf_counter() - start:.2f} s")
+    print(f"(lowest {args.move} zero(s) moved to β = 1/2 + {args.offline:g} "
+          f"and 1/2 + {args.extreme:g}; Σ 1/|ρ|² over these zeros = "
+          f"{np.sum(2 / (0.25 + np.asarray(gamma) ** 2)):.6f})")
+    print(f"\n{'X':>10} {'online':>12} {'offline':>12} {'extreme':>12}")
+    for i, x in enumerate(X):
+        print(f"{x:>10g} {land['online'][i]:>12.6f} {land['offline'][i]:>12.6f} "
+              f"{land['extreme'][i]:>12.6f}")
+
+    scenarios = {"online": perturb(gamma, 0.0)}
+    for i, d in enumerate(args.shifts, 1):
+        scenarios[f"off{i}"] = perturb(gamma, d, args.move)
+    start = time.perf_counter()
+    res = master(gamma, scenarios, args.xmin, args.master_xmax, args.points, memory)
+    print(f"\nAgainst the sieve up to {args.master_xmax:g}: "
+          f"{time.perf_counter() - start:.2f} s")
+    print(f"  E_actual = {res['E_actual']:.6e}")
+    print(f"\n{'zero set':>10} {'E':>14} {'d²':>8} {'rms ψ_Z - ψ':>14}")
+    for name in scenarios:
+        print(f"{name:>10} {res['E_' + name]:>14.6e} {res['d2_' + name]:>8.4f} "
+              f"{res['rms_' + name]:>14.4f}")
+
+    provenance = {"definition": np.str_(DEFINITION),
+                  "zeros": np.str_(args.zeros or "computed"),
+                  "count": np.int64(len(gamma)), "xmin": np.float64(args.xmin),
+                  "points": np.int64(args.points), "move": np.int64(args.move)}
+    if args.energy_output:
+        np.savez(args.energy_output, X_range=X.astype(np.int64)
+                 if np.all(X == np.rint(X)) else X,
+                 energy_online=land["online"], energy_offline=land["offline"],
+                 energy_extreme=land["extreme"], **provenance,
+                 shifts=np.array([0.0, args.offline, args.extreme]))
+        print(f"\nWritten to {args.energy_output}")
+    if args.master_output:
+        np.savez(args.master_output, **{k: np.float64(v) for k, v in res.items()},
+                 **provenance, xmax=np.float64(args.master_xmax),
+                 shifts=np.array([0.0] + args.shifts))
+        print(f"Written to {args.master_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+EXPLICIT-FORMULA ψ(x) AND π(x) FROM THE ZERO TABLE
+==================================================
+
+Von Mangoldt's explicit formula recovers the prime counting functions
+from the zeros ρ = 1/2 + iγ:
+
+    ψ₀(x) = x - Σ_ρ x^ρ/ρ - log 2π - ½ log(1 - x⁻²)
+    J(x)  = li(x) - Σ_ρ li(x^ρ) - log 2 + ∫_x^∞ dt / (t (t²-1) log t)
+    π(x)  = Σ_n μ(n)/n J(x^{1/n})
+
+with each conjugate pair contributing 2 Re.  Written as x^ρ = √x e^{iγu},
+u = log x, every term is a phase e^{iγu}; li(x^ρ) = Ei(ρu) is taken from
+its asymptotic series e^{ρu}/(ρu) Σ_k k!/(ρu)^k, which needs only the
+extra weights 1/ρ^{k+1}.
+
+On a geometric grid u_k = u₀ + kh the phases factor: with k = tK + r,
+
+    e^{iγ u_k} = e^{iγ(u₀ + tKh)} · e^{iγ rh},
+
+so Σ_γ c_γ e^{iγ u_k} for all k is one complex matrix product of a K × Z
+and a Z × T table of phases (K·T ≥ number of x).  Building the tables
+costs O(Z √n) exponentials (each table is itself split the same way)
+instead of Z·n, and the sum runs in BLAS.  Zeros are processed in blocks
+sized to a fixed memory budget, so 10^6 zeros × 10^5 points never needs
+more than that budget.
+
+The reconstruction is compared with ψ(x) and π(x) from prime_sieve.py.
+
+Usage:
+    python explicit_formula.py --zeros zeros.rzs --points 100000
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from prime_sieve import prime_counts
+from riemann_siegel import generate_zeros
+from zero_store import open_zeros
+
+EULER_GAMMA = 0.5772156649015329
+LOG_TWO_PI = math.log(2 * math.pi)
+
+# =============================================================================
+# SMOOTH TERMS
+# =============================================================================
+
+def li(x, tol=1e-17, max_terms=400):
+    """Logarithmic integral li(x) for x > 1 (Ramanujan's series)"""
+    x = np.asarray(x, dtype=np.float64)
+    log_x = np.log(x)
+    total = np.zeros_like(x)
+    term = np.full_like(x, 2.0)       # (log x)^n / (n! 2^{n-1})
+    inner = 0.0                       # Σ_{k ≤ (n-1)/2} 1/(2k+1)
+    for n in range(1, max_terms):
+        term = term * log_x / (2 * n)
+        if n % 2:
+            inner += 1.0 / n
+        step = term * inner
+        total += step if n % 2 else -step
+        if np.all(step < tol * np.abs(total)):
+            break
+    return EULER_GAMMA + np.log(log_x) + np.sqrt(x) * total
+
+
+def j_tail(x, nodes=32):
+    """∫_x^∞ dt / (t (t²-1) log t) for x > 1 by Gauss-Laguerre in log t"""
+    u = np.log(np.asarray(x, dtype=np.float64))[..., None]
+    w, weight = np.polynomial.laguerre.laggauss(nodes)
+    # t = e^{u + w/2}:  e^{-2u-w} / ((1 - e^{-2u-w}) (u + w/2)) dw/2
+    f = np.exp(-2 * u) / (-np.expm1(-2 * u - w) * (u + 0.5 * w))
+    return 0.5 * (f * weight).sum(axis=-1)
+
+
+def mobius(n):
+    """μ(1) ... μ(n) as an array indexed from 0 (μ(0) = 0)"""
+    mu = np.ones(n + 1, dtype=np.int64)
+    mu[0] = 0
+    composite = np.zeros(n + 1, dtype=bool)
+    for p in range(2, n + 1):
+        if not composite[p]:
+            composite[2 * p::p] = True
+            mu[p::p] *= -1
+            mu[p * p::p * p] = 0
+    return mu
+
+# =============================================================================
+# ZERO SUMS ON GEOMETRIC GRIDS
+# =============================================================================
+
+def phase_table(gamma, start, step, count):
+    """count × Z matrix e^{iγ(start + k·step)}, k = 0 ... count-1
+
+    Split k = a·s + b with s ≈ √count so that only (count/s + s)·Z
+    exponentials are taken; the rest are products of unit phasors.
+    """
+    s = max(1, math.isqrt(count - 1) + 1) if count > 1 else 1
+    rows = -(-count // s)
+    coarse = np.exp(1j * np.outer(start + s * step * np.arange(rows), gamma))
+    fine = np.exp(1j * np.outer(step * np.arange(s), gamma))
+    return (coarse[:, None, :] * fine[None, :, :]).reshape(rows * s, -1)[:count]
+
+
+def zero_sums(gamma, u0, h, n, weights, memory=1 << 28):
+    """Σ_γ w_γ e^{iγ(u₀ + kh)} for k = 0 ... n-1 and each weight column
+
+    gamma has shape (Z,), weights (Z, m); the result has shape (m, n).
+    Zeros are taken in blocks whose phase tables fit in `memory` bytes.
+    """
+    gamma = np.asarray(gamma, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.complex128).reshape(gamma.size, -1)
+    m = weights.shape[1]
+    k = max(1, math.isqrt(n))
+    t = -(-n // k)
+    block = max(1, int(memory // (16 * (k + 2 * m * t))))
+    out = np.zeros((m, k, t), dtype=np.complex128)
+    for lo in range(0, gamma.size, block):
+        g = gamma[lo:lo + block]
+        fine = phase_table(g, 0.0, h, k)                 # K × B
+        coarse = phase_table(g, u0, k * h, t).T          # B × T
+        for i in range(m):
+            out[i] += fine @ (weights[lo:lo + block, i, None] * coarse)
+    # out[i, r, t] is the value at k = tK + r
+    return out.transpose(0, 2, 1).reshape(m, -1)[:, :n]
+
+
+def geometric_grid(x0, x1, n):
+    """(x, u₀, h) with x_k = exp(u₀ + kh) running from x0 to x1"""
+    u0 = math.log(x0)
+    h = (math.log(x1) - u0) / max(n - 1, 1)
+    return np.exp(u0 + h * np.arange(n)), u0, h
+
+# =============================================================================
+# THE EXPLICIT FORMULAS
+# =============================================================================
+
+def explicit_psi(gamma, x0, x1, n, memory=1 << 28):
+    """(x, ψ₀(x)) on n geometric points from x0 to x1 using the zeros gamma"""
+    gamma = np.asarray(gamma, dtype=np.float64)
+    x, u0, h = geometric_grid(x0, x1, n)
+    rho = 0.5 + 1j * gamma
+    s = zero_sums(gamma, u0, h, n, 1.0 / rho, memory)[0]
+    psi = x - 2 * np.sqrt(x) * s.real - LOG_TWO_PI - 0.5 * np.log1p(-x ** -2.0)
+    return x, psi
+
+
+def riemann_j(gamma, u0, h, n, terms=3, memory=1 << 28):
+    """J(x) at x = exp(u₀ + kh); li(x^ρ) from `terms` asymptotic terms"""
+    gamma = np.asarray(gamma, dtype=np.float64)
+    u = u0 + h * np.arange(n)
+    x = np.exp(u)
+    smooth = li(x) - math.log(2) + j_tail(x)
+    if gamma.size == 0:
+        return smooth
+    rho = 0.5 + 1j * gamma
+    weights = np.stack([rho ** -(k + 1) for k in range(terms)], axis=1)
+    sums = zero_sums(gamma, u0, h, n, weights, memory)
+    # Ei(ρu) ≈ e^{ρu} Σ_k k! / (ρu)^{k+1}
+    factorial = np.cumprod([1.0] + list(range(1, terms)))
+    series = sum(factorial[k] * sums[k] / u ** (k + 1) for k in range(terms))
+    return smooth - 2 * np.sqrt(x) * series.real
+
+
+def explicit_pi(gamma, x0, x1, n, zero_terms=2, terms=3, memory=1 << 28):
+    """(x, π(x)) on n geometric points from Σ_n μ(n)/n J(x^{1/n})
+
+    Only the first `zero_terms` values of n carry the zero sum; beyond
+    that the oscillating part of J(x^{1/n}) is below x^{1/(2n)}/n and
+    the smooth part alone is used.
+    """
+    x, u0, h = geometric_grid(x0, x1, n)
+    top = max(1, int(math.log2(x1)))
+    mu = mobius(top)
+    pi = np.zeros(n)
+    for k in range(1, top + 1):
+        if mu[k] == 0:
+            continue
+        # J(y) vanishes for y < 2
+        live = u0 / k + h / k * np.arange(n) >= math.log(2)
+        if not live.any():
+            continue
+        first = int(np.argmax(live))
+        g = gamma if k <= zero_terms else np.empty(0)
+        j = riemann_j(g, u0 / k + first * h / k, h / k, n - first, terms, memory)
+        pi[first:] += mu[k] / k * j
+    return x, pi
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="zero store or text table of zeros 1, 2, 3, ... "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=100000,
+                        help="number of zeros to use")
+    parser.add_argument("--points", type=int, default=100000,
+                        help="x values on the geometric grid")
+    parser.add_argument("--xmin", type=float, default=100.0)
+    parser.add_argument("--xmax", type=float, default=1e6)
+    parser.add_argument("--memory", type=float, default=256,
+                        help="MiB for the phase tables")
+    args = parser.parse_args(argv)
+    memory = int(args.memory * (1 << 20))
+
+    print("=" * 70)
+    print("EXPLICIT FORMULA ψ(x), π(x) FROM THE ZEROS")
+    print("=" * 70)
+
+    if args.zeros:
+        gamma = np.array(open_zeros(args.zeros)[:args.count])
+        print(f"\nZeros: {gamma.size:,} from {args.zeros}, γ ≤ {gamma[-1]:.3f}")
+    else:
+        start = time.perf_counter()
+        gamma = np.concatenate(list(generate_zeros(args.count)))
+        print(f"\nZeros: {gamma.size:,} computed in "
+              f"{time.perf_counter() - start:.1f} s, γ ≤ {gamma[-1]:.3f}")
+
+    start = time.perf_counter()
+    x, psi = explicit_psi(gamma, args.xmin, args.xmax, args.points, memory)
+    elapsed = time.perf_counter() - start
+    print(f"\nψ₀(x) at {x.size:,} points in [{args.xmin:g}, {args.xmax:g}]: "
+          f"{elapsed:.2f} s ({gamma.size * x.size / elapsed:,.0f} "
+          f"zero·points/s, {args.memory:g} MiB tables)")
+
+    start = time.perf_counter()
+    pi_ref, _, psi_ref = prime_counts(x)
+    print(f"Segmented sieve to {x[-1]:,.0f}: {time.perf_counter() - start:.2f} s")
+
+    err = psi - psi_ref
+    print(f"\n|ψ₀ - ψ|: max {np.abs(err).max():.3f}, "
+          f"rms {np.sqrt(np.mean(err ** 2)):.3f}, "
+          f"median {np.median(np.abs(err)):.3f}")
+
+    start = time.perf_counter()
+    _, pi = explicit_pi(gamma, args.xmin, args.xmax, args.points, memory=memory)
+    elapsed = time.perf_counter() - start
+    exact = np.mean(np.rint(pi) == pi_ref)
+    print(f"π(x) from Σ μ(n)/n J(x^(1/n)): {elapsed:.2f} s, "
+          f"|π - π_sieve| max {np.abs(pi - pi_ref).max():.3f}, "
+          f"rounds to the sieve value at {100 * exact:.1f} % of points")
+
+    print(f"\n{'x':>14} {'ψ sieve':>14} {'ψ₀ explicit':>14} "
+          f"{'π sieve':>9} {'π explicit':>12}")
+    for i in np.linspace(0, x.size - 1, 10).astype(int):
+        print(f"{x[i]:>14.3f} {psi_ref[i]:>14.3f} {psi[i]:>14.3f} "
+              f"{pi_ref[i]:>9,} {pi[i]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
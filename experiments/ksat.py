@@ -0,0 +1,224 @@
+"""
+RANDOM k-SAT INSTANCES AND CLAUSE STORE
+=======================================
+
+p_vs_np.py asserts the cluster count and barrier height of random 3-SAT
+near α_c ≈ 4.267 without ever building an instance.  This module builds
+them: m = round(α n) clauses, each on k distinct variables drawn
+uniformly, each literal negated with probability 1/2, deterministic
+from a seed.
+
+Literals are packed into int32 as 2v + s for variable v and sign bit s
+(1 = negated), so v = lit >> 1 and the negation of lit is lit ^ 1.  The
+store keeps two CSR indices:
+
+    lits[clause_start[c] : clause_start[c+1]]    literals of clause c
+    occ[occ_start[l] : occ_start[l+1]]           clauses containing literal l
+
+Literals 2v and 2v+1 are adjacent, so occ[occ_start[2v] : occ_start[2v+2]]
+lists every clause of variable v.  Random clauses all have k literals,
+but the store takes any lengths (DIMACS input, learned clauses).
+
+Generation is vectorized: the k variables of every clause are drawn at
+once and only the rows with a repeated variable are redrawn; the
+occurrence index is a radix sort of the literals.  n = 10^6 at
+α = 4.267 takes about 2.5 s and 150 MB.
+
+Usage:
+    python ksat.py --n 1000000 --alpha 4.267 --seed 1 --output sat.npz
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+
+ALPHA_C = {3: 4.267, 4: 9.931, 5: 21.117}     # satisfiability thresholds
+
+# =============================================================================
+# THE CLAUSE STORE
+# =============================================================================
+
+def _stable_order(keys):
+    """np.argsort(keys, kind="stable") for non-negative int32 keys
+
+    Two passes over the 16-bit halves, each a NumPy radix sort; about
+    2.5 times faster than the merge sort used for 32-bit keys.
+    """
+    order = np.argsort((keys & 0xFFFF).astype(np.uint16), kind="stable")
+    return order[np.argsort((keys[order] >> 16).astype(np.uint16), kind="stable")]
+
+
+class Formula:
+    """CNF formula over variables 0 ... n-1 with packed literals 2v + s"""
+
+    def __init__(self, n, lits, clause_start):
+        self.n = int(n)
+        self.lits = np.ascontiguousarray(lits, dtype=np.int32)
+        self.clause_start = np.ascontiguousarray(clause_start, dtype=np.int64)
+        self.m = self.clause_start.size - 1
+        # Clause indices ordered by literal, stable within each literal
+        clause = np.repeat(np.arange(self.m, dtype=np.int32), np.diff(self.clause_start))
+        counts = np.bincount(self.lits, minlength=2 * self.n)
+        self.occ_start = np.concatenate(([0], np.cumsum(counts)))
+        self.occ = clause[_stable_order(self.lits)]
+
+    @property
+    def width(self):
+        """Clause length if all clauses have the same length, else None"""
+        lengths = np.diff(self.clause_start)
+        return int(lengths[0]) if self.m and np.all(lengths == lengths[0]) else None
+
+    def clause(self, c):
+        return self.lits[self.clause_start[c]:self.clause_start[c + 1]]
+
+    def occurrences(self, lit):
+        """Clauses containing the literal lit"""
+        return self.occ[self.occ_start[lit]:self.occ_start[lit + 1]]
+
+    def variable_occurrences(self, v):
+        """Clauses containing variable v in either sign"""
+        return self.occ[self.occ_start[2 * v]:self.occ_start[2 * v + 2]]
+
+    def true_literals(self, assignment):
+        """Per clause, the number of literals made true by the bool array"""
+        a = np.asarray(assignment, dtype=bool)
+        true = a[self.lits >> 1] != (self.lits & 1).astype(bool)
+        k = self.width
+        if k is not None:
+            return true.reshape(self.m, k).sum(axis=1)
+        return np.add.reduceat(true.astype(np.int32), self.clause_start[:-1])
+
+    def unsatisfied(self, assignment):
+        """Number of clauses violated by the assignment"""
+        return int(np.count_nonzero(self.true_literals(assignment) == 0))
+
+    def digest(self):
+        """SHA-256 of the clause arrays, for checking reproducibility"""
+        h = hashlib.sha256(self.lits.tobytes())
+        h.update(self.clause_start.tobytes())
+        return h.hexdigest()
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.lits, self.clause_start, self.occ, self.occ_start))
+
+    # -------------------------------------------------------------------------
+    # Files
+    # -------------------------------------------------------------------------
+
+    def save(self, path):
+        np.savez(path, n=self.n, lits=self.lits, clause_start=self.clause_start)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(int(data["n"]), data["lits"], data["clause_start"])
+
+    def write_dimacs(self, path):
+        signed = np.where(self.lits & 1, -((self.lits >> 1) + 1), (self.lits >> 1) + 1)
+        with open(path, "w") as fh:
+            fh.write(f"p cnf {self.n} {self.m}\n")
+            for c in range(self.m):
+                row = signed[self.clause_start[c]:self.clause_start[c + 1]]
+                fh.write(" ".join(map(str, row.tolist())) + " 0\n")
+
+    @classmethod
+    def read_dimacs(cls, path):
+        """Formula from a DIMACS CNF file (a SATLIB '%' line ends it)"""
+        n, body = 0, []
+        with open(path) as fh:
+            for ln in fh:
+                if ln.startswith("%"):
+                    break
+                if ln.startswith("p"):
+                    n = int(ln.split()[2])
+                elif ln.strip() and not ln.startswith("c"):
+                    body.append(ln)
+        values = np.array(" ".join(body).split(), dtype=np.int64)
+        ends = np.nonzero(values == 0)[0]
+        lits = values[values != 0]
+        lits = np.where(lits > 0, 2 * (lits - 1), 2 * (-lits - 1) + 1)
+        # Clause c ends just before the c-th terminating zero
+        clause_start = np.concatenate(([0], ends - np.arange(ends.size)))
+        return cls(max(n, (int(lits.max()) >> 1) + 1 if lits.size else 0),
+                   lits, clause_start)
+
+# =============================================================================
+# RANDOM INSTANCES
+# =============================================================================
+
+def random_ksat(n, alpha=None, k=3, seed=0, m=None):
+    """Uniform random k-SAT formula with m = round(α n) clauses"""
+    if k > n:
+        raise ValueError(f"k = {k} needs at least k variables, got n = {n}")
+    if m is None:
+        m = int(round((ALPHA_C[k] if alpha is None else alpha) * n))
+    rng = np.random.default_rng(seed)
+    var = rng.integers(0, n, size=(m, k), dtype=np.int32)
+    # Redraw clauses with a repeated variable until none are left
+    while True:
+        s = np.sort(var, axis=1)
+        bad = np.nonzero((s[:, 1:] == s[:, :-1]).any(axis=1))[0]
+        if bad.size == 0:
+            break
+        var[bad] = rng.integers(0, n, size=(bad.size, k), dtype=np.int32)
+    sign = rng.integers(0, 2, size=(m, k), dtype=np.int32)
+    lits = (var << 1) | sign
+    return Formula(n, lits.ravel(), np.arange(0, m * k + 1, k, dtype=np.int64))
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=1000000, help="variables")
+    parser.add_argument("--k", type=int, default=3, help="literals per clause")
+    parser.add_argument("--alpha", type=float, default=None,
+                        help="clause density m/n (default: the threshold α_c)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the clause store (npz) here")
+    parser.add_argument("--dimacs", help="write the formula in DIMACS CNF here")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("RANDOM k-SAT INSTANCES")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    f = random_ksat(args.n, args.alpha, args.k, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"\n{args.k}-SAT, n = {f.n:,}, m = {f.m:,} (α = {f.m / f.n:.4f}), "
+          f"seed {args.seed}: {elapsed:.2f} s, {f.nbytes / 2 ** 20:.1f} MiB")
+
+    again = random_ksat(args.n, args.alpha, args.k, args.seed)
+    print(f"Same seed reproduces the formula: {again.digest() == f.digest()}")
+
+    degree = np.diff(f.occ_start[::2])
+    lam = args.k * f.m / f.n
+    print(f"\nOccurrences per variable: mean {degree.mean():.4f} (kα = {lam:.4f}), "
+          f"variance {degree.var():.4f}, max {degree.max()}, "
+          f"unused variables {np.count_nonzero(degree == 0):,} "
+          f"(Poisson: {f.n * np.exp(-lam):,.0f})")
+    v = int(np.argmax(degree))
+    occ = f.variable_occurrences(v)
+    assert all(v in (f.clause(c) >> 1) for c in occ)
+    print(f"Variable {v} occurs in clauses {occ[:6].tolist()} …")
+
+    rng = np.random.default_rng(args.seed)
+    unsat = f.unsatisfied(rng.integers(0, 2, f.n).astype(bool))
+    print(f"Random assignment violates {unsat:,} clauses "
+          f"(expected m/2^k = {f.m / 2 ** args.k:,.0f})")
+
+    if args.output:
+        f.save(args.output)
+        print(f"\nWritten to {args.output}")
+    if args.dimacs:
+        f.write_dimacs(args.dimacs)
+        print(f"Written to {args.dimacs}")
+
+
+if __name__ == "__main__":
+    main()
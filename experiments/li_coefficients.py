@@ -0,0 +1,254 @@
+"""
+LI COEFFICIENTS FROM THE ZERO TABLE
+===================================
+
+Li's criterion: RH holds iff every
+
+    λ_n = Σ_ρ [1 - (1 - 1/ρ)^n]
+
+is positive.  For a zero ρ = 1/2 + iγ on the line, w = 1 - 1/ρ = -ρ̄/ρ
+lies on the unit circle, w = e^{iφ} with φ = 2 arctan(1/2γ), and the
+conjugate pair ρ, ρ̄ contributes
+
+    2 Re(1 - w^n) = 2 (1 - cos nφ).
+
+All n are computed at once.  The powers w^n for n = n₀ ... n₁ form the
+same kind of geometric phase table as x^ρ in explicit_formula.py: with
+n = tK + r, w^n = (w^K)^t · w^r, so Σ_γ w^n is one matrix product of a
+K × Z and a Z × T table (explicit_formula.zero_sums), not a loop over n.
+
+For the zeros above the table the density dN(γ) = (1/2π) log(γ/2π) dγ
+gives the tail
+
+    ∫_{T*}^∞ 2 (1 - cos nφ(γ)) dN(γ),
+
+with T* the height where the smooth count reaches N + 1/2.  The
+integral is taken in log γ, with panels of equal phase while nφ is
+large.  Since φ ≈ 1/γ, the tail is negligible only for n ≪ T*.  Beyond
+√T* or so it dominates, and λ_n then follows the smooth density rather
+than the zeros.
+
+The sums are cached next to a zero store, one file per n-range,
+<store>.li<n₀>-<n₁>.npz.  Each file records how many zeros went into it
+and a SHA-256 digest of their ordinates.  When the store has grown, only
+the new zeros are summed and added; a store whose prefix no longer
+matches the digest is recomputed.
+
+Without --zeros the first --count zeros are computed into a scratch
+store.  Either way the count is checked against the heights before T*
+is taken from it: n - 1/2 - N(γ_n) is S(γ_n), whose mean over the last
+100 zeros is close to 0, and a table that lost or gained k zeros moves
+that mean by k.
+
+Usage:
+    python li_coefficients.py --zeros zeros.rzs --n 100000
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from explicit_formula import zero_sums
+from riemann_siegel import TWO_PI, compute_store, gram_points
+from zero_store import MAGIC, ZeroStore, count_residuals, open_zeros
+
+EULER_GAMMA = 0.57721566490153286061
+# λ_n ≈ (n/2) log n + LI_SLOPE · n under RH
+LI_SLOPE = 0.5 * (EULER_GAMMA - 1 - math.log(TWO_PI))
+
+# =============================================================================
+# THE ZERO SUM AND ITS TAIL
+# =============================================================================
+
+def li_angles(gamma):
+    """φ = arg(1 - 1/ρ) = 2 arctan(1/2γ) for ρ = 1/2 + iγ"""
+    return 2 * np.arctan(0.5 / np.asarray(gamma, dtype=np.float64))
+
+
+def zero_part(gamma, n0, n1, memory=1 << 28, block=8192):
+    """Σ_γ 2 (1 - cos nφ_γ) for n = n₀ ... n₁ - 1
+
+    Re Σ w^n is close to the number of zeros, so the difference is taken
+    per block of zeros before it is accumulated; summing all of them in
+    one matrix product would lose ~1e-7 to cancellation.
+    """
+    phi = li_angles(gamma)
+    out = np.zeros(n1 - n0)
+    for lo in range(0, phi.size, block):
+        p = phi[lo:lo + block]
+        s = zero_sums(p, n0, 1.0, n1 - n0, np.ones(p.size), memory)[0]
+        out += 2 * (p.size - s.real)
+    return out
+
+
+def li_tail(n, t_star, nodes=16, chunk=4096):
+    """∫_{T*}^∞ 2 (1 - cos nφ(γ)) (1/2π) log(γ/2π) dγ for each n"""
+    n = np.asarray(n, dtype=np.float64)
+    x, w = np.polynomial.legendre.leggauss(nodes)
+    out = np.empty(n.shape)
+    u0 = math.log(t_star)
+    for lo in range(0, n.size, chunk):
+        nn = n[lo:lo + chunk]
+        # Panels in u = log γ: quarter turns of the phase nφ ≈ n e^{-u}
+        # while it exceeds 1, then steps of 1/2 over 40 e-folds
+        phase = nn.max() / t_star
+        quarter = np.arange(phase, 1.0, -0.5 * np.pi) if phase > 1 else np.empty(0)
+        edges = u0 + np.log(phase / quarter) if quarter.size else np.array([u0])
+        edges = np.concatenate((edges, edges[-1] + 0.5 * np.arange(1, 81)))
+        mid, half = 0.5 * (edges[1:] + edges[:-1]), 0.5 * np.diff(edges)
+        u = (mid[:, None] + half[:, None] * x).ravel()
+        weight = (half[:, None] * w).ravel()
+        gamma = np.exp(u)
+        density = np.log(gamma / TWO_PI) / TWO_PI * gamma * weight
+        # 2 (1 - cos x) = 4 sin²(x/2)
+        f = 4 * np.sin(0.5 * np.outer(nn, li_angles(gamma))) ** 2
+        out[lo:lo + chunk] = f @ density
+    return out
+
+# =============================================================================
+# CACHED COEFFICIENTS FOR A ZERO STORE
+# =============================================================================
+
+def check_count(path, gamma, last=100):
+    """Raise if the zeros gamma (1, 2, 3, ...) miss or repeat zeros"""
+    tail = np.asarray(gamma[-last:], dtype=np.float64)
+    shift = count_residuals(len(gamma) - tail.size + 1, tail).mean()
+    if abs(shift) > 0.5:
+        raise ValueError(f"{path}: {len(gamma):,} zeros up to t = {tail[-1]:.3f} "
+                         f"are {shift:+.0f} off the zero count N(t); "
+                         "T* would be wrong")
+
+
+def cache_path(store_path, n0, n1):
+    return f"{store_path}.li{n0}-{n1}.npz"
+
+
+def _digest(gamma):
+    return hashlib.sha256(np.ascontiguousarray(gamma, dtype="<f8").tobytes()).hexdigest()
+
+
+def _write_cache(path, **arrays):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def li_coefficients(path, n1, n0=1, count=None, memory=1 << 28, log=None):
+    """λ_n for n = n₀ ... n₁ - 1 from the zeros in path
+
+    path is a zero store starting at zero 1 (cached and extended as
+    described above) or a text table of zeros 1, 2, 3, ... (not cached).
+    Returns a dict with n, the zero sum over `count` zeros, the tail, T*
+    and the number of zeros used.
+    """
+    n = np.arange(n0, n1)
+    with open(path, "rb") as fh:
+        is_store = fh.read(len(MAGIC)) == MAGIC
+    if not is_store:
+        gamma = open_zeros(path)[:count]
+        sums, used = zero_part(gamma, n0, n1, memory), gamma.size
+    else:
+        with ZeroStore(path) as store:
+            if store.first_index != 1:
+                raise ValueError(f"{path} starts at zero {store.first_index}; "
+                                 "λ_n needs the zeros from the first one on")
+            used = store.count if count is None else min(count, store.count)
+            gamma = store.ordinates(1, used + 1)
+            cpath = cache_path(path, n0, n1)
+            sums, have, keep = None, 0, False
+            if os.path.exists(cpath):
+                with np.load(cpath) as cached:
+                    have = int(cached["count"])
+                    if have > used:
+                        # A prefix of the cached sum cannot be recovered;
+                        # sum these zeros afresh and leave the cache alone
+                        keep = True
+                    elif str(cached["digest"]) == _digest(gamma[:have]):
+                        sums = cached["sums"]
+                    elif log:
+                        log(f"  {cpath} does not match the store, recomputing")
+            if sums is None:
+                sums, have = np.zeros(n.size), 0
+            if have < used:
+                if log:
+                    log(f"  summing zeros {have + 1:,} … {used:,}"
+                        + (f" onto the cached {have:,}" if have else "")
+                        + (" (the cache holds more, kept)" if keep else ""))
+                sums = sums + zero_part(gamma[have:], n0, n1, memory)
+                if not keep:
+                    _write_cache(cpath, sums=sums, count=used,
+                                 digest=_digest(gamma))
+            elif log:
+                log(f"  all {used:,} zeros cached in {cpath}")
+    check_count(path, gamma)
+    t_star = float(gram_points(used - 0.5))
+    return {"n": n, "zero_sum": sums, "tail": li_tail(n, t_star),
+            "t_star": t_star, "count": used}
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="zero store or text table of zeros 1, 2, 3, ... "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=None,
+                        help="use only the first COUNT zeros "
+                             "(default: all of --zeros, or 10000 computed)")
+    parser.add_argument("--n", type=int, default=100000,
+                        help="compute λ_1 … λ_n")
+    parser.add_argument("--memory", type=float, default=256,
+                        help="MiB for the phase tables")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("LI COEFFICIENTS FROM THE ZERO TABLE")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.zeros is None:
+            # The sums are cached next to a store: go through a scratch one
+            start = time.perf_counter()
+            args.count = args.count or 10000
+            args.zeros = os.path.join(scratch, "zeros.rzs")
+            compute_store(args.zeros, args.count)
+            print(f"\nComputed {args.count:,} zeros in "
+                  f"{time.perf_counter() - start:.1f} s")
+        start = time.perf_counter()
+        res = li_coefficients(args.zeros, args.n + 1, 1, args.count,
+                              int(args.memory * (1 << 20)), log=print)
+        elapsed = time.perf_counter() - start
+    n, lam = res["n"], res["zero_sum"] + res["tail"]
+    print(f"\nλ_1 … λ_{args.n:,} from {res['count']:,} zeros "
+          f"(tail from T* = {res['t_star']:.3f}): {elapsed:.2f} s")
+
+    smooth = 0.5 * n * np.log(n) + LI_SLOPE * n
+    share = res["tail"] / lam
+    print(f"Smallest λ_n: {lam.min():.6e} at n = {n[np.argmin(lam)]:,} "
+          f"({'all positive' if lam.min() > 0 else 'NOT all positive'})")
+    print(f"Tail share of λ_n passes 1 % at n = "
+          f"{n[np.argmax(share > 0.01)] if np.any(share > 0.01) else '—'}")
+
+    print(f"\n{'n':>8} {'zero sum':>20} {'tail':>14} {'λ_n':>20} "
+          f"{'(n/2)log n + cn':>16}")
+    shown = sorted(set([1, 2, 3, 10, 100] + list(np.geomspace(1000, args.n, 4).astype(int))))
+    for k in shown:
+        if k > args.n:
+            continue
+        i = k - 1
+        print(f"{k:>8,} {res['zero_sum'][i]:>20.12f} {res['tail'][i]:>14.6e} "
+              f"{lam[i]:>20.12f} {smooth[i]:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
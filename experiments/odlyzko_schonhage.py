@@ -0,0 +1,459 @@
+"""
+ODLYZKO-SCHÖNHAGE MULTI-EVALUATION OF Z(t)
+==========================================
+
+High on the critical line the Riemann-Siegel main sum
+
+    F(t) = Σ_{k ≤ k1} k^{-1/2} exp(-it log k),    k1 = ⌊√(t/2π)⌋
+
+costs O(√t) per point.  Odlyzko and Schönhage amortize it over a whole
+window of M equally spaced points t_j = t_0 + jδ:
+
+1. The generating polynomial G(w) = Σ_j F(t_j) w^j is the rational function
+
+       G(w) = Σ_k a_k (1 - z_k^M) / (1 - z_k w),   z_k = exp(-iδ log k)
+
+   evaluated at the M-th roots of unity.  Its poles are binned on the unit
+   circle; far bins enter through Taylor moments of cot(·/2) and one FFT
+   convolution per moment, near bins are summed directly.
+
+2. One inverse FFT of G(ω^h) returns F(t_j) on the whole grid.
+
+3. F is band-limited to frequencies [-log k1, 0], so F(t) anywhere in the
+   window follows from sinc-Gaussian interpolation of the grid values.
+
+A block of M points costs O(√t·p + p·M log M) instead of O(M√t).  All
+large phases (θ(T0), T0·log k) are reduced mod 2π in decimal arithmetic,
+and points are addressed by float64 offsets x from an exact origin T0, so
+heights of 10^10 and beyond keep full float64 accuracy in x.
+
+Usage:
+    python odlyzko_schonhage.py --height 1e10 --zeros 10000 --output zeros.txt
+"""
+
+import argparse
+import time
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+from riemann_siegel import (THETA_SERIES, TWO_PI, remainder, scan_rosser_blocks,
+                            theta_prime, truncation_bound, zero_error_bound)
+from zero_store import DOUBLE_DOUBLE, append_zeros, split_decimal
+
+# Working precision of all decimal arithmetic, set locally in each function
+# so the global decimal context is left alone
+DIGITS = 50
+
+PI_DECIMAL = Decimal("3.14159265358979323846264338327950288419716939937510")
+with localcontext(prec=DIGITS):
+    TWO_PI_DECIMAL = 2 * PI_DECIMAL
+
+# =============================================================================
+# EXACT PHASE REDUCTION
+# =============================================================================
+
+class LogTable:
+    """Decimal logarithms log k, grown on demand and shared across windows"""
+
+    def __init__(self):
+        self.logs = [Decimal(0), Decimal(0)]   # index k holds log k
+
+    def extend(self, k_max):
+        k0 = len(self.logs)
+        if k_max < k0:
+            return
+        # Smallest prime factors, so only primes need a decimal logarithm
+        spf = np.zeros(k_max + 1, dtype=np.int64)
+        for p in range(2, int(k_max ** 0.5) + 1):
+            if spf[p] == 0:
+                block = spf[p * p::p]
+                block[block == 0] = p
+        with localcontext(prec=DIGITS):
+            for k in range(k0, k_max + 1):
+                p = int(spf[k])
+                if p == 0:
+                    self.logs.append(Decimal(k).ln())
+                else:
+                    self.logs.append(self.logs[p] + self.logs[k // p])
+
+    def phases(self, origin, k_max):
+        """(origin · log k) mod 2π for k = 1 ... k_max, as float64"""
+        self.extend(k_max)
+        with localcontext(prec=DIGITS):
+            return np.array([float((origin * self.logs[k]) % TWO_PI_DECIMAL)
+                             for k in range(1, k_max + 1)])
+
+
+def theta_decimal(origin):
+    """θ(T0) mod 2π for a decimal origin T0"""
+    with localcontext(prec=DIGITS):
+        t = Decimal(origin)
+        value = t / 2 * (t / TWO_PI_DECIMAL).ln() - t / 2 - PI_DECIMAL / 8
+        for i, c in enumerate(THETA_SERIES):
+            value += Decimal(c) / t ** (2 * i + 1)
+        return value
+
+
+def theta_offset(origin, x):
+    """θ(T0 + x) - θ(T0) for float64 offsets x, without cancellation"""
+    t0 = float(origin)
+    x = np.asarray(x, dtype=np.float64)
+    t = t0 + x
+    head = 0.5 * x * np.log(t0 / TWO_PI) + 0.5 * t * np.log1p(x / t0) - 0.5 * x
+    tail = np.zeros_like(x)
+    for i, c in enumerate(THETA_SERIES):
+        p = 2 * i + 1
+        # t^-p - t0^-p, written to avoid subtracting nearly equal numbers
+        tail += c * np.expm1(-p * np.log1p(x / t0)) / t0 ** p
+    return head + tail
+
+# =============================================================================
+# THE RATIONAL-FUNCTION EVALUATION
+# =============================================================================
+
+def cot_derivative_kernels(M, terms, near):
+    """FFTs of η^n cot^(n)(πd/M) over d = 0 ... M-1, zero for |d| ≤ near"""
+    eta = np.pi / (2 * M)
+    d = np.arange(M)
+    far = (d > near) & (d < M - near)
+    c = np.zeros(M)
+    c[far] = 1.0 / np.tan(np.pi * d[far] / M)
+    # P_0(c) = c,  P_{n+1}(c) = -(1 + c²) P_n'(c), scaled by η^n
+    poly = np.array([0.0, 1.0])
+    kernels = []
+    P = np.polynomial.polynomial
+    for _ in range(terms):
+        kernels.append(np.fft.fft(np.where(far, P.polyval(c, poly), 0.0)))
+        poly = -eta * P.polymul([1.0, 0.0, 1.0], P.polyder(poly))
+    return np.array(kernels)
+
+
+def grid_sum(a, phi, M, terms=24, near=2, kernels=None):
+    """F_j = Σ_k a_k exp(-i j φ_k) for j = 0 ... M-1 in O(k1·p + p·M log M)
+
+    a are the coefficients at t_0 and φ_k = δ log k mod 2π the pole angles.
+    """
+    if kernels is None:
+        kernels = cot_derivative_kernels(M, terms, near)
+    step = TWO_PI / M
+    eta = np.pi / (2 * M)
+    b = np.rint(phi / step).astype(np.int64)
+    eps = phi - b * step
+    b %= M
+    c = a * (1.0 - np.exp(-1j * np.mod(M * phi, TWO_PI)))
+
+    # Far field: Taylor moments per bin, convolved with the cot kernels
+    u = -eps / (2.0 * eta)
+    spectrum = np.zeros(M, dtype=np.complex128)
+    weight = c.copy()
+    for n in range(terms):
+        moment = (np.bincount(b, weight.real, M)
+                  + 1j * np.bincount(b, weight.imag, M))
+        spectrum += np.fft.fft(moment) * kernels[n]
+        weight = weight * u / (n + 1)
+    far_cot = np.fft.ifft(spectrum)
+    bin_sum = np.bincount(b, c.real, M) + 1j * np.bincount(b, c.imag, M)
+    near_sum = sum(np.roll(bin_sum, -d) for d in range(-near, near + 1))
+    G = 0.5 * (bin_sum.sum() - near_sum) + 0.5j * far_cot
+
+    # Near field: direct Dirichlet-kernel sums over the neighbouring bins,
+    # stable even when a pole sits on an evaluation point
+    order = np.argsort(b, kind="stable")
+    counts = np.bincount(b, minlength=M)
+    width = max(int(counts.max()), 1)
+    slot = np.arange(b.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    pad_a = np.zeros((M, width), dtype=np.complex128)
+    pad_phi = np.zeros((M, width))
+    pad_phi[:] = (np.arange(M) * step + 0.25 * step)[:, None]
+    pad_a[b[order], slot] = a[order]
+    pad_phi[b[order], slot] = phi[order]
+    psi = np.arange(M) * step
+    for d in range(-near, near + 1):
+        alpha = psi[:, None] - np.roll(pad_phi, -d, axis=0)
+        alpha = np.mod(alpha + np.pi, TWO_PI) - np.pi
+        half = 0.5 * alpha
+        small = np.abs(np.sin(half)) < 1e-300
+        ratio = np.where(small, M, np.sin(M * half) /
+                         np.where(small, 1.0, np.sin(half)))
+        G += (np.roll(pad_a, -d, axis=0) * ratio *
+              np.exp(1j * (M - 1) * half)).sum(axis=1)
+
+    return np.fft.fft(G) / M
+
+# =============================================================================
+# THE WINDOW EVALUATOR
+# =============================================================================
+
+class ZWindow:
+    """Z(T0 + x) for offsets 0 ≤ x ≤ width, backed by one Odlyzko-Schönhage grid
+
+    origin      exact window origin T0 (Decimal, int or str)
+    width       span of offsets x that will be evaluated
+    oversample  sampling rate of the grid over the Nyquist rate of F
+    taps        grid points used on each side by the interpolation
+    """
+
+    def __init__(self, origin, width, oversample=2.0, taps=32, terms=24,
+                 near=2, logs=None):
+        self.origin = Decimal(origin)
+        self.t0 = float(self.origin)
+        self.width = float(width)
+        self.logs = logs if logs is not None else LogTable()
+        self.taps = taps
+        self.k1 = int(np.floor(np.sqrt((self.t0 + self.width) / TWO_PI)))
+        log_k1 = np.log(self.k1)
+        # F·exp(ixβ) is band-limited to [-β, β]
+        self.beta = 0.5 * log_k1
+        self.delta = np.pi / (oversample * self.beta)
+        self.sigma2 = taps / (np.pi - self.beta * self.delta)
+        self.x0 = -(taps + 1) * self.delta
+        count = int(np.ceil((self.width - 2 * self.x0) / self.delta)) + 1
+        self.M = 1 << int(np.ceil(np.log2(count)))
+
+        k = np.arange(1, self.k1 + 1, dtype=np.float64)
+        self.log_k = np.log(k)
+        self.rsqrt_k = 1.0 / np.sqrt(k)
+        self.base = self.logs.phases(self.origin, self.k1)
+        with localcontext(prec=DIGITS):
+            self.theta0 = float(theta_decimal(self.origin) % TWO_PI_DECIMAL)
+
+        a = self.rsqrt_k * np.exp(-1j * (self.base + self.x0 * self.log_k))
+        phi = np.mod(self.delta * self.log_k, TWO_PI)
+        F = grid_sum(a, phi, self.M, terms, near)
+        x = self.x0 + self.delta * np.arange(self.M)
+        self.samples = F * np.exp(1j * self.beta * x)
+
+    def main_sum_term(self, x):
+        """F(T0 + x) by sinc-Gaussian interpolation of the grid"""
+        x = np.asarray(x, dtype=np.float64)
+        pos = (x - self.x0) / self.delta
+        center = np.rint(pos).astype(np.int64)
+        offset = np.arange(-self.taps, self.taps + 1)
+        s = (pos - center)[..., None] - offset
+        # sin(π(pos - j)) = ±sin(π(pos - center)): one sine per point
+        sign = np.where(offset % 2 == 0, 1.0, -1.0)
+        num = np.sin(np.pi * (pos - center))[..., None] * sign
+        exact = s == 0.0
+        kernel = np.where(exact, 1.0, num / (np.pi * np.where(exact, 1.0, s)))
+        kernel *= np.exp(-0.5 * s * s / self.sigma2)
+        F = (self.samples[center[..., None] + offset] * kernel).sum(axis=-1)
+        return F * np.exp(-1j * self.beta * x)
+
+    def theta(self, x):
+        """θ(T0 + x) mod 2π"""
+        return self.theta0 + theta_offset(self.origin, x)
+
+    def main_sum(self, x):
+        """2 Σ_{k ≤ N(t)} k^{-1/2} cos(θ(t) - t log k) at t = T0 + x"""
+        x = np.asarray(x, dtype=np.float64)
+        th = self.theta(x)
+        total = 2.0 * (np.exp(1j * th) * self.main_sum_term(x)).real
+        # The grid carries k ≤ k1 for every point; drop k > N(t) directly
+        n = np.floor(np.sqrt((self.t0 + x) / TWO_PI)).astype(np.int64)
+        for kk in range(int(n.min()) + 1, self.k1 + 1):
+            extra = n < kk
+            phase = (th[extra] - self.base[kk - 1]
+                     - x[extra] * self.log_k[kk - 1])
+            total[extra] -= 2.0 * self.rsqrt_k[kk - 1] * np.cos(phase)
+        return total
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        return self.main_sum(x) + remainder(self.t0 + x)
+
+    def direct(self, x):
+        """Z(T0 + x) with the main sum evaluated term by term, O(√t) a point"""
+        x = np.asarray(x, dtype=np.float64)
+        th = self.theta(x)
+        n = np.floor(np.sqrt((self.t0 + x) / TWO_PI)).astype(np.int64)
+        phase = th[:, None] - self.base - x[:, None] * self.log_k
+        terms = self.rsqrt_k * np.cos(phase)
+        terms[np.arange(self.k1) >= n[:, None]] = 0.0
+        return 2.0 * terms.sum(axis=1) + remainder(self.t0 + x)
+
+    def gram_points(self):
+        """Gram indices m and offsets x of all Gram points in [0, width]"""
+        with localcontext(prec=DIGITS):
+            theta0 = theta_decimal(self.origin)
+            # A window that starts at a Gram point keeps it, even when the
+            # origin lands a rounding error above it
+            m0 = int((theta0 / PI_DECIMAL - Decimal("1e-9"))
+                     .to_integral_value(rounding="ROUND_CEILING"))
+            frac = float(m0 * PI_DECIMAL - theta0)
+        dtheta = 0.5 * self.width * np.log((self.t0 + self.width) / TWO_PI)
+        m = np.arange(m0, m0 + int(dtheta / np.pi) + 2, dtype=np.int64)
+        target = frac + np.pi * (m - m0)
+        x = target / theta_prime(self.t0)
+        for _ in range(5):
+            x = x - (theta_offset(self.origin, x) - target) / \
+                theta_prime(self.t0 + x)
+        inside = x <= self.width
+        return m[inside], x[inside]
+
+# =============================================================================
+# ZERO SCANNING AT LARGE HEIGHT
+# =============================================================================
+
+# Absolute tolerance of the root refinement on the offsets x
+XTOL = 1e-12
+
+
+def scan_window(window, oversample=1, max_refine=4):
+    """Zeros in one window as offsets from its origin
+
+    Returns (roots, m_start, m_stop): the zeros between the first and last
+    good Gram points, whose indices are m_start and m_stop.  Raises
+    ValueError if the window holds no good Gram point.
+    """
+    m, g = window.gram_points()
+    good = np.nonzero(window(g) * np.where(m % 2 == 0, 1.0, -1.0) > 0)[0]
+    if good.size == 0:
+        raise ValueError(f"no good Gram point within {window.width:g} of "
+                         f"T0 = {window.t0:.6f}")
+    m, g = m[good[0]:], g[good[0]:]
+    roots, stop = scan_rosser_blocks(g, m, window, oversample, max_refine,
+                                     xtol=XTOL)
+    return roots, int(m[0]), int(m[stop])
+
+
+def window_error_bound(window, roots, samples=64):
+    """Largest error of the zero offsets found in one window
+
+    The error of the interpolated main sum is measured against direct
+    summation at up to `samples` of the roots and added to the C4
+    truncation bound at the window origin; zero_error_bound turns it into
+    an error in t and adds the root-finder tolerance.
+    """
+    pick = roots[np.linspace(0, roots.size - 1,
+                             min(samples, roots.size)).astype(np.int64)]
+    z_error = (np.abs(window(pick) - window.direct(pick)).max()
+               + truncation_bound(window.t0))
+    return zero_error_bound(roots, window, z_error, xtol=XTOL)
+
+
+def generate_zeros(height, count, window_width=None, **kwargs):
+    """Yield (window, offsets, first zero index) for successive windows
+
+    The first window starts at `height`; each later window starts at the
+    last good Gram point of its predecessor, so no zero is seen twice.
+    A window with fewer than two good Gram points is widened until it has
+    them.  Zero indices assume N(g_m) = m + 1 at good Gram points.
+    """
+    logs = LogTable()
+    origin = Decimal(height)
+    if window_width is None:
+        # Enough grid points to amortize the O(√t) setup over the window
+        window_width = max(200.0, 40.0 * np.sqrt(float(origin) / TWO_PI)
+                           / np.log(float(origin)))
+    found, m_next = 0, None
+    while found < count:
+        # Mean zero spacing is 2π/log(t/2π); do not overshoot the request
+        spacing = TWO_PI / np.log(float(origin) / TWO_PI)
+        width = min(window_width, 1.05 * (count - found) * spacing + 20.0)
+        while True:
+            window = ZWindow(origin, width, logs=logs, **kwargs)
+            try:
+                roots, m_start, m_stop = scan_window(window)
+                if m_stop > m_start:
+                    break
+            except ValueError:
+                pass
+            width *= 2
+        if m_next is not None and m_start != m_next:
+            raise RuntimeError(f"window at T0 = {window.t0:.6f} starts at "
+                               f"g_{m_start}, not at g_{m_next}")
+        m_next = m_stop
+        roots = roots[:count - found]
+        found += roots.size
+        yield window, roots, m_start + 2
+        m, g = window.gram_points()
+        with localcontext(prec=DIGITS):
+            origin = origin + Decimal(float(g[m == m_stop][0]))
+
+
+def format_ordinate(origin, x, digits=12):
+    """T0 + x printed exactly from the decimal origin"""
+    with localcontext(prec=DIGITS):
+        return f"{origin + Decimal(float(x)):.{digits}f}"
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--height", default="1e10",
+                        help="starting height T0 of the scan")
+    parser.add_argument("--zeros", type=int, default=10000,
+                        help="number of zeros to compute")
+    parser.add_argument("--width", type=float,
+                        help="window width (default scales with √T0)")
+    parser.add_argument("--check", type=int, default=0,
+                        help="compare this many points against direct sums")
+    parser.add_argument("--output", help="write the zero table to this file")
+    parser.add_argument("--store", help="append the zeros to this zero store")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("ODLYZKO-SCHÖNHAGE ZERO SEARCH")
+    print("=" * 70)
+
+    height = Decimal(args.height)
+    start = time.perf_counter()
+    rows = []
+    precision = 0.0
+    for window, roots, first in generate_zeros(height, args.zeros, args.width):
+        rows.extend((first + i, format_ordinate(window.origin, x))
+                    for i, x in enumerate(roots))
+        if args.store and roots.size:
+            precision = max(precision, window_error_bound(window, roots))
+        rate = len(rows) / (time.perf_counter() - start)
+        if rows:
+            print(f"  {len(rows):>10,} zeros   t ≤ {rows[-1][1]}   "
+                  f"{rate:,.0f} zeros/s")
+    elapsed = time.perf_counter() - start
+    if not rows:
+        print("\nNo zeros found.")
+        return
+
+    print(f"\nZeros found:        {len(rows):,}")
+    print(f"Zero indices:       {rows[0][0]:,} ... {rows[-1][0]:,}")
+    print(f"Max height reached: t = {rows[-1][1]}")
+    print(f"Elapsed:            {elapsed:.2f} s")
+    print(f"Throughput:         {len(rows) / elapsed:,.0f} zeros/s")
+
+    if args.check:
+        window = ZWindow(height, 100.0)
+        x = np.linspace(0.0, 100.0, args.check)
+        t = time.perf_counter()
+        fast = window(x)
+        t_fast = time.perf_counter() - t
+        t = time.perf_counter()
+        slow = window.direct(x)
+        t_slow = time.perf_counter() - t
+        print(f"\nMax |Z_OS - Z_direct| over {args.check} points: "
+              f"{np.abs(fast - slow).max():.2e}")
+        print(f"Per-point time: {1e6 * t_fast / x.size:.1f} µs (OS) vs "
+              f"{1e6 * t_slow / x.size:.1f} µs (direct)")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(f"RIEMANN HYPOTHESIS: {len(rows):,} ZEROS\n")
+            fh.write("=" * 50 + "\n")
+            for i, t in rows:
+                fh.write(f"{i},{t}\n")
+        print(f"Zero table written to {args.output}")
+
+    if args.store:
+        hi, lo = split_decimal([t for _, t in rows])
+        provenance = {"generator": "odlyzko_schonhage.py",
+                      "height": args.height}
+        print(f"Error bound: ±{precision:.1e}")
+        last = append_zeros(args.store, rows[0][0], hi, lo, DOUBLE_DOUBLE,
+                            precision=precision, provenance=provenance)
+        print(f"Zero store {args.store} now ends at zero {last:,}")
+
+
+if __name__ == "__main__":
+    main()
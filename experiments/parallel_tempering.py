@@ -0,0 +1,339 @@
+"""
+PARALLEL TEMPERING ON k-SAT
+===========================
+
+demonstrate_clustering() in p_vs_np.py assumes barriers of height
+about 0.05 n between solution clusters.  At one low temperature
+Metropolis waits exp(0.05 n / T) to cross one, which is where the
+annealer in sat_annealer.py stalls.  Replica exchange runs a ladder
+T₁ < ... < T_R and lets neighbouring rungs swap configurations with
+probability
+
+    min(1, exp((1/T_i - 1/T_{i+1}) (E_i - E_{i+1}))),
+
+so a configuration can climb to a temperature where barriers are
+cheap, cross, and come back down.
+
+Layout.  Each rung holds `copies` words of 64 chains, so one run is
+64·copies independent ladders in lockstep.  The (n + 1) × R·copies
+uint64 assignment matrix, the energies and the per-word temperatures
+live in shared memory.  Worker processes each own a range of words and
+sweep them with sat_annealer.Annealer in place.  Between sweeps the
+parent swaps configurations by XORing bit masks between the words of
+neighbouring rungs, so nothing is pickled after start-up.
+
+Ladder.  During the tuning rounds the ladder is re-spaced every few
+exchanges: each gap gets a length -log(acceptance), and the inner
+temperatures are moved, in log T, to equal shares of the total length
+(keeping T₁ and T_R).  Repeated, this evens out the acceptance.
+
+Reported: the swap acceptance per gap; round-trip times, in sweeps, of
+a configuration from T₁ to T_R and back; and energy histograms per rung.
+
+Usage:
+    python parallel_tempering.py --n 1000 --alpha 4.2 --replicas 16 --rounds 400
+    python parallel_tempering.py --n 100000 --replicas 8 --rounds 20 --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ksat import Formula, random_ksat
+from sat_annealer import Annealer, _pack
+
+# =============================================================================
+# LADDER
+# =============================================================================
+
+def geometric_ladder(tmin, tmax, replicas):
+    return tmin * (tmax / tmin) ** (np.arange(replicas) / max(replicas - 1, 1))
+
+
+def tune_ladder(temperatures, acceptance, floor=1e-3):
+    """Ladder with the same ends and the gaps re-spaced towards equal
+    swap acceptance: gap i has length -log(acceptance[i]) in log T
+    """
+    length = -np.log(np.clip(acceptance, floor, 1.0)) + 1e-9
+    cum = np.concatenate(([0.0], np.cumsum(length)))
+    log_t = np.log(temperatures)
+    new = np.interp(np.linspace(0.0, cum[-1], len(temperatures)), cum, log_t)
+    # Halfway there, so that a noisy estimate does not make it oscillate
+    return np.exp(0.5 * (log_t + new))
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(formula, names, words, lo, hi, seed, conn):
+    """Sweep words lo:hi of the shared state on each request"""
+    n = formula[0]
+    formula = Formula(*formula)
+    shm_x, x = _attach(names[0], (n + 1, words), np.uint64)
+    shm_e, energy = _attach(names[1], (64 * words,), np.int64)
+    shm_t, temperature = _attach(names[2], (words,), np.float64)
+    ann = Annealer(formula, seed=seed, x=x[:, lo:hi])
+    energy[64 * lo:64 * hi] = ann.energy
+    ann.energy = energy[64 * lo:64 * hi]
+    conn.send(True)
+    while True:
+        count = conn.recv()
+        if count is None:
+            break
+        for _ in range(count):
+            ann.sweep(temperature[lo:hi])
+        conn.send(True)
+    del x, energy, temperature, ann
+    for shm in (shm_x, shm_e, shm_t):
+        shm.close()
+
+# =============================================================================
+# REPLICA EXCHANGE
+# =============================================================================
+
+class ReplicaExchange:
+    """Ladder of temperatures, `copies` words of 64 chains per rung"""
+
+    def __init__(self, formula, temperatures, copies=1, workers=None, seed=0):
+        self.formula = formula
+        self.replicas = len(temperatures)
+        if self.replicas < 2 or np.min(temperatures) <= 0:
+            raise ValueError("need at least two temperatures, all positive")
+        self.copies = copies
+        words = self.replicas * copies
+        self.rng = np.random.default_rng(seed)
+        self._shm = [shared_memory.SharedMemory(create=True, size=size) for size in
+                     (8 * (formula.n + 1) * words, 8 * 64 * words, 8 * words)]
+        self.x = np.ndarray((formula.n + 1, words), dtype=np.uint64, buffer=self._shm[0].buf)
+        self.energy = np.ndarray((64 * words,), dtype=np.int64, buffer=self._shm[1].buf)
+        self.word_t = np.ndarray((words,), dtype=np.float64, buffer=self._shm[2].buf)
+        self.x[:-1] = np.frombuffer(self.rng.bytes(8 * formula.n * words),
+                                    dtype=np.uint64).reshape(formula.n, words)
+        self.x[-1] = 0
+        self.set_temperatures(temperatures)
+
+        workers = min(workers or os.cpu_count() or 1, words)
+        bounds = np.linspace(0, words, workers + 1).astype(int)
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        args = (formula.n, formula.lits, formula.clause_start)
+        names = [shm.name for shm in self._shm]
+        self._procs, self._conns = [], []
+        for p in range(workers):
+            parent, child = mp.Pipe()
+            proc = mp.Process(target=_worker, daemon=True,
+                              args=(args, names, words, bounds[p], bounds[p + 1],
+                                    seeds[p], child))
+            proc.start()
+            self._procs.append(proc)
+            self._conns.append(parent)
+        for conn in self._conns:
+            conn.recv()
+
+        # Configuration labels, to follow round trips through the ladder
+        chains = 64 * copies
+        self.walker = np.arange(self.replicas * chains).reshape(self.replicas, chains)
+        self.heading = np.zeros(self.walker.size, dtype=np.int8)     # +1 up, -1 down
+        self.left_cold = np.zeros(self.walker.size, dtype=np.int64)
+        self.round_trips = []
+        self.time = 0
+        self.reset_counts()
+
+    def set_temperatures(self, temperatures):
+        self.temperatures = np.asarray(temperatures, dtype=np.float64)
+        self.word_t[:] = np.repeat(self.temperatures, self.copies)
+
+    def reset_counts(self):
+        self.tried = np.zeros(self.replicas - 1, dtype=np.int64)
+        self.accepted = np.zeros(self.replicas - 1, dtype=np.int64)
+
+    def sweep(self, count=1):
+        """count Metropolis sweeps of every chain, in the workers"""
+        for conn in self._conns:
+            conn.send(count)
+        for conn in self._conns:
+            conn.recv()
+        self.time += count
+
+    def exchange(self, parity):
+        """Swap attempts for the gaps (i, i+1) with i ≡ parity (mod 2)"""
+        i = np.arange(parity, self.replicas - 1, 2)
+        if i.size == 0:
+            return
+        e = self.energy.reshape(self.replicas, -1)
+        beta = 1.0 / self.temperatures
+        arg = (beta[i] - beta[i + 1])[:, None] * (e[i] - e[i + 1])
+        swap = self.rng.random(arg.shape) < np.exp(np.minimum(arg, 0.0))
+        self.tried[i] += swap.shape[1]
+        self.accepted[i] += swap.sum(axis=1)
+
+        # Configurations: exchange the swapped bits between the two rungs
+        mask = _pack(swap).ravel()
+        lo = (i[:, None] * self.copies + np.arange(self.copies)).ravel()
+        hi = lo + self.copies
+        diff = (self.x[:-1, lo] ^ self.x[:-1, hi]) & mask
+        self.x[:-1, lo] ^= diff
+        self.x[:-1, hi] ^= diff
+        for a in (e, self.walker):
+            a[i], a[i + 1] = np.where(swap, a[i + 1], a[i]), np.where(swap, a[i], a[i + 1])
+        self._follow()
+
+    def _follow(self):
+        """Round trips: T₁ → T_R → T₁, timed in sweeps"""
+        cold, hot = self.walker[0], self.walker[-1]
+        back = cold[self.heading[cold] == -1]
+        self.round_trips.extend((self.time - self.left_cold[back]).tolist())
+        arrive = cold[self.heading[cold] != 1]
+        self.heading[arrive] = 1
+        self.left_cold[arrive] = self.time
+        self.heading[hot[self.heading[hot] == 1]] = -1
+
+    def acceptance(self):
+        return self.accepted / np.maximum(self.tried, 1)
+
+    def run(self, rounds, sweeps=1, tune=0, tune_every=10):
+        """rounds × (sweeps sweeps, one exchange); the ladder is re-tuned
+        every tune_every rounds of the first `tune`, and the energies of
+        the rounds after them go into the histograms
+        """
+        hist = np.zeros((self.replicas, 1), dtype=np.int64)
+        for r in range(rounds):
+            self.sweep(sweeps)
+            self.exchange(r % 2)
+            if r < tune:
+                if (r + 1) % tune_every == 0:
+                    self.set_temperatures(tune_ladder(self.temperatures, self.acceptance()))
+                    self.reset_counts()
+                if r + 1 == tune:
+                    self.reset_counts()
+                    self.round_trips = []
+                    self.heading[:] = 0
+                continue
+            hist = _accumulate(hist, self.energy.reshape(self.replicas, -1))
+        return hist
+
+    def assignment(self, chain):
+        w, b = divmod(chain, 64)
+        return ((self.x[:-1, w] >> np.uint64(b)) & np.uint64(1)).astype(bool)
+
+    def close(self):
+        for conn in self._conns:
+            conn.send(None)
+        for proc in self._procs:
+            proc.join()
+        del self.x, self.energy, self.word_t
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _accumulate(hist, energies):
+    """Add one row of energies per rung to the growing histograms"""
+    size = max(hist.shape[1], int(energies.max()) + 1)
+    if size > hist.shape[1]:
+        hist = np.pad(hist, ((0, 0), (0, size - hist.shape[1])))
+    rows = np.arange(energies.shape[0])[:, None] * size
+    return hist + np.bincount((rows + energies).ravel(),
+                              minlength=hist.size).reshape(hist.shape)
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=1000)
+    parser.add_argument("--alpha", type=float, default=4.2)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tmin", type=float, default=0.1)
+    parser.add_argument("--tmax", type=float, default=1.0)
+    parser.add_argument("--replicas", type=int, default=16, help="rungs of the ladder")
+    parser.add_argument("--copies", type=int, default=1,
+                        help="words of 64 independent ladders")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--rounds", type=int, default=400)
+    parser.add_argument("--sweeps", type=int, default=1, help="sweeps between exchanges")
+    parser.add_argument("--tune", type=int, default=None,
+                        help="rounds of ladder tuning (default: rounds / 4)")
+    parser.add_argument("--tune-every", type=int, default=10,
+                        help="rounds between ladder updates while tuning")
+    parser.add_argument("--output", help="write ladder, acceptance, round trips "
+                                         "and histograms (npz)")
+    args = parser.parse_args(argv)
+    tune = args.rounds // 4 if args.tune is None else args.tune
+
+    print("=" * 70)
+    print("PARALLEL TEMPERING ON k-SAT")
+    print("=" * 70)
+
+    f = random_ksat(args.n, args.alpha, args.k, args.seed)
+    start = time.perf_counter()
+    ladder = geometric_ladder(args.tmin, args.tmax, args.replicas)
+    with ReplicaExchange(f, ladder, args.copies, args.workers, args.seed) as pt:
+        print(f"\n{args.k}-SAT n = {f.n:,}, m = {f.m:,} (α = {f.m / f.n:.3f}); "
+              f"{pt.replicas} rungs × {64 * pt.copies} chains, {len(pt._procs)} workers "
+              f"({time.perf_counter() - start:.2f} s setup)")
+        print(f"Barrier 0.05 n = {0.05 * f.n:g} assumed in p_vs_np.py: "
+              f"exp(0.05 n / T) = 10^{0.05 * f.n / args.tmax / np.log(10):.1f} at T_R, "
+              f"10^{0.05 * f.n / args.tmin / np.log(10):.1f} at T₁")
+
+        start = time.perf_counter()
+        hist = pt.run(args.rounds, args.sweeps, tune, args.tune_every)
+        elapsed = time.perf_counter() - start
+        print(f"\n{args.rounds} rounds of {args.sweeps} sweep(s) + exchange "
+              f"({tune} tuning) in {elapsed:.2f} s, "
+              f"{pt.energy.size * f.n * pt.time / elapsed:,.0f} spin updates/s")
+
+        acc = pt.acceptance()
+        print(f"\n{'rung':>5} {'T':>8} {'swap ↑':>8} {'mean E':>9} {'min E':>6} "
+              f"{'P(E = 0)':>9}")
+        for r in range(pt.replicas):
+            h = hist[r]
+            total = max(h.sum(), 1)
+            mean = (np.arange(h.size) * h).sum() / total
+            low = int(np.argmax(h > 0)) if h.any() else -1
+            gap = f"{acc[r]:>8.3f}" if r < pt.replicas - 1 else f"{'':>8}"
+            print(f"{r:>5} {pt.temperatures[r]:>8.4f} {gap} {mean:>9.2f} {low:>6} "
+                  f"{h[0] / total:>9.4f}")
+        print(f"  (initial ladder {np.array2string(ladder, precision=3)})")
+        print(f"  swap acceptance spread: {acc.min():.3f} … {acc.max():.3f}")
+        if acc.min() == 0:
+            # Energy gaps between rungs grow like √n times the spacing
+            print("  Some gaps never swap: use more rungs or a narrower range "
+                  "(the rung count needed grows like √n)")
+
+        trips = np.array(pt.round_trips)
+        if trips.size:
+            print(f"\nRound trips T₁ → T_R → T₁: {trips.size}, mean {trips.mean():.1f}, "
+                  f"median {np.median(trips):.0f}, max {trips.max()} sweeps")
+        else:
+            print("\nNo round trips T₁ → T_R → T₁ completed")
+        solved = np.nonzero(pt.energy == 0)[0]
+        if solved.size:
+            assert f.unsatisfied(pt.assignment(int(solved[0]))) == 0
+            print(f"{solved.size} chains are at E = 0 now (checked one)")
+
+        if args.output:
+            np.savez(args.output, initial=ladder, temperatures=pt.temperatures,
+                     acceptance=acc, round_trips=trips, histograms=hist)
+            print(f"\nWritten to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
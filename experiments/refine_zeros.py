@@ -0,0 +1,349 @@
+"""
+DOUBLE-DOUBLE REFINEMENT OF ZERO ORDINATES
+==========================================
+
+Float64 pins a zero near t ~ 10^4 down to about 1e-12 at best, and the
+truncated Riemann-Siegel remainder stops well short of that at low
+heights.  This module evaluates Z(t) in double-double arithmetic and
+polishes given ordinates to ≈ 30 significant digits.
+
+ζ(1/2 + it) comes from Euler-Maclaurin summation, which converges for
+any precision:
+
+    ζ(s) = Σ_{n<N} n^{-s} + N^{1-s}/(s-1) + N^{-s}/2
+           + Σ_{k=1}^{K} B_2k/(2k)! s(s+1)···(s+2k-2) N^{-s-2k+1} + E_K,
+
+and with N ≥ (t + 2K)/π every correction term is at most 4^{-k} of the
+one before, so K = 60 leaves |E_K| far below 1e-32.  θ(t) = Im log Γ(1/4
++ it/2) - (t/2) log π comes from Stirling's series, shifted to |z| ≥ 40
+at low heights.  Then Z(t) = Re(e^{iθ(t)} ζ(1/2 + it)), and the imaginary
+part, which vanishes identically, serves as an accuracy check.
+
+Each ordinate is refined by the secant method from its float64 value;
+all ordinates of a pass are iterated together, with the (t, n) terms of
+the main sum evaluated in cache-sized double-double blocks.  The cost is
+O(t) terms per evaluation, which is cheap up to t ~ 10^5.
+
+Input indices are checked against the zero count N(t) before anything
+is refined (see zero_store.first_inconsistent): refinement polishes an
+ordinate, it cannot tell which zero it is.
+
+Usage:
+    python refine_zeros.py --count 1000 --output refined.txt
+    python refine_zeros.py --zeros table.txt --store refined.rzs
+"""
+
+import argparse
+import time
+from decimal import localcontext
+
+import numpy as np
+
+import double_double as dd
+from double_double import DD, DDComplex
+from riemann_siegel import (bernoulli_numbers, generate_zeros, refine_roots,
+                            z_function, zero_error_bound)
+from zero_store import (DOUBLE_DOUBLE, append_zeros, count_residuals,
+                        first_inconsistent, read_text_table, s_bound)
+
+EM_TERMS = 60
+STIRLING_TERMS = 20
+STIRLING_MIN = 40.0          # |z| at which Stirling's series is used
+ROWS, COLUMNS = 8, 512       # (t, n) block of the main sum
+
+# =============================================================================
+# EXACT COEFFICIENTS
+# =============================================================================
+
+def _coefficients():
+    b = bernoulli_numbers(2 * max(EM_TERMS, STIRLING_TERMS) + 2)
+    fact = [1]
+    for k in range(1, 2 * EM_TERMS + 1):
+        fact.append(fact[-1] * k)
+    em = DD.from_decimal([b[2 * k] / fact[2 * k] for k in range(1, EM_TERMS + 1)])
+    stirling = DD.from_decimal([b[2 * k] / (2 * k * (2 * k - 1))
+                                for k in range(1, STIRLING_TERMS + 1)])
+    return em, stirling
+
+
+EM_COEFFS, STIRLING_COEFFS = _coefficients()
+LOG_PI = dd.log(dd.PI)
+
+_LOG_N = DD(np.zeros(0))
+_INV_SQRT_N = DD(np.zeros(0))
+
+
+def _n_tables(n_max):
+    """log n and n^{-1/2} in double-double for n = 1 ... n_max (cached)"""
+    global _LOG_N, _INV_SQRT_N
+    if len(_LOG_N) < n_max:
+        n = np.arange(1, n_max + 1, dtype=np.float64)
+        _LOG_N = dd.blockwise(dd.log, DD(n))
+        _INV_SQRT_N = dd.blockwise(lambda x: 1.0 / dd.sqrt(x), DD(n))
+    return _LOG_N, _INV_SQRT_N
+
+# =============================================================================
+# θ(t), ζ(1/2 + it) AND Z(t) IN DOUBLE-DOUBLE
+# =============================================================================
+
+def theta_dd(t):
+    """θ(t) = Im log Γ(1/4 + it/2) - (t/2) log π for a DD array t > 0"""
+    half_t = t.ldexp(-1)
+    shift = np.maximum(0.0, np.ceil(STIRLING_MIN - half_t.hi))
+    z = DDComplex(DD(0.25 + shift), half_t)
+
+    # Stirling: (z - 1/2) log z - z + Σ B_2k / (2k(2k-1) z^{2k-1})
+    im = ((z - 0.5) * dd.clog(z) - z).im
+    inv = 1.0 / z
+    inv2 = inv * inv
+    series = DDComplex(DD(np.full(t.shape, STIRLING_COEFFS.hi[-1]),
+                          np.full(t.shape, STIRLING_COEFFS.lo[-1])))
+    for k in range(STIRLING_TERMS - 2, -1, -1):
+        series = series * inv2 + DDComplex(STIRLING_COEFFS[k])
+    im = im + (series * inv).im
+
+    # log Γ(z) = log Γ(z + M) - Σ_{j<M} log(z + j)
+    for j in range(int(shift.max(initial=0))):
+        arg = dd.atan2(half_t, DD(np.full(t.shape, 0.25 + j)))
+        im = dd.where(j < shift, im - arg, im)
+    return im - half_t * LOG_PI
+
+
+def em_length(t_hi, terms=EM_TERMS):
+    """Number of terms N ≥ (t + 2K)/π of the Euler-Maclaurin main sum"""
+    return (np.ceil((np.asarray(t_hi) + 2 * terms) / np.pi) + 1).astype(np.int64)
+
+
+def zeta_critical(t, terms=EM_TERMS):
+    """ζ(1/2 + it) as a DDComplex for an ascending DD array t"""
+    n_t = em_length(t.hi, terms)
+    log_n, inv_sqrt_n = _n_tables(int(n_t.max()))
+
+    # Main sum Σ_{n<N} n^{-1/2} e^{-it log n}, block by block
+    re = DD(np.zeros(t.shape))
+    im = DD(np.zeros(t.shape))
+    for r0 in range(0, len(t), ROWS):
+        rows = t[r0:r0 + ROWS]
+        limit = n_t[r0:r0 + ROWS, None]
+        acc_re = DD(np.zeros(len(rows)))
+        acc_im = DD(np.zeros(len(rows)))
+        for c0 in range(0, int(limit.max()) - 1, COLUMNS):
+            cols = slice(c0, min(c0 + COLUMNS, int(limit.max()) - 1))
+            phase = DD(rows.hi[:, None], rows.lo[:, None]) * DD(
+                log_n.hi[None, cols], log_n.lo[None, cols])
+            s, c = dd.sincos(phase)
+            n = np.arange(cols.start + 1, cols.stop + 1)
+            keep = n[None, :] < limit
+            w = DD(np.where(keep, inv_sqrt_n.hi[cols], 0.0),
+                   np.where(keep, inv_sqrt_n.lo[cols], 0.0))
+            acc_re = acc_re + (c * w).sum(axis=1)
+            acc_im = acc_im - (s * w).sum(axis=1)
+        re[r0:r0 + ROWS] = acc_re
+        im[r0:r0 + ROWS] = acc_im
+    zeta = DDComplex(re, im)
+
+    # Euler-Maclaurin tail at N
+    big_n = n_t.astype(np.float64)
+    s = DDComplex(DD(np.full(t.shape, 0.5)), t)
+    n_s = dd.expi(-(t * log_n[n_t - 1])) * inv_sqrt_n[n_t - 1]      # N^{-s}
+    zeta = zeta + n_s * big_n / (s - 1.0) + n_s * 0.5
+    q = n_s * s / big_n
+    n2 = big_n * big_n                                      # exact
+    for k in range(1, terms + 1):
+        if k > 1:
+            q = q * (s + (2 * k - 3.0)) * (s + (2 * k - 2.0)) / n2
+        zeta = zeta + q * EM_COEFFS[k - 1]
+    return zeta
+
+
+def z_dd(t):
+    """(Z(t), residual) in double-double; the residual Im e^{iθ} ζ is ≈ 0"""
+    t = t if isinstance(t, DD) else DD(np.asarray(t, dtype=np.float64))
+    rot = dd.expi(theta_dd(t)) * zeta_critical(t)
+    return rot.re, rot.im
+
+# =============================================================================
+# SECANT REFINEMENT
+# =============================================================================
+
+def bracket_nearest(t0, radius=0.25, points=26):
+    """Float64 root of Riemann-Siegel Z nearest to each estimate t0
+
+    Z is sampled on t0 ± radius; the sign change closest to t0 is refined
+    with the Illinois iteration.  Estimates without a sign change nearby
+    are returned unchanged and flagged.
+    """
+    t0 = np.asarray(t0, dtype=np.float64)
+    grid = t0[:, None] + np.linspace(-radius, radius, points)
+    z = z_function(grid)
+    change = np.signbit(z[:, 1:]) != np.signbit(z[:, :-1])
+    centre = np.abs(grid[:, :-1] + grid[:, 1:] - 2 * t0[:, None])
+    pick = np.argmin(np.where(change, centre, np.inf), axis=1)
+    found = change[np.arange(t0.size), pick]
+    rows = np.nonzero(found)[0]
+    roots = t0.copy()
+    roots[rows] = refine_roots(grid[rows, pick[rows]], grid[rows, pick[rows] + 1],
+                               z[rows, pick[rows]], z[rows, pick[rows] + 1])
+    return roots, found
+
+
+def refine(t0, rtol=1e-28, max_iter=10):
+    """Secant refinement of ascending zero estimates in double-double
+
+    t0 should already be a float64 root (see bracket_nearest); returns the
+    DD roots and a dict with the final Z values, the size of the last
+    secant step and a mask of the converged roots.
+    """
+    x0 = t0.copy() if isinstance(t0, DD) else DD(np.array(t0, dtype=np.float64))
+    x1 = x0 + np.maximum(1e-9 * x0.hi, 1e-9)
+    f0, residual = z_dd(x0)
+    f1, _ = z_dd(x1)
+    evaluations = 2
+    active = np.arange(len(x0))
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        a0, a1, g0, g1 = x0[active], x1[active], f0[active], f1[active]
+        denom = g1 - g0
+        step = g1 * (a1 - a0) / dd.where(denom.hi == 0, DD(np.ones(active.size)), denom)
+        step = dd.where(denom.hi == 0, DD(np.zeros(active.size)), step)
+        a2 = a1 - step
+        g2, res = z_dd(a2)
+        evaluations += 1
+        x0[active], f0[active] = a1, g1
+        x1[active], f1[active] = a2, g2
+        residual[active] = res
+        done = np.abs(step.hi) <= rtol * np.abs(a2.hi)
+        active = active[~done]
+    converged = np.ones(len(x1), dtype=bool)
+    converged[active] = False
+    return x1, {"evaluations": evaluations, "unconverged": active.size,
+                "converged": converged, "step": np.abs((x1 - x0).hi),
+                "z": f1, "residual": residual}
+
+
+def refined_error_bound(x, z, residual, step):
+    """Largest error of DD roots x with Z(x) = z after a last step `step`
+
+    |Z(x)| plus the evaluation error, estimated by the residual |Im e^{iθ} ζ|,
+    becomes an error in t through the slope |Z'(x)| of the float64 Z; the
+    last secant step is added for what the iteration had still to move.
+    """
+    z_error = np.abs(np.asarray(z)) + np.abs(np.asarray(residual))
+    return float(zero_error_bound(x.hi, z_error=z_error, rtol=0.0)
+                 + np.max(step, initial=0.0))
+
+
+def to_strings(x, digits=30):
+    """Decimal strings with `digits` significant digits"""
+    values = x.to_decimal()
+    with localcontext(prec=digits):
+        return [str(+v) for v in values]
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="text table (n,t) of zeros to refine "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=None,
+                        help="refine only the first COUNT ordinates (1,000 "
+                             "when they are computed)")
+    parser.add_argument("--output", help="write the refined table (n,t) here")
+    parser.add_argument("--store", help="append to a double-double zero store")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("DOUBLE-DOUBLE REFINEMENT OF ZERO ORDINATES")
+    print("=" * 70)
+
+    if args.zeros:
+        source = args.zeros
+        indices, values = read_text_table(args.zeros)
+        indices, values = indices[:args.count], values[:args.count]
+        t0 = np.array([float(v) for v in values])
+    else:
+        source = "riemann_siegel.py"
+        t0 = np.concatenate(list(generate_zeros(args.count or 1000)))
+        indices = np.arange(1, t0.size + 1)
+        values = [f"{t:.9f}" for t in t0]
+    if t0.size == 0 or np.any(np.diff(indices) != 1):
+        raise SystemExit(f"{source}: zero indices are missing or not consecutive")
+    bad = first_inconsistent(int(indices[0]), t0)
+    if bad is not None:
+        raise SystemExit(f"refusing to refine: zero #{indices[bad]} at "
+                         f"t = {values[bad]} contradicts the zero count N(t); "
+                         f"only the first {bad:,} rows are usable")
+    order = np.argsort(t0)
+    print(f"\nInput: {t0.size:,} ordinates from {source}, "
+          f"{t0.min():.3f} ≤ t ≤ {t0.max():.3f}")
+
+    start = time.perf_counter()
+    guess, found = bracket_nearest(t0[order])
+    roots, info = refine(guess)
+    elapsed = time.perf_counter() - start
+    x = DD(np.empty_like(t0), np.empty_like(t0))
+    x[order] = roots
+    z = DD(np.empty_like(t0))
+    z[order] = info["z"]
+    res = np.empty_like(t0)
+    res[order] = info["residual"].hi
+    converged = np.empty(t0.size, dtype=bool)
+    converged[order] = info["converged"]
+    step = np.empty_like(t0)
+    step[order] = info["step"]
+
+    shift = np.abs((x - DD(t0)).hi)
+    unique = np.unique(np.round(x.hi, 8)).size
+    drift = np.abs(count_residuals(int(indices[0]), x.hi))
+    consistent = first_inconsistent(int(indices[0]), x.hi) is None
+    print(f"Refined in {elapsed:.1f} s, {info['evaluations']} Z evaluations "
+          f"per pass, {info['unconverged']} unconverged")
+    print(f"Largest |Z| at the refined ordinates:     {np.abs(z.hi).max():.1e}")
+    print(f"Largest |Im e^(iθ) ζ| (should be ≈ 0):    {np.abs(res).max():.1e}")
+    print(f"Shift from the input: median {np.median(shift):.2e}, "
+          f"max {shift.max():.2e}")
+    print(f"Distinct zeros found: {unique:,} of {t0.size:,} "
+          f"({t0.size - found.sum():,} without a sign change within ±0.25)")
+    print(f"Largest |S(γ_n)| implied by the indices: {drift.max():.2f} "
+          f"(bound {s_bound(x.hi.max()):.2f})"
+          + ("" if consistent else "   (indices contradict the zero count)"))
+
+    text = to_strings(x)
+    print(f"\n{'n':>6} {'input':>22} {'refined':>34}")
+    for i in list(range(min(5, t0.size))) + list(range(max(5, t0.size - 3), t0.size)):
+        print(f"{indices[i]:>6} {values[i]:>22} {text[i]:>34}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write("REFINED ZEROS (DOUBLE-DOUBLE, ≈ 30 SIGNIFICANT DIGITS)\n")
+            fh.write("=" * 50 + "\n")
+            for n, v in zip(indices, text):
+                fh.write(f"{n},{v}\n")
+        print(f"\nWrote {args.output}")
+    if args.store:
+        if not consistent or unique != t0.size or not found.all():
+            raise SystemExit("refusing to store: indices are inconsistent")
+        # Only the converged prefix: the store must not skip an index
+        keep = int(np.argmin(converged)) if not converged.all() else t0.size
+        if keep == 0:
+            raise SystemExit("refusing to store: the first zero did not converge")
+        if keep < t0.size:
+            print(f"\nStoring the {keep:,} zeros before the first unconverged "
+                  f"one (#{indices[keep]})")
+        precision = refined_error_bound(x[:keep], z.hi[:keep], res[:keep],
+                                        step[:keep])
+        print(f"Error bound: ±{precision:.1e}")
+        last = append_zeros(args.store, int(indices[0]), x.hi[:keep],
+                            x.lo[:keep], kind=DOUBLE_DOUBLE,
+                            precision=precision,
+                            provenance={"generator": "refine_zeros.py",
+                                        "source": source})
+        print(f"Zero store {args.store} now ends at zero {last:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+RIEMANN-SIEGEL Z(t) ENGINE
+==========================
+
+Vectorized evaluation of Hardy's function on the critical line
+
+    Z(t) = exp(iθ(t)) ζ(1/2 + it)
+
+through the Riemann-Siegel formula
+
+    Z(t) = 2 Σ_{n ≤ N} n^{-1/2} cos(θ(t) - t log n) + R(t),   N = ⌊√(t/2π)⌋
+
+with the remainder R(t) expanded through the correction terms C0 ... C4.
+Every routine takes NumPy arrays of t, so whole stretches of the critical
+line are evaluated in one call instead of one hard-coded τ at a time.
+
+Zeros are located by sampling Z at Gram points, bracketing every sign
+change, resampling only the Rosser blocks that come up short of zeros,
+and refining all brackets simultaneously with a vectorized Illinois
+(modified regula falsi) iteration.
+
+Usage:
+    python riemann_siegel.py --zeros 1000000 --output ../outputs/riemann_zeros.txt
+"""
+
+import argparse
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from zero_store import append_zeros
+
+TWO_PI = 2.0 * np.pi
+
+# Number of (t, n) terms evaluated per chunk of the main sum
+CHUNK_TERMS = 1 << 20
+
+# =============================================================================
+# THE RIEMANN-SIEGEL THETA FUNCTION AND GRAM POINTS
+# =============================================================================
+
+def bernoulli_numbers(count):
+    """B_0 ... B_{count-1} as exact fractions"""
+    b = [Fraction(1)]
+    row = [1, 1]                      # binomial coefficients C(m, j)
+    for m in range(1, count):
+        row = [1] + [row[j - 1] + row[j] for j in range(1, m + 1)] + [1]
+        # Σ_{j ≤ m} C(m+1, j) B_j = 0
+        b.append(-sum(row[j] * b[j] for j in range(m)) / Fraction(m + 1))
+    return b
+
+
+def theta_series(terms=5):
+    """Stirling coefficients of θ(t) at t^{-1}, t^{-3}, ...
+
+    θ(t) = (t/2) log(t/2π) - t/2 - π/8 + Σ_k (1 - 2^{1-2k}) |B_2k| / (4k(2k-1)) t^{1-2k}
+    """
+    b = bernoulli_numbers(2 * terms + 1)
+    return tuple(float((1 - Fraction(2, 4 ** k)) * abs(b[2 * k])
+                       / (4 * k * (2 * k - 1))) for k in range(1, terms + 1))
+
+
+# Asymptotic Stirling expansion of θ(t): coefficients of t^{-1}, t^{-3}, ...
+THETA_SERIES = theta_series(5)
+
+
+def theta(t):
+    """Riemann-Siegel theta function θ(t) for t ≳ 10"""
+    t = np.asarray(t, dtype=np.float64)
+    inv = 1.0 / t
+    inv2 = inv * inv
+    tail = np.zeros_like(t)
+    for c in reversed(THETA_SERIES):
+        tail = tail * inv2 + c
+    return 0.5 * t * np.log(t / TWO_PI) - 0.5 * t - np.pi / 8.0 + tail * inv
+
+
+def theta_prime(t):
+    """Derivative θ'(t) = (1/2) log(t/2π) + O(t^-2)"""
+    t = np.asarray(t, dtype=np.float64)
+    inv2 = 1.0 / (t * t)
+    tail = np.zeros_like(t)
+    for k, c in reversed(list(enumerate(THETA_SERIES))):
+        tail = tail * inv2 - (2 * k + 1) * c
+    return 0.5 * np.log(t / TWO_PI) + tail * inv2
+
+
+def gram_points(m):
+    """Gram points g_m with θ(g_m) = mπ, for integer arrays m ≥ -1"""
+    m = np.asarray(m, dtype=np.float64)
+    # θ(t) ≈ (t/2) log(t/2πe) - π/8; solve x log x = (m + 1/8)/e, x = t/2πe
+    y = (m + 0.125) / np.e
+    x = np.maximum(y / np.log(np.maximum(y, 2.0) + 1.0), 1.0)
+    for _ in range(6):
+        x = x - (x * np.log(x) - y) / (np.log(x) + 1.0)
+    t = np.maximum(TWO_PI * np.e * x, 9.0)
+    for _ in range(4):
+        t = t - (theta(t) - np.pi * m) / theta_prime(t)
+    return t
+
+# =============================================================================
+# THE CORRECTION TERMS C0 ... C4
+# =============================================================================
+
+def _psi_taylor(n_coeffs=64, n_nodes=256, radius=1.0):
+    """Taylor coefficients of Ψ(1/2 + u) = cos(2π(p² - p - 1/16))/cos(2πp)
+
+    Ψ is entire, so the coefficients follow from Cauchy's formula on a
+    circle |u| = radius, which is evaluated exactly by an FFT.
+    """
+    u = radius * np.exp(2j * np.pi * np.arange(n_nodes) / n_nodes)
+    values = -np.cos(TWO_PI * u * u - 5.0 * np.pi / 8.0) / np.cos(TWO_PI * u)
+    coeffs = np.fft.fft(values) / n_nodes
+    coeffs = coeffs.real[:n_coeffs] / radius ** np.arange(n_coeffs)
+    coeffs[1::2] = 0.0  # Ψ(1/2 + u) is even in u
+    return coeffs
+
+
+def _derivative(coeffs, k):
+    """k-th derivative of a power series given by ascending coefficients"""
+    return np.polynomial.polynomial.polyder(coeffs, k) if k else coeffs
+
+
+def correction_polynomials():
+    """Power series in u = p - 1/2 of the Riemann-Siegel terms C0 ... C4"""
+    psi = _psi_taylor()
+    d = [_derivative(psi, k) for k in range(13)]
+    pi2, pi4, pi6, pi8 = np.pi ** 2, np.pi ** 4, np.pi ** 6, np.pi ** 8
+    add = np.polynomial.polynomial.polyadd
+    c0 = d[0]
+    c1 = -d[3] / (96.0 * pi2)
+    c2 = add(d[2] / (64.0 * pi2), d[6] / (18432.0 * pi4))
+    c3 = add(add(-d[1] / (64.0 * pi2), -d[5] / (3840.0 * pi4)),
+             -d[9] / (5308416.0 * pi6))
+    c4 = add(add(d[0] / (128.0 * pi2), 19.0 * d[4] / (24576.0 * pi4)),
+             add(11.0 * d[8] / (5898240.0 * pi6),
+                 d[12] / (2038431744.0 * pi8)))
+    polys = []
+    for c in (c0, c1, c2, c3, c4):
+        keep = np.nonzero(np.abs(c) > 1e-22)[0]
+        polys.append(c[:keep[-1] + 1])
+    return polys
+
+
+CORRECTIONS = correction_polynomials()
+
+
+def chebyshev_corrections(polys=CORRECTIONS, degree=24):
+    """C0 ... C4 as Chebyshev series in y = 8u² - 1, u ∈ [-1/2, 1/2]
+
+    C0, C2, C4 are even and C1, C3 odd in u, so C_k(u) = g_k(y) or
+    2u·g_k(y) with g_k smooth on [-1, 1].  A dozen or so Chebyshev terms
+    reach the noise floor of the power series, against ≈ 60 power-series
+    terms per polynomial; trailing terms below that floor are dropped.
+    """
+    tables = []
+    for k, poly in enumerate(polys):
+        def g(y, poly=poly, odd=k % 2 == 1):
+            x = np.sqrt(0.5 * (y + 1.0))
+            value = np.polynomial.polynomial.polyval(0.5 * x, poly)
+            return value / x if odd else value
+        c = np.polynomial.chebyshev.chebinterpolate(g, degree)
+        floor = max(1e-15 * np.abs(c).max(), 1e-18)
+        # Cut at the first negligible coefficient; keep all if there is none
+        small = np.nonzero(np.abs(c) < floor)[0]
+        tables.append(c[:small[0]] if small.size else c)
+    return tables
+
+
+CHEBYSHEV_CORRECTIONS = chebyshev_corrections()
+
+
+def remainder(t, order=4):
+    """Riemann-Siegel remainder R(t) through the correction term C_order"""
+    t = np.asarray(t, dtype=np.float64)
+    a = np.sqrt(t / TWO_PI)
+    n = np.floor(a)
+    u = a - n - 0.5
+    y = 8.0 * u * u - 1.0
+    inv_a = 1.0 / a
+    total = np.zeros_like(t)
+    for k in range(order, -1, -1):
+        term = np.polynomial.chebyshev.chebval(y, CHEBYSHEV_CORRECTIONS[k])
+        if k % 2:
+            term *= 2.0 * u
+        total = total * inv_a + term
+    sign = np.where(n % 2 == 1, 1.0, -1.0)  # (-1)^{N-1}
+    return sign * total / np.sqrt(a)
+
+# =============================================================================
+# VECTORIZED Z(t)
+# =============================================================================
+
+def main_sum(t):
+    """Main sum 2 Σ_{n ≤ N(t)} n^{-1/2} cos(θ(t) - t log n), chunked"""
+    t = np.asarray(t, dtype=np.float64)
+    flat = t.ravel()
+    out = np.empty_like(flat)
+    if flat.size == 0:
+        return out.reshape(t.shape)
+    big_n = np.floor(np.sqrt(flat / TWO_PI)).astype(np.int64)
+    th = theta(flat)
+    n_max = int(big_n.max())
+    n = np.arange(1, n_max + 1, dtype=np.float64)
+    log_n = np.log(n)
+    weight = 2.0 / np.sqrt(n)
+    rows = max(1, CHUNK_TERMS // n_max)
+    for lo in range(0, flat.size, rows):
+        hi = min(lo + rows, flat.size)
+        width = int(big_n[lo:hi].max())
+        phase = np.multiply.outer(flat[lo:hi], log_n[:width])
+        np.subtract(th[lo:hi, None], phase, out=phase)
+        np.cos(phase, out=phase)
+        phase *= weight[:width]
+        # Zero the terms beyond N(t) for rows with a shorter sum
+        short = np.nonzero(big_n[lo:hi] < width)[0]
+        for i in short:
+            phase[i, big_n[lo + i]:] = 0.0
+        out[lo:hi] = phase.sum(axis=1)
+    return out.reshape(t.shape)
+
+
+def z_function(t, order=4):
+    """Hardy's Z(t) for arrays of t ≳ 10 (Riemann-Siegel with C0 ... C_order)"""
+    return main_sum(t) + remainder(t, order)
+
+# =============================================================================
+# SIGN-CHANGE BRACKETING AND ROOT REFINEMENT
+# =============================================================================
+
+def refine_roots(a, b, za, zb, z=z_function, rtol=4e-16, xtol=0.0,
+                 max_iter=60):
+    """Refine brackets [a, b] with Z(a)·Z(b) < 0 simultaneously (Illinois)"""
+    a = np.array(a, dtype=np.float64)
+    b = np.array(b, dtype=np.float64)
+    za = np.array(za, dtype=np.float64)
+    zb = np.array(zb, dtype=np.float64)
+    side = np.zeros(a.shape, dtype=np.int8)
+    active = np.nonzero((b - a) > xtol + rtol * np.abs(b))[0]
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        aa, bb, fa, fb = a[active], b[active], za[active], zb[active]
+        c = (aa * fb - bb * fa) / (fb - fa)
+        c = np.where((c > aa) & (c < bb), c, 0.5 * (aa + bb))
+        fc = z(c)
+        left = np.signbit(fc) == np.signbit(fa)
+        # Replace the endpoint with the same sign; halve the stale endpoint
+        # when the same side is kept twice (the Illinois modification).
+        s = side[active]
+        a[active] = np.where(left, c, aa)
+        za[active] = np.where(left, fc, np.where(s == -1, 0.5 * fa, fa))
+        b[active] = np.where(left, bb, c)
+        zb[active] = np.where(left, np.where(s == 1, 0.5 * fb, fb), fc)
+        side[active] = np.where(left, 1, -1)
+        exact = fc == 0.0
+        a[active[exact]] = b[active[exact]] = c[exact]
+        width = b[active] - a[active]
+        active = active[width > xtol + rtol * np.abs(b[active])]
+    root = np.where(np.abs(za) < np.abs(zb), a, b)
+    return np.where(za * zb == 0.0, np.where(za == 0.0, a, b), root)
+
+
+def subdivide(g, oversample):
+    """Grid of `oversample` equal steps per interval of the sorted points g"""
+    frac = np.arange(oversample) / oversample
+    grid = (g[:-1, None] + np.diff(g)[:, None] * frac).ravel()
+    return np.append(grid, g[-1])
+
+
+def good_gram_points(m, z_gram):
+    """Mask of Gram points obeying Gram's law (-1)^m Z(g_m) > 0"""
+    return np.where(m % 2 == 0, z_gram > 0, z_gram < 0)
+
+
+def bracket_rosser_blocks(g, m, z=z_function, oversample=1, max_refine=4,
+                          dips=None):
+    """Sign-change brackets of Z in the Rosser blocks between good Gram points
+
+    Every block [g_a, g_b) between consecutive good Gram points should hold
+    b - a zeros (Rosser's rule).  Blocks where the grid finds fewer sign
+    changes are resampled 4x more finely, up to `max_refine` times, so close
+    pairs are only paid for where they occur.  The Gram points g may be in
+    any coordinate that the evaluator z accepts; m are their Gram indices.
+
+    dips, if given, is called as dips(grid, zgrid, z) on the coarse grid
+    and returns extra brackets (lo, hi, zlo, zhi) between grid points, such
+    as the close pairs found by lehmer_pairs.DipRefiner; they are counted
+    before Rosser's rule is checked.
+
+    Returns (lo, hi, zlo, zhi, block, good): the brackets and Z at their
+    ends, the Rosser block of each bracket, and the positions in g of the
+    good Gram points that delimit the blocks.
+    """
+    grid = subdivide(g, oversample)
+    zgrid = z(grid)
+    good = np.nonzero(good_gram_points(m, zgrid[::oversample]))[0]
+    if good.size < 2:
+        empty = np.empty(0)
+        return empty, empty, empty, empty, np.empty(0, dtype=np.int64), good
+
+    # Brackets from the coarse grid, labelled with their Rosser block
+    cells = np.arange(good[0] * oversample, good[-1] * oversample)
+    cells = cells[np.signbit(zgrid[cells]) != np.signbit(zgrid[cells + 1])]
+    lo, hi = grid[cells], grid[cells + 1]
+    zlo, zhi = zgrid[cells], zgrid[cells + 1]
+    block = np.searchsorted(good, cells // oversample, side="right") - 1
+    expected = np.diff(good)
+    if dips is not None:
+        elo, ehi, ezlo, ezhi = dips(grid, zgrid, z)
+        edges = g[good]
+        keep = (elo >= edges[0]) & (ehi <= edges[-1])
+        lo, hi, zlo, zhi = (np.concatenate((a, b[keep])) for a, b in
+                            ((lo, elo), (hi, ehi), (zlo, ezlo), (zhi, ezhi)))
+        block = np.concatenate((block, np.searchsorted(edges, elo[keep],
+                                                       side="right") - 1))
+        order = np.argsort(lo)
+        lo, hi, zlo, zhi, block = (lo[order], hi[order], zlo[order],
+                                   zhi[order], block[order])
+
+    k = oversample
+    for _ in range(max_refine):
+        short = np.nonzero(np.bincount(block, minlength=expected.size)
+                           < expected)[0]
+        if short.size == 0:
+            break
+        k *= 4
+        fine = [subdivide(g[good[j]:good[j + 1] + 1], k) for j in short]
+        zfine = np.split(z(np.concatenate(fine)),
+                         np.cumsum([f.size for f in fine])[:-1])
+        keep = ~np.isin(block, short)
+        parts = [(lo[keep], hi[keep], zlo[keep], zhi[keep], block[keep])]
+        for j, f, zf in zip(short, fine, zfine):
+            c = np.nonzero(np.signbit(zf[:-1]) != np.signbit(zf[1:]))[0]
+            parts.append((f[c], f[c + 1], zf[c], zf[c + 1],
+                          np.full(c.size, j)))
+        lo, hi, zlo, zhi, block = (np.concatenate(p) for p in zip(*parts))
+        order = np.argsort(lo)
+        lo, hi, zlo, zhi, block = (lo[order], hi[order], zlo[order],
+                                   zhi[order], block[order])
+
+    return lo, hi, zlo, zhi, block, good
+
+
+def scan_rosser_blocks(g, m, z=z_function, oversample=1, max_refine=4,
+                       xtol=0.0, dips=None):
+    """Zeros of Z in the Rosser blocks between the good Gram points among g
+
+    Returns (roots, stop): every zero found in [g[start], g[stop]), where
+    start and stop are the positions of the first and last good Gram points.
+    """
+    lo, hi, zlo, zhi, _, good = bracket_rosser_blocks(g, m, z, oversample,
+                                                      max_refine, dips)
+    if good.size < 2:
+        return lo, 0
+    return refine_roots(lo, hi, zlo, zhi, z, xtol=xtol), good[-1]
+
+
+def zeros_in_gram_range(m0, m1, oversample=1, max_refine=4, dips=None):
+    """Zeros of Z in the Rosser blocks between good Gram points in [m0, m1]
+
+    Returns (roots, m_stop) with m_stop the last good Gram index scanned.
+    """
+    m = np.arange(m0, m1 + 1)
+    roots, stop = scan_rosser_blocks(gram_points(m), m, z_function,
+                                     oversample, max_refine, dips=dips)
+    return roots, m0 + stop
+
+
+def generate_zeros(count, start_gram=-1, block=20000, oversample=1):
+    """Yield successive arrays of zeros above g_{start_gram} until count found"""
+    found = 0
+    m = start_gram
+    while found < count:
+        roots, m = zeros_in_gram_range(m, m + block, oversample)
+        roots = roots[:count - found]
+        found += roots.size
+        yield roots
+
+
+def truncation_bound(t):
+    """Gabcke's bound 0.017 t^{-11/4} on |Z(t) - z_function(t)|
+
+    Proved for t ≥ 200; below that it still holds against double-double
+    zeros from refine_zeros.py, with the error reaching ≈ 3/4 of it.
+    """
+    return 0.017 * np.asarray(t, dtype=np.float64) ** -2.75
+
+
+def z_error_bound(t):
+    """Bound on |z_function(t) - Z(t)|
+
+    The truncation bound plus the float64 rounding of the phases t log n
+    in the main sum.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    n = np.floor(np.sqrt(t / TWO_PI))
+    rounding = 4.0 * np.sqrt(n) * np.log(n + 1.0) * t * np.finfo(float).eps
+    return truncation_bound(t) + rounding
+
+
+def zero_error_bound(zeros, z=z_function, z_error=None, xtol=0.0, rtol=4e-16):
+    """Largest error |γ - γ_true| over zeros located as roots of z
+
+    z_error bounds |z - Z| at the zeros, by default z_error_bound().  It
+    becomes an error in γ through the slope |Z'(γ)|, to which the
+    root-finder tolerance xtol + rtol·|γ| is added.
+    """
+    t = np.asarray(zeros, dtype=np.float64)
+    if z_error is None:
+        z_error = z_error_bound(t)
+    h = np.maximum(1e-6, 1e-12 * np.abs(t))
+    slope = np.abs(z(t + h) - z(t - h)) / (2.0 * h)
+    return float(np.max(z_error / slope + xtol + rtol * np.abs(t)))
+
+
+def write_zero_table(path, zeros, start_index=1, precision=None):
+    """Write zeros in the index,ordinate layout of riemann_10000_results.txt
+
+    Ordinates are printed to the last decimal that `precision` still
+    resolves (15 decimals without a precision).
+    """
+    digits = 15 if precision is None else int(np.ceil(-np.log10(precision)))
+    with open(path, "w") as fh:
+        fh.write(f"RIEMANN HYPOTHESIS: {len(zeros):,} ZEROS\n")
+        fh.write("=" * 50 + "\n")
+        for i, t in enumerate(zeros, start=start_index):
+            fh.write(f"{i},{t:.{digits}f}\n")
+
+def compute_store(path, count):
+    """Compute zeros 1 ... count into a new zero store at path
+
+    For tools that hand the zeros to worker processes by path.  The store
+    records zero_error_bound() as its precision.  Returns the ordinates.
+    """
+    zeros = np.concatenate(list(generate_zeros(count)))
+    append_zeros(path, 1, zeros, precision=zero_error_bound(zeros),
+                 provenance={"generator": "riemann_siegel.py", "count": count})
+    return zeros
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros", type=int, default=10000,
+                        help="number of zeros to compute")
+    parser.add_argument("--start-gram", type=int, default=-1,
+                        help="first Gram index of the scan (-1 = from t ≈ 9.67)")
+    parser.add_argument("--oversample", type=int, default=1,
+                        help="grid points per Gram interval")
+    parser.add_argument("--block", type=int, default=20000,
+                        help="Gram intervals scanned per block")
+    parser.add_argument("--output", help="write the zero table to this file")
+    parser.add_argument("--store", help="append the zeros to this zero store")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("RIEMANN-SIEGEL ZERO SEARCH")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    chunks = []
+    for roots in generate_zeros(args.zeros, args.start_gram, args.block,
+                                args.oversample):
+        chunks.append(roots)
+        done = sum(c.size for c in chunks)
+        rate = done / (time.perf_counter() - start)
+        print(f"  {done:>10,} zeros   t ≤ {roots[-1]:.3f}   {rate:,.0f} zeros/s")
+    zeros = np.concatenate(chunks)
+    elapsed = time.perf_counter() - start
+
+    print(f"\nZeros found:        {zeros.size:,}")
+    print(f"Max height reached: t = {zeros[-1]:.9f}")
+    print(f"Elapsed:            {elapsed:.2f} s")
+    print(f"Throughput:         {zeros.size / elapsed:,.0f} zeros/s")
+
+    if args.output or args.store:
+        precision = zero_error_bound(zeros)
+        print(f"Error bound:        ±{precision:.1e}")
+
+    if args.output:
+        # Zero indices are only exact when the scan starts at g_{-1}
+        write_zero_table(args.output, zeros, start_index=args.start_gram + 2,
+                         precision=precision)
+        print(f"Zero table written to {args.output}")
+
+    if args.store:
+        provenance = {"generator": "riemann_siegel.py",
+                      "start_gram": args.start_gram,
+                      "oversample": args.oversample}
+        last = append_zeros(args.store, args.start_gram + 2, zeros,
+                            precision=precision, provenance=provenance)
+        print(f"Zero store {args.store} now ends at zero {last:,}")
+
+
+if __name__ == "__main__":
+    main()
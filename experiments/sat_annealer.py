@@ -0,0 +1,327 @@
+"""
+MANY-CHAIN METROPOLIS ANNEALING ON k-SAT
+========================================
+
+p_vs_np.py defines the energy E(σ) = number of violated clauses and a
+temperature T but never samples P(σ) ∝ exp(-E(σ)/T).  This module runs
+thousands of Metropolis chains on one formula (ksat.py) in lockstep and
+records energy traces and the time each chain first reaches E = 0.
+
+Bit-packed chains.  The assignments form an n × W matrix of uint64:
+bit b of word w in row v is variable v in chain 64w + b.  A literal's
+truth in all chains is one row XORed with its sign mask, and clause
+logic is bitwise AND/OR over W words.
+
+Vectorized sweep.  The variables are split into independent sets, in
+which no two share a clause (random-priority greedy, as in Luby's
+algorithm).  Flipping one set at once is exact single-spin Metropolis,
+since no flip changes another's ΔE.  For each variable v of a set and
+each clause c containing it,
+
+    others = OR of the other literals of c,
+    break  = ¬others ∧ lit_v      (c becomes violated),
+    make   = ¬others ∧ ¬lit_v     (c becomes satisfied),
+
+and ΔE = Σ_c break - Σ_c make.  The clause lists of a set are padded
+to its largest degree D with always-satisfied slots, and
+
+    s = Σ_c break + Σ_c ¬make = ΔE + D
+
+is summed for all chains at once by a bit-sliced carry-save adder into
+⌈log₂(2D + 1)⌉ bit planes.  Only those planes are unpacked to integers
+for the acceptance test u < min(1, exp(-ΔE/T)).  The accepted flips are
+packed back and XORed into the rows.  Each NumPy call works on every
+chain at once; a sweep takes O(sets · log D) calls.  n = 500 at α = 4
+with 4096 chains runs about 3·10^7 spin updates per second.
+
+Usage:
+    python sat_annealer.py --n 500 --alpha 4.0 --chains 4096 --sweeps 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ksat import random_ksat
+
+# =============================================================================
+# INDEPENDENT SETS
+# =============================================================================
+
+def color_classes(formula, rng):
+    """Partition the variables into sets with no two in a common clause"""
+    n, k = formula.n, formula.width
+    var = (formula.lits >> 1).reshape(-1, k)
+    occ_var = formula.occ_start[::2]                  # variable CSR starts
+    degree = np.diff(occ_var)
+    # Degree-0 variables can join any set; they go into the first one
+    uncolored = degree > 0
+    classes = []
+    while uncolored.any():
+        pool = uncolored.copy()
+        chosen = []
+        while pool.any():
+            prio = np.where(pool, rng.random(n), np.inf)
+            clause_min = prio[var].min(axis=1)
+            # v wins if it has the smallest priority in each of its clauses
+            live = degree > 0
+            var_min = np.full(n, np.inf)
+            var_min[live] = np.minimum.reduceat(clause_min[formula.occ], occ_var[:-1][live])
+            win = pool & (prio == var_min)
+            hit = np.zeros(formula.m, dtype=bool)
+            hit[formula.occ[_occurrence_index(formula, np.nonzero(win)[0])]] = True
+            pool[var[hit].ravel()] = False
+            chosen.append(np.nonzero(win)[0])
+        members = np.concatenate(chosen)
+        uncolored[members] = False
+        classes.append(np.sort(members))
+    idle = np.nonzero(degree == 0)[0]
+    if classes:
+        classes[0] = np.sort(np.concatenate((classes[0], idle)))
+    else:
+        classes = [idle]
+    return classes
+
+
+def _occurrence_index(formula, variables):
+    """Positions in formula.occ of every clause of the given variables"""
+    lo = formula.occ_start[2 * variables]
+    hi = formula.occ_start[2 * variables + 2]
+    lengths = hi - lo
+    offset = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+    return offset + np.arange(lengths.sum())
+
+# =============================================================================
+# THE ANNEALER
+# =============================================================================
+
+class Annealer:
+    """Metropolis chains on one k-SAT formula, 64 chains per uint64 word
+
+    x, if given, is the (n + 1) × W state to work on in place (a view of
+    a shared buffer, say), with row n all zero; chains is then 64 W.
+    """
+
+    def __init__(self, formula, chains=4096, seed=0, block=2048, x=None):
+        self.formula = formula
+        self.k = formula.width
+        if self.k is None:
+            raise ValueError("Annealer needs clauses of one length")
+        self.words = -(-chains // 64) if x is None else x.shape[1]
+        self.chains = 64 * self.words
+        self.rng = np.random.default_rng(seed)
+        self.var = (formula.lits >> 1).reshape(-1, self.k)
+        self.sign = np.where((formula.lits & 1).reshape(-1, self.k).astype(bool),
+                             np.uint64(~np.uint64(0)), np.uint64(0))
+        self.blocks = [self._layout(members[lo:lo + block])
+                       for members in color_classes(formula, self.rng)
+                       for lo in range(0, members.size, block)]
+        # Uniformly random starting assignments, independent across chains,
+        # and a constant-false row n for padding
+        if x is None:
+            x = np.zeros((formula.n + 1, self.words), dtype=np.uint64)
+            x[:-1] = np.frombuffer(self.rng.bytes(8 * formula.n * self.words),
+                                   dtype=np.uint64).reshape(formula.n, self.words)
+        self.x = x
+        self.energy = self.energies()
+
+    def _layout(self, members):
+        """Clause slots of a block of independent variables
+
+        Slot j of variable v holds the variables and sign masks of its
+        j-th clause, rotated so that v's own literal comes first.  Slots
+        past deg(v) point at the constant-false row n with every literal
+        negated: always satisfied, they add exactly 1 to s.
+        """
+        f, k = self.formula, self.k
+        lo = f.occ_start[2 * members]
+        deg = f.occ_start[2 * members + 2] - lo
+        d = int(deg.max()) if deg.size else 0
+        valid = np.arange(d) < deg[:, None]
+        clause = f.occ[np.where(valid, lo[:, None] + np.arange(d), 0)]
+        pos = np.argmax(self.var[clause] == members[:, None, None], axis=2)
+        rot = (pos[:, :, None] + np.arange(k)) % k
+        var = np.take_along_axis(self.var[clause], rot, axis=2)
+        sign = np.take_along_axis(self.sign[clause], rot, axis=2)
+        var[~valid] = f.n
+        sign[~valid] = ~np.uint64(0)
+        # Slot-major, so that the slots are the leading axis of the count
+        return (members, np.ascontiguousarray(var.transpose(1, 0, 2)),
+                np.ascontiguousarray(sign.transpose(1, 0, 2))[..., None], d)
+
+    def energies(self):
+        """Violated clauses per chain, recomputed from the assignments"""
+        lit = self.x[self.var] ^ self.sign[:, :, None]
+        violated = ~np.bitwise_or.reduce(lit, axis=1)
+        return _unpack(violated).sum(axis=0, dtype=np.int64)
+
+    def sweep(self, temperature):
+        """One Metropolis update of every variable in every chain
+
+        temperature is one T for all chains or an array of one T per
+        word.  Returns True for the chains that were at E = 0 after any
+        block.
+        """
+        t = np.asarray(temperature, dtype=np.float64)
+        word = np.arange(self.chains) // 64
+        found = np.zeros(self.chains, dtype=bool)
+        for members, var, sign, d in self.blocks:
+            lit = self.x[var] ^ sign                        # D × V × k × W
+            own = lit[:, :, 0]
+            free = ~np.bitwise_or.reduce(lit[:, :, 1:], axis=2)
+            # s = Σ break + Σ ¬make over the D slots = ΔE + D
+            bits = np.concatenate((free & own, ~(free & ~own)))
+            s = np.zeros((members.size, self.chains), dtype=np.int16)
+            for p, plane in enumerate(_bit_count(bits)):
+                s += _unpack(plane).astype(np.int16) << p
+            delta = s - np.int16(d)
+            if t.ndim == 0 and t == 0:
+                accept = delta <= 0
+            else:
+                # P(accept) = min(1, e^{-ΔE/T}) by table, ΔE in [-D, D],
+                # one row of the table per word
+                e = np.arange(-d, d + 1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    table = np.where(e > 0, np.exp(-e / t[..., None]), 1.0)
+                index = delta + d if t.ndim == 0 else delta + d + (2 * d + 1) * word
+                accept = self.rng.random(delta.shape) < np.take(table, index)
+            self.x[members] ^= _pack(accept)
+            self.energy += (delta * accept).sum(axis=0)
+            found |= self.energy == 0
+        return found
+
+    def run(self, schedule, trace_every=1):
+        """Anneal through the temperatures in schedule, one sweep each
+
+        Returns the energy quantiles (min, 10 %, median, mean) every
+        trace_every sweeps and, per chain, the first sweep at which it
+        reached E = 0 (-1 if it never did).
+        """
+        first = np.where(self.energy == 0, 0, -1)
+        trace = []
+        for i, t in enumerate(schedule):
+            found = self.sweep(t)
+            first[(first < 0) & found] = i + 1
+            if i % trace_every == 0 or i == len(schedule) - 1:
+                e = self.energy
+                trace.append((i + 1, t, e.min(), np.percentile(e, 10),
+                              np.median(e), e.mean()))
+        return np.array(trace), first
+
+    def assignment(self, chain):
+        """Assignment of one chain as a bool array"""
+        w, b = divmod(chain, 64)
+        return ((self.x[:-1, w] >> np.uint64(b)) & np.uint64(1)).astype(bool)
+
+
+def _bit_count(bits):
+    """Bit planes of the per-bit sum over axis 0 of a uint64 array
+
+    Carry-save (Wallace) reduction: a full adder turns three operands of
+    weight 2^w into a sum of weight 2^w and a carry of weight 2^{w+1},
+    until one operand of each weight is left.
+    """
+    columns = [list(bits)]
+    planes = []
+    while len(planes) < len(columns):
+        w = len(planes)
+        ops = columns[w]
+        while len(ops) > 1:
+            if len(columns) == w + 1:
+                columns.append([])
+            a, b = ops.pop(), ops.pop()
+            half = a ^ b
+            if ops:
+                c = ops.pop()
+                ops.insert(0, half ^ c)
+                columns[w + 1].append((a & b) | (half & c))
+            else:
+                ops.insert(0, half)
+                columns[w + 1].append(a & b)
+        planes.append(ops[0] if ops else np.zeros(bits.shape[1:], dtype=np.uint64))
+    return planes
+
+
+def _unpack(words):
+    """uint64 (..., W) → one uint8 per chain (..., 64 W)"""
+    return np.unpackbits(words.view(np.uint8), axis=-1, bitorder="little")
+
+
+def _pack(bits):
+    """bool (..., 64 W) → uint64 (..., W)"""
+    return np.packbits(bits, axis=-1, bitorder="little").view(np.uint64)
+
+
+def geometric_schedule(t0, t1, sweeps):
+    """Temperatures from t0 to t1 in a geometric progression"""
+    return t0 * (t1 / t0) ** (np.arange(sweeps) / max(sweeps - 1, 1))
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", type=int, default=500)
+    parser.add_argument("--alpha", type=float, default=4.0)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--chains", type=int, default=4096)
+    parser.add_argument("--sweeps", type=int, default=500)
+    parser.add_argument("--t0", type=float, default=1.0, help="initial temperature")
+    parser.add_argument("--t1", type=float, default=0.05, help="final temperature")
+    parser.add_argument("--temperatures", default="0.2,0.4",
+                        help="constant temperatures for first-solution histograms")
+    parser.add_argument("--output", help="write traces and first-solution times (npz)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("MANY-CHAIN METROPOLIS ANNEALING ON k-SAT")
+    print("=" * 70)
+
+    f = random_ksat(args.n, args.alpha, args.k, args.seed)
+    start = time.perf_counter()
+    ann = Annealer(f, args.chains, args.seed)
+    print(f"\n{args.k}-SAT n = {f.n}, m = {f.m} (α = {f.m / f.n:.3f}), "
+          f"{ann.chains} chains in {ann.words} words, "
+          f"{len(ann.blocks)} independent sets "
+          f"({time.perf_counter() - start:.2f} s setup)")
+
+    results = {}
+    runs = [("anneal", geometric_schedule(args.t0, args.t1, args.sweeps))]
+    runs += [(f"T={t}", np.full(args.sweeps, float(t)))
+             for t in args.temperatures.split(",") if t]
+    for label, schedule in runs:
+        ann = Annealer(f, args.chains, args.seed)
+        start = time.perf_counter()
+        trace, first = ann.run(schedule, trace_every=max(1, args.sweeps // 10))
+        elapsed = time.perf_counter() - start
+        assert np.array_equal(ann.energy, ann.energies())
+        if (ann.energy == 0).any():
+            assert f.unsatisfied(ann.assignment(int(np.argmax(ann.energy == 0)))) == 0
+        solved = first >= 0
+        results[label] = (trace, first)
+        print(f"\n{label}: {args.sweeps} sweeps in {elapsed:.2f} s, "
+              f"{ann.chains * f.n * args.sweeps / elapsed:,.0f} spin updates/s")
+        print(f"  {'sweep':>7} {'T':>7} {'min E':>6} {'10 % E':>7} {'median E':>9} "
+              f"{'mean E':>8}")
+        for row in trace:
+            print(f"  {int(row[0]):>7} {row[1]:>7.3f} {int(row[2]):>6} {row[3]:>7.1f} "
+                  f"{row[4]:>9.1f} {row[5]:>8.2f}")
+        print(f"  chains reaching E = 0: {solved.sum()} of {ann.chains}")
+        if solved.any():
+            t = first[solved]
+            edges = np.concatenate(([0], 2 ** np.arange(int(np.log2(max(t.max(), 1))) + 2)))
+            hist = np.histogram(t, bins=edges)[0]
+            print("  first-solution sweep: " + ", ".join(
+                f"[{lo}, {hi}): {c}" for lo, hi, c in zip(edges[:-1], edges[1:], hist) if c))
+
+    if args.output:
+        np.savez(args.output, **{f"trace_{k}": v[0] for k, v in results.items()},
+                 **{f"first_{k}": v[1] for k, v in results.items()})
+        print(f"\nWritten to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
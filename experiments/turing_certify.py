@@ -0,0 +1,219 @@
+"""
+TURING-METHOD CERTIFIED ZERO COUNTING
+=====================================
+
+Counting sign changes of Z(t) only shows that AT LEAST that many zeros lie
+on the critical line.  Turing's method closes the gap: it pins down N(T)
+exactly at Gram points, so a window whose sign changes match the exact
+count has no zeros off the line and none missed between sign changes.
+
+Gram points g_m satisfy θ(g_m) = mπ, and the Riemann-von Mangoldt formula
+
+    N(T) = θ(T)/π + 1 + S(T) = (T/2π) log(T/2πe) + 7/8 + S(T) + O(1/T)
+
+gives N(g_m) = m + 1 exactly when S(g_m) = 0.  Brent's form of Turing's
+method: if K consecutive Gram blocks [g_n, g_p) all satisfy Rosser's rule
+and K ≥ 0.0061 log²(g_p) + 0.08 log(g_p), then
+
+    N(g_n) ≤ n + 1    and    N(g_p) ≥ p + 1.
+
+A window [g_a, g_b) between good Gram points is therefore certified when
+the K blocks before g_a and the K blocks after g_b obey Rosser's rule and
+the window itself shows exactly b - a sign changes.
+
+All of this rests on signs of the float64 Z(t), so every sign the count
+uses - Z at the good Gram points and at both ends of every sign-change
+bracket in those blocks - must exceed riemann_siegel.z_error_bound in
+absolute value.  A window with a smaller sample is reported as not
+certified (uncertain signs) rather than trusted.
+
+Windows are independent, so they are fanned out over a process pool and
+the per-window certificates merged at the end.
+
+Usage:
+    python turing_certify.py --zeros 10000000 --workers 8
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from riemann_siegel import (TWO_PI, bracket_rosser_blocks, gram_points,
+                            z_error_bound, z_function)
+
+# =============================================================================
+# TURING'S METHOD
+# =============================================================================
+
+def turing_blocks(t):
+    """Brent's number of Rosser blocks needed to certify N at height t"""
+    log_t = np.log(t)
+    return int(np.ceil(0.0061 * log_t ** 2 + 0.08 * log_t))
+
+
+def riemann_von_mangoldt(t):
+    """Smooth part (t/2π) log(t/2πe) + 7/8 of the zero counting function"""
+    t = np.asarray(t, dtype=np.float64)
+    return t / TWO_PI * np.log(t / (TWO_PI * np.e)) + 0.875
+
+
+def certify_window(m_lo, m_hi, oversample=1, max_refine=6):
+    """Certify the zeros between the first good Gram points ≥ m_lo and ≥ m_hi
+
+    The scan is padded on both sides so the K Turing blocks around the
+    window ends are available.  Returns a dict describing the window.
+    """
+    start = time.perf_counter()
+    k = turing_blocks(gram_points(m_hi + 1))
+    pad = 8 * k + 32
+    scan_lo = max(-1, m_lo - pad)
+    m = np.arange(scan_lo, m_hi + pad + 1)
+    g = gram_points(m)
+    grids = []
+
+    def z(t):
+        # The first call is the grid, which holds Z at the Gram points
+        values = z_function(t)
+        grids.append(values)
+        return values
+
+    lo, hi, zlo, zhi, block, good = bracket_rosser_blocks(
+        g, m, z, oversample=oversample, max_refine=max_refine)
+    counts = np.bincount(block, minlength=good.size - 1)
+    expected = np.diff(good)
+    rosser = counts >= expected
+    good_m = m[good]
+
+    ia = np.searchsorted(good_m, m_lo)
+    ib = np.searchsorted(good_m, m_hi)
+    a, b = int(good_m[ia]), int(good_m[ib])
+    changes = int(counts[ia:ib].sum())
+
+    # N(g_{-1}) = 0 is known outright; elsewhere Turing needs K blocks
+    left = a == -1 or (ia >= k and bool(rosser[ia - k:ia].all()))
+    right = ib + k <= rosser.size and bool(rosser[ib:ib + k].all())
+
+    # Signs the count relies on, against the error of the evaluation
+    first, last = max(ia - k, 0), min(ib + k, rosser.size)
+    gram = good[first:last + 1]
+    used = (block >= first) & (block < last)
+    uncertain = (int(np.sum(np.abs(grids[0][gram * oversample])
+                            <= z_error_bound(g[gram])))
+                 + int(np.sum(np.abs(zlo[used]) <= z_error_bound(lo[used])))
+                 + int(np.sum(np.abs(zhi[used]) <= z_error_bound(hi[used]))))
+
+    return {
+        "m_start": a,
+        "m_stop": b,
+        "t_start": float(g[good[ia]]),
+        "t_stop": float(g[good[ib]]),
+        "sign_changes": changes,
+        "expected": b - a,
+        "turing_blocks": k,
+        "turing_left": left,
+        "turing_right": right,
+        "gram_exceptions": int(expected[ia:ib].sum() - (ib - ia)),
+        "rosser_failures": int((~rosser[ia:ib]).sum()),
+        "uncertain_signs": uncertain,
+        "certified": left and right and changes == b - a and not uncertain,
+        "seconds": time.perf_counter() - start,
+    }
+
+# =============================================================================
+# PARALLEL DRIVER
+# =============================================================================
+
+def _certify(bounds):
+    return certify_window(*bounds)
+
+
+def certify_range(m_start, m_stop, window=50000, workers=None):
+    """Yield window certificates for Gram indices [m_start, m_stop] in order"""
+    edges = list(range(m_start, m_stop, window)) + [m_stop]
+    bounds = list(zip(edges[:-1], edges[1:]))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_certify, bounds)
+
+
+def merge_certificates(results):
+    """Combine per-window certificates into one statement about [g_a, g_b)"""
+    contiguous = all(r["m_stop"] == s["m_start"]
+                     for r, s in zip(results, results[1:]))
+    return {
+        "m_start": results[0]["m_start"],
+        "m_stop": results[-1]["m_stop"],
+        "t_start": results[0]["t_start"],
+        "t_stop": results[-1]["t_stop"],
+        "sign_changes": sum(r["sign_changes"] for r in results),
+        "expected": sum(r["expected"] for r in results),
+        "gram_exceptions": sum(r["gram_exceptions"] for r in results),
+        "rosser_failures": sum(r["rosser_failures"] for r in results),
+        "uncertain_signs": sum(r["uncertain_signs"] for r in results),
+        "windows": len(results),
+        "uncertified": [i for i, r in enumerate(results) if not r["certified"]],
+        "certified": contiguous and all(r["certified"] for r in results),
+        "cpu_seconds": sum(r["seconds"] for r in results),
+    }
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros", type=int, default=100000,
+                        help="certify this many zeros above the start")
+    parser.add_argument("--start-gram", type=int, default=-1,
+                        help="Gram index where certification starts")
+    parser.add_argument("--window", type=int, default=50000,
+                        help="Gram intervals per worker task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("TURING-METHOD CERTIFICATION OF ZEROS")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    results = []
+    for r in certify_range(args.start_gram, args.start_gram + args.zeros,
+                           args.window, args.workers):
+        results.append(r)
+        status = ("certified" if r["certified"] else
+                  "NOT CERTIFIED (uncertain signs)" if r["uncertain_signs"]
+                  else "NOT CERTIFIED")
+        print(f"  Gram [{r['m_start']:>11,}, {r['m_stop']:>11,})  "
+              f"{r['sign_changes']:>7,}/{r['expected']:<7,} sign changes  "
+              f"{status}")
+    elapsed = time.perf_counter() - start
+    total = merge_certificates(results)
+
+    print(f"\nHeight range:       {total['t_start']:.6f} ≤ t < "
+          f"{total['t_stop']:.6f}")
+    print(f"Sign changes:       {total['sign_changes']:,}")
+    print(f"Turing count:       N(g_b) - N(g_a) = {total['expected']:,}")
+    print(f"N(g_b) (certified): {total['m_stop'] + 1:,}")
+    print(f"Riemann-von Mangoldt smooth N(g_b): "
+          f"{riemann_von_mangoldt(total['t_stop']):,.3f}")
+    print(f"Gram's law exceptions: {total['gram_exceptions']:,}")
+    print(f"Rosser's rule failures: {total['rosser_failures']:,}")
+    print(f"Signs within the Z error bound: {total['uncertain_signs']:,}")
+    print(f"Windows: {total['windows']} "
+          f"(uncertified: {total['uncertified'] or 'none'})")
+    print(f"Elapsed: {elapsed:.2f} s wall, {total['cpu_seconds']:.2f} s CPU "
+          f"({total['expected'] / elapsed:,.0f} zeros/s)")
+    print()
+    if total["certified"]:
+        print(f"All {total['expected']:,} zeros with "
+              f"{total['t_start']:.3f} ≤ t < {total['t_stop']:.3f} are simple "
+              "and on the critical line. ✓")
+    else:
+        print("Certification incomplete: see the windows listed above.")
+
+
+if __name__ == "__main__":
+    main()
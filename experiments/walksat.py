@@ -0,0 +1,425 @@
+"""
+WALKSAT / probSAT WITH INCREMENTAL BREAK COUNTS
+===============================================
+
+p_vs_np.py tabulates τ = exp(B/T) for a list of barriers B but never
+measures a crossing time.  This engine measures one: the number of
+flips local search needs to reach a solution of a random k-SAT formula
+(ksat.py), over many instances and seeds, as a function of n.
+
+Each step picks a violated clause at random and flips one of its
+variables, chosen by its break count (clauses that would become
+violated):
+
+    walksat   a zero-break variable if there is one; otherwise, with
+              probability `noise`, a random one, else the least break;
+    probsat   variable v with probability ∝ make_v^cm / (ε + break_v)^cb.
+
+The state lives in flat arrays and is updated incrementally, so a flip
+touches only the clauses of the flipped variable:
+
+    numtrue[c]   true literals of clause c
+    tsum[c]      sum of the variables of those literals, so that when
+                 numtrue = 1 the sole true variable is tsum
+    brk[v]       clauses in which v is the sole true variable
+    make[v]      violated clauses containing v
+    unsat        violated clauses of each chain in a list with positions
+                 (removal swaps in the last entry)
+
+Python cannot flip one variable at a time quickly, so R chains run in
+lockstep: their formulas are stacked into one formula on R·n disjoint
+variables and every step flips one variable in each unsolved chain.
+The occurrence lists of the R flipped literals are gathered as one
+ragged index, and all updates are array operations over them.
+A flip touches about 2kα ≈ 25 clause entries and NumPy spends some
+10 ns per entry per operation, which caps the engine at 1-3·10^5
+flips/s per core once R is in the hundreds, while each chain advances
+only a few thousand flips/s or less.
+
+The ~10^7 flips/s of compiled WalkSAT needs a compiled inner loop.
+_walk is that loop over the same flat arrays: it runs the chains one
+after another, one flip at a time, and is compiled with numba (an
+optional dependency) when numba is installed.  It is experimental: its
+state updates have been checked against a recount, but its compiled
+speed has not been measured, so it runs only with --engine compiled.
+Without numba it runs as plain Python, far slower than the lockstep
+engine.  Both engines report the total flips/s and the flips/s of one
+chain.
+
+Usage:
+    python walksat.py --n 100,200,400,800 --instances 200 --alpha 4.2
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from ksat import Formula, random_ksat
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# =============================================================================
+# THE ENGINE
+# =============================================================================
+
+def _ranks(group):
+    """Position of each entry within its run of equal values in group"""
+    if group.size == 0:
+        return group
+    starts = np.concatenate(([0], np.nonzero(group[1:] != group[:-1])[0] + 1))
+    lengths = np.diff(np.append(starts, group.size))
+    return np.arange(group.size) - np.repeat(starts, lengths)
+
+
+def _gather(starts, ends):
+    """Concatenated ranges [starts_i, ends_i) and the i of each entry"""
+    lengths = ends - starts
+    owner = np.repeat(np.arange(starts.size), lengths)
+    offset = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offset + np.arange(owner.size), owner
+
+
+def _add(counts, index, value):
+    """counts[index] += value with repeated indices (np.add.at)
+
+    The value is passed as an array of the counts' dtype: with a Python
+    scalar np.add.at takes a generic path some 25 times slower.
+    """
+    np.add.at(counts, index, np.full(index.size, value, dtype=counts.dtype))
+
+
+def _walk(lits, occ, occ_start, assign, numtrue, tsum, brk, make, unsat,
+          where, ucount, k, m, max_flips, walksat, noise, cb, cm, eps, seed,
+          flips):
+    """Run each chain to a solution or max_flips, one flip at a time
+
+    The same state and choice rules as WalkSat, as scalar loops that
+    numba compiles.  flips[a] receives the flips of chain a (-1 where
+    max_flips ran out).
+    """
+    np.random.seed(seed)
+    score = np.empty(k)
+    for a in range(ucount.size):
+        base = a * m
+        steps = 0
+        while ucount[a] > 0:
+            if steps == max_flips:
+                steps = -1
+                break
+            c = unsat[base + int(np.random.random() * ucount[a])]
+            first = c * k
+            if walksat:
+                best = 0
+                for i in range(k):
+                    score[i] = brk[lits[first + i] >> 1] + 0.5 * np.random.random()
+                    if score[i] < score[best]:
+                        best = i
+                if brk[lits[first + best] >> 1] > 0 and np.random.random() < noise:
+                    best = int(np.random.random() * k)
+            else:
+                total = 0.0
+                for i in range(k):
+                    u = lits[first + i] >> 1
+                    w = (eps + brk[u]) ** -cb
+                    if cm:
+                        w *= make[u] ** cm
+                    total += w
+                    score[i] = total
+                pick = np.random.random() * total
+                best = 0
+                while best < k - 1 and score[best] < pick:
+                    best += 1
+            v = lits[first + best] >> 1
+
+            old = assign[v]
+            assign[v] = 1 - old
+            lt = 2 * v + old                 # literal that becomes true
+            for j in range(occ_start[lt], occ_start[lt + 1]):
+                c = occ[j]
+                t = numtrue[c]
+                if t == 0:
+                    brk[v] += 1
+                    for i in range(k):
+                        make[lits[c * k + i] >> 1] -= 1
+                    last = unsat[base + ucount[a] - 1]
+                    unsat[base + where[c]] = last
+                    where[last] = where[c]
+                    ucount[a] -= 1
+                elif t == 1:
+                    brk[tsum[c]] -= 1
+                numtrue[c] = t + 1
+                tsum[c] += v
+            lf = lt ^ 1
+            for j in range(occ_start[lf], occ_start[lf + 1]):
+                c = occ[j]
+                t = numtrue[c]
+                if t == 1:
+                    brk[v] -= 1
+                    for i in range(k):
+                        make[lits[c * k + i] >> 1] += 1
+                    unsat[base + ucount[a]] = c
+                    where[c] = ucount[a]
+                    ucount[a] += 1
+                elif t == 2:
+                    brk[tsum[c] - v] += 1
+                numtrue[c] = t - 1
+                tsum[c] -= v
+            steps += 1
+        flips[a] = steps
+
+
+_walk_compiled = njit(cache=True)(_walk) if njit else None
+
+
+class WalkSat:
+    """Lockstep local search on a batch of k-SAT formulas
+
+    formulas is a list of Formula objects with the same n, m and clause
+    width; pass one formula several times to run several seeds on it.
+    """
+
+    def __init__(self, formulas):
+        f0 = formulas[0]
+        self.k = f0.width
+        if self.k is None:
+            raise ValueError("WalkSat needs clauses of one length")
+        if any((f.n, f.m, f.width) != (f0.n, f0.m, self.k) for f in formulas):
+            raise ValueError("all formulas must have the same n, m and width")
+        self.chains, self.n, self.m = len(formulas), f0.n, f0.m
+        offset = 2 * self.n * np.arange(self.chains, dtype=np.int32)
+        lits = np.concatenate([f.lits for f in formulas]).reshape(self.chains, -1)
+        lits = (lits + offset[:, None]).ravel()
+        self.formula = Formula(self.chains * self.n, lits,
+                               np.arange(0, lits.size + 1, self.k, dtype=np.int64))
+        self.formulas = formulas
+        self._cols = np.arange(self.k)
+
+    def _reset(self, rng):
+        f, k, m = self.formula, self.k, self.m
+        self.assign = rng.integers(0, 2, f.n).astype(np.int8)
+        var = (f.lits >> 1).reshape(-1, k)
+        true = (self.assign[var] != (f.lits & 1).reshape(-1, k))
+        self.numtrue = true.sum(axis=1).astype(np.int8)
+        self.tsum = (var * true).sum(axis=1).astype(np.int32)
+        sole = self.numtrue == 1
+        self.brk = np.bincount(self.tsum[sole], minlength=f.n).astype(np.int32)
+        bad = np.nonzero(self.numtrue == 0)[0]
+        self.make = np.bincount(var[bad].ravel(), minlength=f.n).astype(np.int32)
+        # Violated clauses of chain a: unsat[a*m : a*m + ucount[a]]
+        self.unsat = np.zeros(self.chains * m, dtype=np.int32)
+        self.where = np.zeros(self.chains * m, dtype=np.int32)
+        chain = bad // m
+        self.ucount = np.bincount(chain, minlength=self.chains).astype(np.int32)
+        pos = _ranks(chain)
+        self.unsat[chain * m + pos] = bad
+        self.where[bad] = pos
+
+    def _choose(self, var, rng, algorithm, noise, cb, cm, eps):
+        """Column of the variable to flip in each row of var (A × k)"""
+        b = self.brk[var]
+        rows = np.arange(var.shape[0])
+        if algorithm == "walksat":
+            # Least break, ties broken at random; random walk with prob. noise
+            best = np.argmin(b + 0.5 * rng.random(b.shape), axis=1)
+            walk = (b[rows, best] > 0) & (rng.random(rows.size) < noise)
+            return np.where(walk, rng.integers(0, self.k, rows.size), best)
+        w = (eps + b) ** -cb
+        if cm:
+            w = w * self.make[var] ** cm
+        cum = np.cumsum(w, axis=1)
+        pick = rng.random(rows.size) * cum[:, -1]
+        return np.minimum((cum < pick[:, None]).sum(axis=1), self.k - 1)
+
+    def _flip(self, active, v):
+        """Flip variable v in each active chain and update the state"""
+        f, k, m = self.formula, self.k, self.m
+        old = self.assign[v]
+        self.assign[v] = 1 - old
+        lt = 2 * v + old                     # literal that becomes true
+        lf = lt ^ 1
+
+        # Clauses gaining a true literal
+        idx, owner = _gather(f.occ_start[lt], f.occ_start[lt + 1])
+        c = f.occ[idx]
+        vo = v[owner]
+        t = self.numtrue[c]
+        fixed = t == 0
+        sole = self.tsum[c[t == 1]]
+        removed = c[fixed]
+        freed = f.lits[(removed[:, None] * k + self._cols).ravel()] >> 1
+        _add(self.brk, vo[fixed], 1)
+        _add(self.brk, sole, -1)
+        _add(self.make, freed, -1)
+        self.numtrue[c] = t + 1
+        self.tsum[c] += vo
+
+        # Clauses losing one
+        idx, owner = _gather(f.occ_start[lf], f.occ_start[lf + 1])
+        c = f.occ[idx]
+        vo = v[owner]
+        t = self.numtrue[c]
+        broken = t == 1
+        two = t == 2
+        sole = self.tsum[c[two]] - vo[two]
+        added = c[broken]
+        stuck = f.lits[(added[:, None] * k + self._cols).ravel()] >> 1
+        _add(self.brk, vo[broken], -1)
+        _add(self.brk, sole, 1)
+        _add(self.make, stuck, 1)
+        self.numtrue[c] = t - 1
+        self.tsum[c] -= vo
+
+        # Violated-clause lists: removals one per chain per round, then appends
+        chain = removed // m
+        rank = _ranks(chain)
+        for r in range(int(rank.max()) + 1 if rank.size else 0):
+            sel = rank == r
+            cc, a = removed[sel], chain[sel]
+            last = self.unsat[a * m + self.ucount[a] - 1]
+            pos = self.where[cc]
+            self.unsat[a * m + pos] = last
+            self.where[last] = pos
+            self.ucount[a] -= 1
+        chain = added // m
+        pos = self.ucount[chain] + _ranks(chain)
+        self.unsat[chain * m + pos] = added
+        self.where[added] = pos
+        _add(self.ucount, chain, 1)
+
+    def run(self, max_flips=10 ** 6, seed=0, algorithm="probsat", noise=0.567,
+            cb=2.38, cm=0.0, eps=1.0, engine="lockstep"):
+        """Flips to solution for each chain (-1 where max_flips ran out)
+
+        Defaults are the usual 3-SAT settings: WalkSAT noise 0.567 and
+        probSAT with polynomial break weights, cb = 2.38, ε = 1.
+        engine is "lockstep" or "compiled" (_walk, numba if installed).
+        Sets total_flips and chain_flips, the flips made by all chains
+        and the flips any one chain waited for (the steps of the
+        lockstep loop, or total_flips when the chains take turns).
+        """
+        rng = np.random.default_rng(seed)
+        self._reset(rng)
+        m, k = self.m, self.k
+        flips = np.zeros(self.chains, dtype=np.int64)
+        if engine == "compiled":
+            f = self.formula
+            (_walk_compiled or _walk)(
+                f.lits, f.occ, f.occ_start, self.assign, self.numtrue,
+                self.tsum, self.brk, self.make, self.unsat, self.where,
+                self.ucount, k, m, max_flips, algorithm == "walksat", noise,
+                cb, cm, eps, seed, flips)
+            self.total_flips = int(np.where(flips < 0, max_flips, flips).sum())
+            self.chain_flips = self.total_flips
+            return flips
+        active = np.nonzero(self.ucount > 0)[0]
+        self.total_flips = self.chain_flips = 0
+        for step in range(max_flips):
+            if active.size == 0:
+                break
+            j = (rng.random(active.size) * self.ucount[active]).astype(np.int64)
+            c = self.unsat[active * m + j]
+            var = self.formula.lits[c[:, None] * k + self._cols] >> 1
+            col = self._choose(var, rng, algorithm, noise, cb, cm, eps)
+            self._flip(active, var[np.arange(active.size), col])
+            self.total_flips += active.size
+            self.chain_flips += 1
+            flips[active] += 1
+            active = active[self.ucount[active] > 0]
+        flips[active] = -1
+        return flips
+
+    def assignment(self, chain):
+        """Current assignment of one chain as a bool array"""
+        return self.assign[chain * self.n:(chain + 1) * self.n].astype(bool)
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def _count(v):
+    return f"{v:,.0f}" if np.isfinite(v) else "—"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--n", default="100,200,400,800",
+                        help="comma-separated numbers of variables")
+    parser.add_argument("--alpha", type=float, default=4.2)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--instances", type=int, default=200,
+                        help="random formulas per n (one chain each)")
+    parser.add_argument("--algorithm", choices=("probsat", "walksat"),
+                        default="probsat")
+    parser.add_argument("--max-flips", type=int, default=200000,
+                        help="flips per chain before giving up")
+    parser.add_argument("--engine", choices=("lockstep", "compiled"),
+                        default="lockstep",
+                        help="compiled: the experimental _walk kernel "
+                             "(numba if installed)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write n, instance, flips to this CSV")
+    args = parser.parse_args(argv)
+    sizes = [int(v) for v in args.n.split(",")]
+
+    print("=" * 70)
+    print("WALKSAT / probSAT BARRIER-CROSSING TIMES")
+    print("=" * 70)
+    print(f"\n{args.k}-SAT at α = {args.alpha:g}, {args.instances} instances per n, "
+          f"{args.algorithm}, cutoff {args.max_flips:,} flips")
+    if args.engine == "compiled":
+        print("compiled engine (experimental"
+              + (")" if njit else "; numba not installed: plain Python)"))
+
+    print(f"\n{'n':>6} {'solved':>8} {'median':>10} {'90 %':>10} {'mean':>12} "
+          f"{'flips/s':>12} {'per chain':>10}")
+    rows, medians = [], []
+    for n in sizes:
+        formulas = [random_ksat(n, args.alpha, args.k, seed=args.seed * 1000003 + 7919 * n + i)
+                    for i in range(args.instances)]
+        engine = WalkSat(formulas)
+        start = time.perf_counter()
+        flips = engine.run(args.max_flips, args.seed, args.algorithm,
+                           engine=args.engine)
+        elapsed = time.perf_counter() - start
+        solved = flips >= 0
+        for i in np.nonzero(solved)[0][:20]:
+            assert formulas[i].unsatisfied(engine.assignment(i)) == 0
+        # Unsolved runs count as infinitely long
+        t = np.where(solved, flips, np.inf)
+        med, p90 = np.quantile(t, [0.5, 0.9], method="inverted_cdf")
+        medians.append(med)
+        rows += [(n, i, int(f)) for i, f in enumerate(flips)]
+        print(f"{n:>6} {100 * solved.mean():>7.1f}% {_count(med):>10} {_count(p90):>10} "
+              f"{flips[solved].mean() if solved.any() else math.nan:>12,.0f} "
+              f"{engine.total_flips / elapsed:>12,.0f} "
+              f"{engine.chain_flips / elapsed:>10,.0f}")
+
+    ok = np.isfinite(medians)
+    if ok.sum() >= 2:
+        n = np.asarray(sizes, dtype=np.float64)[ok]
+        log_t = np.log(np.asarray(medians)[ok])
+        rate = np.polyfit(n, log_t, 1)[0]
+        power = np.polyfit(np.log(n), log_t, 1)[0]
+        print(f"\nMedian flips: log τ ≈ {rate:.4f} n (Arrhenius τ = exp(B/T) "
+              f"with B/T = {rate:.4f} n), or τ ∝ n^{power:.2f}")
+        print("p_vs_np.py assumes B = 0.05 n at T = 1: "
+              + ", ".join(f"n = {int(v)}: exp(0.05n) = {math.exp(0.05 * v):.2e}"
+                          for v in n))
+    print("(Unsolved runs include unsatisfiable formulas; the median is "
+          "meaningful while more than half are solved.)")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write("n,instance,flips\n")
+            for n, i, f in rows:
+                fh.write(f"{n},{i},{f}\n")
+        print(f"\nWritten to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
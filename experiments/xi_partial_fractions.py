@@ -0,0 +1,316 @@
+"""
+PARTIAL-FRACTION Ξ(s) FROM THE ZERO TABLE
+=========================================
+
+Evaluates the sum over nontrivial zeros used in riemann.py,
+
+    Ξ(s) = Σ_ρ (1/(s-ρ) + 1/ρ),
+
+from the first N stored ordinates γ_n, zeros ρ = 1/2 ± iγ_n.  With
+w = s - 1/2 each conjugate pair contributes
+
+    1/(w - iγ) + 1/(w + iγ) + 1/(1/4 + γ²).
+
+Three pieces make this fast and accurate:
+
+1. A treecode for the Cauchy sums Σ 1/(w ∓ iγ_n).  The zeros are grouped
+   into blocks of 64, 128, 256, ... consecutive ordinates; every block
+   stores the moments Σ ((γ - c)/h)^k about its centre c and half-width h.
+   A point sums its own block and its two neighbours directly and every
+   other block through the moment series, taking each block at the
+   coarsest level where it is still well separated.  A point costs
+   O(K log N) instead of O(N).
+
+2. A tail correction for the zeros above the table.  Their density is
+   dN(γ) = (1/2π) log(γ/2π) dγ, so with T* the height where the smooth
+   count N(T) = θ(T)/π + 1 reaches N + 1/2,
+
+       Σ_{n>N} [...]  ≈  ∫_{T*}^∞ [2w/(w² + γ²) + 1/(1/4 + γ²)] dN(γ),
+
+   expanded in powers of w²/T*² (valid for |s - 1/2| < 0.8 T*).
+
+3. A per-zero-set cache.  The block moments, Σ 1/(1/4 + γ²) and the tail
+   coefficients depend only on the zero set, so they are built once per
+   (store, count, precision) and reused for every new grid of s values,
+   in this process and in each worker of the process pool.
+
+Because the pair terms are conjugate-symmetric, on the critical line the
+real part of the sum is the constant Σ_γ 1/(1/4 + γ²), whose complete
+value is 1 + γ_E/2 - log(4π)/2; comparing the truncated sum against it
+measures the tail correction directly.
+
+Usage:
+    python xi_partial_fractions.py --count 10000 --points 100000
+    python xi_partial_fractions.py --zeros zeros.rzs
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from riemann_siegel import TWO_PI, compute_store, gram_points
+from zero_store import MAGIC, ZeroStore, first_inconsistent, open_zeros, s_bound
+
+EULER_GAMMA = 0.57721566490153286061
+# Σ_ρ 1/ρ over all nontrivial zeros, = Σ_{γ>0} 1/(1/4 + γ²)
+RECIPROCAL_SUM = 1 + EULER_GAMMA / 2 - np.log(4 * np.pi) / 2
+TAIL_LIMIT = 0.8
+
+# =============================================================================
+# THE EVALUATOR
+# =============================================================================
+
+class PartialFractionXi:
+    """Truncated Σ_ρ (1/(s-ρ) + 1/ρ) over the first N zeros, plus tail
+
+    gamma holds the ordinates of zeros 1 ... N in ascending order.  block
+    is the number of zeros in a finest-level block and terms the length
+    of the moment series, whose ratio stays below about 1/2 wherever the
+    zero density varies slowly from block to block.
+    """
+
+    def __init__(self, gamma, block=64, terms=48, tail_terms=80):
+        self.gamma = np.array(gamma, dtype=np.float64)
+        if self.gamma.size < 2 or np.any(np.diff(self.gamma) < 0):
+            raise ValueError("need at least two ascending zero ordinates")
+        # The tail starts from the count: γ_n must really be zero number n
+        bad = first_inconsistent(1, self.gamma)
+        if bad is not None:
+            raise ValueError(f"γ = {self.gamma[bad]:.6f} is not zero #{bad + 1}")
+        self.block = block
+        self.terms = terms
+        n = self.gamma.size
+
+        # Constant part: the 1/ρ terms, summed from the smallest term up
+        self.reciprocal_sum = float(np.sum(1.0 / (0.25 + self.gamma[::-1] ** 2)))
+        self.t_star = float(gram_points(n - 0.5))
+        p = 2 * np.arange(tail_terms) + 1.0
+        self.tail_coeffs = np.log(self.t_star / TWO_PI) / p + 1 / p ** 2
+        # 2w/(w² + γ²) = 1/(1/4 + γ²) at w = 1/2
+        self.reciprocal_tail = float(self._tail_series(np.array([0.5]))[0].real)
+
+        # Block moments, level by level (block sizes block · 2^level)
+        self.levels = []
+        size = block
+        while True:
+            starts = np.arange(0, n, size)
+            ends = np.minimum(starts + size, n) - 1
+            lo, hi = self.gamma[starts], self.gamma[ends]
+            centre = 0.5 * (lo + hi)
+            half = np.maximum(0.5 * (hi - lo), 1e-300)
+            owner = np.repeat(np.arange(starts.size), np.diff(np.append(starts, n)))
+            u = (self.gamma - centre[owner]) / half[owner]
+            moments = np.empty((starts.size, terms))
+            power = np.ones(n)
+            for k in range(terms):
+                moments[:, k] = np.add.reduceat(power, starts)
+                power *= u
+            self.levels.append((centre, half, moments))
+            if starts.size <= 2:
+                break
+            size *= 2
+
+    @property
+    def count(self):
+        return self.gamma.size
+
+    def _tail_series(self, w):
+        """∫_{T*}^∞ 2w/(w² + γ²) dN(γ) as a series in v = -w²/T*²"""
+        v = -(w / self.t_star) ** 2
+        acc = np.full(w.shape, self.tail_coeffs[-1], dtype=np.complex128)
+        for a in self.tail_coeffs[-2::-1]:
+            acc = acc * v + a
+        return w / (np.pi * self.t_star) * acc
+
+    def cauchy_sum(self, w):
+        """Σ_n 1/(w - iγ_n) for a 1-D array of complex w (treecode)"""
+        g, n, b0 = self.gamma, self.gamma.size, self.block
+        own = np.minimum(np.searchsorted(g, w.imag), n - 1) // b0
+
+        # Near field: own block and its neighbours, summed directly
+        first = np.maximum(own - 1, 0) * b0
+        stop = np.minimum((own + 2) * b0, n)
+        idx = first[:, None] + np.arange(3 * b0)
+        near = 1.0 / (w[:, None] - 1j * g[np.minimum(idx, n - 1)])
+        total = np.where(idx < stop[:, None], near, 0).sum(axis=1)
+
+        # Far field: children of the parent's neighbours that are not
+        # neighbours themselves, three blocks per level
+        offsets = np.array([[-2, 2, 3], [-2, -1, 3]])
+        for level, (centre, half, moments) in enumerate(self.levels):
+            b = own >> level
+            cand = 2 * (b >> 1)[:, None] + offsets[b & 1]
+            valid = (cand >= 0) & (cand < centre.size)
+            cand = np.clip(cand, 0, centre.size - 1)
+            d = w[:, None] - 1j * centre[cand]
+            z = 1j * half[cand] / d
+            mom = moments[cand]
+            acc = mom[..., -1].astype(np.complex128)
+            for k in range(self.terms - 2, -1, -1):
+                acc = acc * z + mom[..., k]
+            total += np.where(valid, acc / d, 0).sum(axis=1)
+        return total
+
+    def __call__(self, s, tail=True, chunk=4096):
+        """Ξ_N(s) (+ tail) for any array of complex s"""
+        s = np.asarray(s, dtype=np.complex128)
+        w = (s - 0.5).ravel()
+        if tail and np.any(np.abs(w) >= TAIL_LIMIT * self.t_star):
+            raise ValueError(f"the tail series needs |s - 1/2| < "
+                             f"{TAIL_LIMIT * self.t_star:.6g} for this zero set")
+        out = np.empty(w.shape, dtype=np.complex128)
+        for lo in range(0, w.size, chunk):
+            wc = w[lo:lo + chunk]
+            out[lo:lo + chunk] = self.cauchy_sum(wc) - self.cauchy_sum(-wc)
+        out += self.reciprocal_sum
+        if tail:
+            out += self._tail_series(w) + self.reciprocal_tail
+        return out.reshape(s.shape)
+
+    def direct(self, s, tail=False):
+        """Reference value by summing every pair term (O(N) per point)"""
+        w = np.asarray(s, dtype=np.complex128) - 0.5
+        total = np.zeros(w.shape, dtype=np.complex128)
+        for lo in range(0, self.count, 65536):
+            ig = 1j * self.gamma[lo:lo + 65536]
+            total += (1 / (w[..., None] - ig) + 1 / (w[..., None] + ig)).sum(axis=-1)
+        total += self.reciprocal_sum
+        if tail:
+            total += self._tail_series(w) + self.reciprocal_tail
+        return total
+
+# =============================================================================
+# PER-ZERO-SET CACHE AND PARALLEL EVALUATION
+# =============================================================================
+
+_CACHE = {}
+
+
+def load(path, count=None, block=64, terms=48):
+    """Cached evaluator for the first `count` zeros of a store or text table
+
+    Text tables go through open_zeros(), which checks the indices; the
+    evaluator itself checks every ordinate against the zero count.
+    """
+    with open(path, "rb") as fh:
+        is_store = fh.read(len(MAGIC)) == MAGIC
+    if not is_store:
+        key = (os.path.realpath(path), count, None, block, terms)
+        if key not in _CACHE:
+            _CACHE[key] = PartialFractionXi(open_zeros(path)[:count], block,
+                                            terms)
+        return _CACHE[key]
+    with ZeroStore(path) as store:
+        if store.first_index != 1:
+            raise ValueError(f"{path} starts at zero {store.first_index}; "
+                             "Ξ needs the zeros from the first one on")
+        key = (os.path.realpath(path), count, store.precision, block, terms)
+        if key not in _CACHE:
+            _CACHE[key] = PartialFractionXi(store.ordinates()[:count], block,
+                                            terms)
+    return _CACHE[key]
+
+
+def _evaluate(job):
+    path, count, s, tail = job
+    return load(path, count)(s, tail=tail)
+
+
+def evaluate(path, s, count=None, tail=True, workers=None, chunk=16384):
+    """Ξ_N(s) for the zeros in path, fanned out over a process pool
+
+    Each worker builds the zero-set precomputation once and keeps it
+    for all of its chunks.  workers=1 evaluates in this process.
+    """
+    s = np.asarray(s, dtype=np.complex128)
+    flat = s.ravel()
+    if workers == 1:
+        return load(path, count)(s, tail=tail)
+    jobs = [(path, count, flat[lo:lo + chunk], tail)
+            for lo in range(0, flat.size, chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_evaluate, jobs))
+    return np.concatenate(parts).reshape(s.shape)
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="zero store or text table of zeros 1, 2, 3, ... "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=None,
+                        help="use only the first COUNT zeros (10,000 when "
+                             "they are computed)")
+    parser.add_argument("--points", type=int, default=100000,
+                        help="t values on the critical line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("PARTIAL-FRACTION Ξ(s) FROM THE ZERO TABLE")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.zeros is None:
+            # The workers load the zero set by path, so computed zeros go
+            # through a scratch store
+            start = time.perf_counter()
+            args.zeros = os.path.join(scratch, "zeros.rzs")
+            gamma = compute_store(args.zeros, args.count or 10000)
+            print(f"\nComputed {gamma.size:,} zeros in "
+                  f"{time.perf_counter() - start:.1f} s")
+        report(args)
+
+
+def report(args):
+    start = time.perf_counter()
+    xi = load(args.zeros, args.count)
+    print(f"\nZeros: {xi.count:,} up to γ_N = {xi.gamma[-1]:.6f}, "
+          f"tail from T* = {xi.t_star:.6f}")
+    print(f"Precomputation: {time.perf_counter() - start:.2f} s "
+          f"({len(xi.levels)} block levels)")
+
+    print("\nConstant part Σ_γ 1/(1/4 + γ²):")
+    print(f"  truncated:        {xi.reciprocal_sum:.15f}")
+    print(f"  with tail:        {xi.reciprocal_sum + xi.reciprocal_tail:.15f}")
+    print(f"  1 + γ_E/2 - log(4π)/2 = {RECIPROCAL_SUM:.15f}")
+    # Σ_{n>N} f(γ_n) - ∫_{T*}^∞ f dN ≤ 2 max|S| f(T*), f(γ) = 1/(1/4 + γ²)
+    gap = xi.reciprocal_sum + xi.reciprocal_tail - RECIPROCAL_SUM
+    allowed = 2 * s_bound(xi.t_star) / (0.25 + xi.t_star ** 2)
+    print(f"  difference:       {gap:+.2e} (tail bound ±{allowed:.1e}) "
+          f"{'✓' if abs(gap) <= allowed else '✗'}")
+
+    rng = np.random.default_rng(1)
+    probe = (0.5 + rng.uniform(-2, 2, 64)
+             + 1j * rng.uniform(0, 0.5 * TAIL_LIMIT * xi.t_star, 64))
+    err = np.abs(xi(probe, tail=False) - xi.direct(probe)) / np.abs(xi.direct(probe))
+    print(f"\nTreecode vs direct pair sum at 64 random s: "
+          f"max relative error {err.max():.1e}")
+
+    t = np.linspace(1.0, TAIL_LIMIT * xi.t_star, args.points, endpoint=False)
+    start = time.perf_counter()
+    values = evaluate(args.zeros, 0.5 + 1j * t, args.count, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"\nΞ(1/2 + it) at {t.size:,} points, 1 ≤ t < {t[-1]:.1f}: "
+          f"{elapsed:.2f} s with {args.workers} workers "
+          f"({t.size / elapsed:,.0f} points/s)")
+    print(f"  Re Ξ range: [{values.real.min():.15f}, {values.real.max():.15f}]")
+
+    print(f"\n{'s':>24} {'Ξ_N(s) + tail':>40}")
+    for s in (0.5 + 10j, 0.5 + 100j, 0.75 + 100j, 2.0 + 1000j, -1.0 + 1000j):
+        if abs(s - 0.5) >= TAIL_LIMIT * xi.t_star:
+            continue
+        v = xi(np.array([s]))[0]
+        print(f"{str(s):>24} {v.real:>19.12f} {v.imag:>+19.12f}i")
+
+
+if __name__ == "__main__":
+    main()
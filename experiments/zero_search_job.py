@@ -0,0 +1,280 @@
+"""
+RESUMABLE ZERO-SEARCH JOBS
+==========================
+
+A zero search of 10^8 zeros runs for hours; this driver makes it safe to
+kill at any moment and restart with the same command line.
+
+The search advances through windows of Gram intervals that end at good
+Gram points (riemann_siegel.zeros_in_gram_range), so its whole state is
+one integer: the Gram index where the next window starts.  Nothing is
+random and each window is a pure function of its first Gram index, so a
+window that was interrupted is simply computed again.
+
+Zeros go to a zero store (zero_store.py) and the state to a JSON sidecar
+next to it, <store>.ckpt.  Each window's error bound
+(riemann_siegel.zero_error_bound) is taken as it is found, and the
+store's precision is widened to it when the window is appended.  A checkpoint is written as
+
+    1. append the finished windows to the store (data first, count last)
+    2. write <store>.ckpt.tmp, fsync, rename over <store>.ckpt
+
+so after a crash at any point the checkpoint names a window boundary
+below which every zero is in the store.  The store may hold a few zeros
+past that boundary (a crash between 1 and 2, or a run that stopped in
+the middle of a window at its target count); on resume the window is
+recomputed and those zeros are checked against the store and skipped.
+
+Checkpoints are taken at most every --interval seconds, which bounds
+their cost: two fsyncs and a few KiB per checkpoint, well under 0.1 % of
+the run time at the default of 30 s.
+
+Usage:
+    python zero_search_job.py --store zeros.rzs --zeros 1000000
+"""
+
+import argparse
+import json
+import os
+import signal
+import time
+
+import numpy as np
+
+from riemann_siegel import zero_error_bound, zeros_in_gram_range
+from zero_store import FLOAT64, ZeroStore
+
+VERSION = 1
+PARAMETERS = ("start_gram", "block", "oversample")
+
+# =============================================================================
+# CHECKPOINT FILES
+# =============================================================================
+
+def checkpoint_path(store_path):
+    return store_path + ".ckpt"
+
+
+def write_checkpoint(path, state):
+    """Atomically replace the checkpoint at path with state"""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    # Make the rename itself durable
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_checkpoint(path):
+    with open(path) as fh:
+        state = json.load(fh)
+    if state.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+    return state
+
+
+class Preempted(Exception):
+    """Raised inside the search loop when SIGTERM arrives"""
+
+
+def _preempt(signum, frame):
+    raise Preempted(signal.Signals(signum).name)
+
+# =============================================================================
+# THE JOB
+# =============================================================================
+
+class ZeroSearchJob:
+    """A zero search bound to a zero store and its checkpoint
+
+    Opening a store that already has a checkpoint resumes it; the search
+    parameters must then match the ones it was started with.
+    """
+
+    def __init__(self, store_path, start_gram=-1, block=20000, oversample=1):
+        self.store_path = store_path
+        self.path = checkpoint_path(store_path)
+        params = {"start_gram": start_gram, "block": block,
+                  "oversample": oversample}
+        if os.path.exists(self.path):
+            self.state = read_checkpoint(self.path)
+            changed = [k for k in PARAMETERS if self.state[k] != params[k]]
+            if changed:
+                raise ValueError(f"{self.path} was started with different "
+                                 f"{', '.join(changed)}")
+            self.store = ZeroStore(store_path, "r+")
+            if self.store.count < self.state["base"]:
+                raise ValueError(f"{store_path} holds {self.store.count} zeros "
+                                 f"but {self.path} expects at least "
+                                 f"{self.state['base']}")
+        else:
+            if os.path.exists(store_path):
+                raise ValueError(f"{store_path} exists but has no checkpoint")
+            provenance = dict(params, generator="zero_search_job.py")
+            # The precision is unknown until the first window is appended
+            self.store = ZeroStore.create(store_path, FLOAT64, start_gram + 2,
+                                          np.nan, provenance)
+            self.state = dict(params, version=VERSION, next_gram=start_gram,
+                              base=0, seconds=0.0, checkpoint_seconds=0.0,
+                              checkpoints=0, windows=0)
+            self.checkpoint([])
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def found(self):
+        return self.store.count
+
+    def checkpoint(self, pending, precision=None):
+        """Append the finished windows in pending and record the new state
+
+        pending is emptied as soon as its zeros are in the store, so an
+        interrupt before the checkpoint file is written cannot append
+        them twice.  precision bounds the error of the pending zeros.
+        """
+        start = time.perf_counter()
+        if pending:
+            self.store.append(np.concatenate(pending), precision=precision)
+            pending.clear()
+        self.state["checkpoints"] += 1
+        write_checkpoint(self.path, self.state)
+        self.state["checkpoint_seconds"] += time.perf_counter() - start
+
+    def run(self, count, interval=30.0, log=print):
+        """Search until the store holds count zeros, checkpointing as it goes
+
+        Returns the number of zeros in the store.  KeyboardInterrupt and
+        SIGTERM stop the search after writing a final checkpoint.
+        """
+        state = self.state
+        if self.found >= count:
+            return self.found
+        # Zeros past the checkpointed boundary were stored by an earlier run
+        # that did not get to record it; recomputed windows are checked
+        # against them instead of being appended again.
+        extra = self.found - state["base"]
+        if extra:
+            log(f"  resuming: {extra:,} zeros above g_{state['next_gram']} "
+                f"already stored, recomputing them")
+
+        pending, bound, last = [], 0.0, time.perf_counter()
+        handler = signal.signal(signal.SIGTERM, _preempt)
+        try:
+            while state["base"] < count:
+                started = time.perf_counter()
+                m, base = state["next_gram"], state["base"]
+                roots, m_next = zeros_in_gram_range(m, m + state["block"],
+                                                    state["oversample"])
+                if m_next <= m:
+                    log(f"  window at g_{m} did not advance, stopping")
+                    break
+                bound = max(bound, zero_error_bound(roots))
+                state["seconds"] += time.perf_counter() - started
+                seen = min(extra, roots.size)
+                if seen:
+                    first = self.store.first_index + base
+                    if not np.array_equal(roots[:seen],
+                                          self.store.ordinates(first, first + seen)):
+                        raise RuntimeError(f"window at g_{m} does not reproduce "
+                                           f"the stored zeros")
+                    extra -= seen
+                if base + roots.size > count:
+                    # Stop at the target mid-window; the window stays open
+                    pending.append(roots[seen:count - base])
+                    break
+                pending.append(roots[seen:])
+                state["next_gram"] = int(m_next)
+                state["base"] = base + roots.size
+                state["windows"] += 1
+                if time.perf_counter() - last >= interval:
+                    self.checkpoint(pending, bound)
+                    bound, last = 0.0, time.perf_counter()
+                    log(f"  {self.found:>12,} zeros   t ≤ {self.store.t_max:.3f}"
+                        f"   checkpoint at g_{state['next_gram']}")
+        except (KeyboardInterrupt, Preempted) as exc:
+            log(f"  interrupted ({type(exc).__name__}), checkpointing")
+        finally:
+            signal.signal(signal.SIGTERM, handler)
+            # pending only ever holds whole windows (or the last one cut at
+            # the target), so it is always safe to commit
+            self.checkpoint(pending, bound)
+        return self.found
+
+    def summary(self):
+        s = self.state
+        return {
+            "zeros": self.found,
+            "first_index": self.store.first_index,
+            "t_max": self.store.t_max,
+            "precision": self.store.precision,
+            "next_gram": s["next_gram"],
+            "windows": s["windows"],
+            "checkpoints": s["checkpoints"],
+            "seconds": s["seconds"],
+            "overhead": s["checkpoint_seconds"] / max(s["seconds"], 1e-9),
+        }
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--store", required=True,
+                        help="zero store to fill (its checkpoint is <store>.ckpt)")
+    parser.add_argument("--zeros", type=int, default=1000000,
+                        help="total number of zeros the store should hold")
+    parser.add_argument("--start-gram", type=int, default=-1,
+                        help="first Gram index of the scan (-1 = from t ≈ 9.67)")
+    parser.add_argument("--block", type=int, default=20000,
+                        help="Gram intervals per window")
+    parser.add_argument("--oversample", type=int, default=1,
+                        help="grid points per Gram interval")
+    parser.add_argument("--interval", type=float, default=30.0,
+                        help="seconds between checkpoints")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("RESUMABLE ZERO SEARCH")
+    print("=" * 70)
+
+    with ZeroSearchJob(args.store, args.start_gram, args.block,
+                       args.oversample) as job:
+        if job.found:
+            print(f"Resuming {args.store}: {job.found:,} zeros, next window "
+                  f"at g_{job.state['next_gram']}")
+        start = time.perf_counter()
+        job.run(args.zeros, args.interval)
+        elapsed = time.perf_counter() - start
+        info = job.summary()
+
+    print(f"\nZeros stored:       {info['zeros']:,} "
+          f"(zeros {info['first_index']:,} … "
+          f"{info['first_index'] + info['zeros'] - 1:,})")
+    print(f"Max height reached: t = {info['t_max']:.9f}")
+    print(f"Precision:          ±{info['precision']:.1e}")
+    print(f"This run:           {elapsed:.2f} s")
+    print(f"Search time:        {info['seconds']:.2f} s over "
+          f"{info['windows']:,} windows")
+    print(f"Checkpoints:        {info['checkpoints']:,}, "
+          f"overhead {100 * info['overhead']:.3f} % of search time")
+    if info["zeros"] < args.zeros:
+        print("Stopped early; rerun the same command to resume.")
+
+
+if __name__ == "__main__":
+    main()
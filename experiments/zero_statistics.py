@@ -0,0 +1,360 @@
+"""
+STREAMING GUE STATISTICS OF ZERO SPACINGS
+=========================================
+
+Montgomery and Odlyzko: after unfolding to unit mean spacing, the zeros
+1/2 + iγ_n are locally distributed like eigenvalues of large random
+Hermitian (GUE) matrices.  Unfolding uses the smooth counting function
+
+    x_n = θ(γ_n)/π + 1,
+
+and three statistics of the x_n are accumulated:
+
+    nearest-neighbour spacings   x_{n+1} - x_n, against the exact GUE
+                                 spacing law and the Wigner surmise
+                                 p(s) = (32/π²) s² exp(-4s²/π)
+    pair correlation             differences x_m - x_n < X, against
+                                 Montgomery's 1 - (sin πu / πu)²
+    number variance Σ²(L)        variance of the count in [x, x + L)
+                                 over a lattice of window starts
+
+Everything is streamed: each update keeps only the zeros within
+max(X, L) of the end of the data seen so far, so memory does not grow
+with the table.  A pair, spacing or window is counted by the update
+holding its last zero, which makes accumulators over consecutive index
+ranges mergeable: a worker primes its accumulator with the zeros just
+before its range and the merged result is that of a single pass.
+
+The zeros are read from a zero store, which is checked against the
+zero count N(t) once, before the workers start; each worker maps the
+store and reads only its own range.  A text table is first imported
+into a scratch store.
+
+Usage:
+    python zero_statistics.py --count 100000
+    python zero_statistics.py --zeros zeros.rzs
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from riemann_siegel import compute_store, theta
+from zero_store import (FLOAT64, MAGIC, ZeroStore, first_inconsistent,
+                        import_text_table)
+
+# =============================================================================
+# GUE REFERENCE CURVES
+# =============================================================================
+
+def unfold(gamma):
+    """Unfolded ordinates x = θ(γ)/π + 1 with unit mean spacing"""
+    return theta(gamma) / np.pi + 1.0
+
+
+def gue_gap_probability(s, nodes=30):
+    """E(0; s) = det(I - K_sine) on [0, s] by Gauss-Legendre (Bornemann)"""
+    s = np.atleast_1d(np.asarray(s, dtype=np.float64))
+    xi, wi = np.polynomial.legendre.leggauss(nodes)
+    x = 0.5 * s[:, None] * (xi + 1)
+    w = np.sqrt(0.5 * s[:, None] * wi)
+    kernel = np.sinc(x[:, :, None] - x[:, None, :]) * w[:, :, None] * w[:, None, :]
+    return np.linalg.det(np.eye(nodes) - kernel)
+
+
+def gue_spacing_cdf(s, h=1e-3):
+    """P(spacing ≤ s) = 1 + dE(0; s)/ds for the GUE"""
+    s = np.asarray(s, dtype=np.float64)
+    out = np.pi ** 2 * s ** 3 / 9 - 2 * np.pi ** 4 * s ** 5 / 225
+    big = s >= 0.02
+    if np.any(big):
+        sb = s[big]
+        e = [gue_gap_probability(sb + k * h) for k in (-2, -1, 1, 2)]
+        out[big] = 1 + (e[0] - 8 * e[1] + 8 * e[2] - e[3]) / (12 * h)
+    return out
+
+
+def wigner_cdf(s):
+    """P(spacing ≤ s) for the GUE Wigner surmise"""
+    s = np.asarray(s, dtype=np.float64)
+    erf = np.vectorize(math.erf)(2 * s / np.sqrt(np.pi))
+    return erf - 4 * s / np.pi * np.exp(-4 * s ** 2 / np.pi)
+
+
+def montgomery(u):
+    """GUE pair correlation 1 - (sin πu / πu)²"""
+    return 1 - np.sinc(u) ** 2
+
+
+def gue_number_variance(lengths, nodes=400):
+    """Σ²(L) = L - 2 ∫_0^L (L - u) (sin πu / πu)² du"""
+    lengths = np.atleast_1d(np.asarray(lengths, dtype=np.float64))
+    xi, wi = np.polynomial.legendre.leggauss(nodes)
+    u = 0.5 * lengths[:, None] * (xi + 1)
+    integral = (0.5 * lengths[:, None] * wi * (lengths[:, None] - u)
+                * np.sinc(u) ** 2).sum(axis=1)
+    return lengths - 2 * integral
+
+# =============================================================================
+# THE MERGEABLE ACCUMULATOR
+# =============================================================================
+
+class ZeroStatistics:
+    """Streaming spacing, pair-correlation and number-variance accumulator"""
+
+    def __init__(self, spacing_max=4.0, spacing_bins=400, pair_max=3.0,
+                 pair_bins=300, lengths=None, window_step=0.5):
+        self.spacing_max, self.pair_max = spacing_max, pair_max
+        self.spacing_hist = np.zeros(spacing_bins, dtype=np.int64)
+        self.pair_hist = np.zeros(pair_bins, dtype=np.int64)
+        self.lengths = (np.linspace(0.5, 20.0, 40) if lengths is None
+                        else np.asarray(lengths, dtype=np.float64))
+        self.window_step = window_step
+        self.windows = np.zeros(self.lengths.size, dtype=np.int64)
+        self.window_sum = np.zeros(self.lengths.size)
+        self.window_sum2 = np.zeros(self.lengths.size)
+        self.count = 0                    # zeros whose pairs were counted
+        self.spacings = 0
+        self.spacing_sum = self.spacing_sum2 = 0.0
+        self.min_spacing = np.inf
+        self.gamma_min, self.gamma_max = np.inf, -np.inf
+        self.origin = None                # first unfolded value ever seen
+        self._carry = np.empty(0)
+        self._end = -np.inf
+
+    @property
+    def reach(self):
+        return max(self.pair_max, self.lengths.max())
+
+    def prime(self, gamma):
+        """Seed with the zeros just before this accumulator's range"""
+        x = unfold(np.asarray(gamma, dtype=np.float64))
+        if x.size:
+            if self.origin is None:
+                self.origin = x[0]
+            self._carry = x[x > x[-1] - self.reach]
+            self._end = x[-1]
+
+    def update(self, gamma):
+        """Add the next ascending block of ordinates"""
+        gamma = np.asarray(gamma, dtype=np.float64)
+        if gamma.size == 0:
+            return
+        self.gamma_min = min(self.gamma_min, gamma[0])
+        self.gamma_max = max(self.gamma_max, gamma[-1])
+        x = unfold(gamma)
+        if self.origin is None:
+            self.origin = x[0]
+        buf = np.concatenate([self._carry, x])
+        new = self._carry.size
+        self.count += x.size
+
+        # Nearest-neighbour spacings ending at a new zero
+        s = np.diff(buf[max(new - 1, 0):])
+        self.spacings += s.size
+        self.spacing_sum += s.sum()
+        self.spacing_sum2 += (s * s).sum()
+        if s.size:
+            self.min_spacing = min(self.min_spacing, s.min())
+        width = self.spacing_max / self.spacing_hist.size
+        s = s[s < self.spacing_max]
+        self.spacing_hist += np.bincount((s / width).astype(np.int64),
+                                         minlength=self.spacing_hist.size)
+
+        # Pair differences x_j - x_i < X with x_j new, lag by lag
+        width = self.pair_max / self.pair_hist.size
+        for lag in range(1, buf.size):
+            first = max(lag, new)
+            if first >= buf.size:
+                break
+            d = buf[first:] - buf[first - lag:buf.size - lag]
+            d = d[d < self.pair_max]
+            if d.size == 0:
+                break
+            self.pair_hist += np.bincount((d / width).astype(np.int64),
+                                          minlength=self.pair_hist.size)
+
+        # Number variance: windows [x0, x0 + L) ending in the new data
+        end = buf[-1]
+        step = self.window_step
+        for i, length in enumerate(self.lengths):
+            k_lo = math.ceil(self.origin / step)
+            if np.isfinite(self._end):
+                k_lo = max(k_lo, math.floor((self._end - length) / step) + 1)
+            k_hi = math.floor((end - length) / step)
+            if k_hi < k_lo:
+                continue
+            x0 = np.arange(k_lo, k_hi + 1) * step
+            n = (np.searchsorted(buf, x0 + length) - np.searchsorted(buf, x0))
+            self.windows[i] += n.size
+            self.window_sum[i] += n.sum()
+            self.window_sum2[i] += (n.astype(np.float64) ** 2).sum()
+
+        self._carry = buf[buf > end - self.reach]
+        self._end = end
+
+    def merge(self, other):
+        """Combine with the accumulator of the next consecutive range"""
+        for name in ("spacing_hist", "pair_hist", "windows", "window_sum",
+                     "window_sum2"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.count += other.count
+        self.spacings += other.spacings
+        self.spacing_sum += other.spacing_sum
+        self.spacing_sum2 += other.spacing_sum2
+        self.min_spacing = min(self.min_spacing, other.min_spacing)
+        self.gamma_min = min(self.gamma_min, other.gamma_min)
+        self.gamma_max = max(self.gamma_max, other.gamma_max)
+        if self.origin is None:
+            self.origin = other.origin
+        self._carry, self._end = other._carry, other._end
+        return self
+
+    # -------------------------------------------------------------------------
+    # Estimates
+    # -------------------------------------------------------------------------
+
+    def spacing_edges(self):
+        return np.linspace(0, self.spacing_max, self.spacing_hist.size + 1)
+
+    def spacing_cdf(self):
+        """Empirical P(spacing ≤ s) at the histogram edges"""
+        return np.append(0, np.cumsum(self.spacing_hist)) / max(self.spacings, 1)
+
+    def pair_correlation(self):
+        """(bin centres, R₂ estimate) from the pair histogram"""
+        width = self.pair_max / self.pair_hist.size
+        centres = (np.arange(self.pair_hist.size) + 0.5) * width
+        return centres, self.pair_hist / (max(self.count, 1) * width)
+
+    def number_variance(self):
+        n = np.maximum(self.windows, 1)
+        mean = self.window_sum / n
+        return self.window_sum2 / n - mean * mean
+
+# =============================================================================
+# PARALLEL PASS OVER A ZERO TABLE
+# =============================================================================
+
+def _accumulate(job):
+    path, lo, hi, chunk, options = job
+    acc = ZeroStatistics(**options)
+    pad = int(2 * acc.reach) + 64
+    with ZeroStore(path) as store:
+        gamma = store.ordinates()
+        acc.prime(np.array(gamma[max(lo - pad, 0):lo]))
+        for start in range(lo, hi, chunk):
+            acc.update(np.array(gamma[start:min(start + chunk, hi)]))
+    return acc
+
+
+def zero_statistics(path, workers=None, chunk=1 << 18, start=0, stop=None,
+                    **options):
+    """Statistics of the zeros [start, stop) of a store in one streaming pass
+
+    The store is checked against N(t) here, once.  The index range is
+    split across workers; each streams its part in chunks and the partial
+    accumulators are merged in order.
+    """
+    with ZeroStore(path) as store:
+        bad = first_inconsistent(store.first_index, store.ordinates())
+        if bad is not None:
+            raise ValueError(f"{path}: zero #{store.first_index + bad} "
+                             "contradicts the zero count N(t)")
+        stop = store.count if stop is None else stop
+    workers = workers or os.cpu_count()
+    edges = np.linspace(start, stop, workers + 1).astype(int)
+    jobs = [(path, int(a), int(b), chunk, options)
+            for a, b in zip(edges[:-1], edges[1:]) if b > a]
+    if len(jobs) == 1:
+        return _accumulate(jobs[0])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_accumulate, jobs))
+    total = parts[0]
+    for part in parts[1:]:
+        total.merge(part)
+    return total
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zeros",
+                        help="zero store or text table of zeros 1, 2, 3, ... "
+                             "(default: compute --count zeros)")
+    parser.add_argument("--count", type=int, default=10000,
+                        help="number of zeros to compute without --zeros")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    parser.add_argument("--chunk", type=int, default=1 << 18,
+                        help="zeros per streaming update")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("STREAMING GUE STATISTICS OF ZERO SPACINGS")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "zeros.rzs")
+        if args.zeros is None:
+            # The workers map the zeros by path: go through a scratch store
+            start = time.perf_counter()
+            compute_store(path, args.count)
+            print(f"\nComputed {args.count:,} zeros in "
+                  f"{time.perf_counter() - start:.1f} s")
+            args.zeros = path
+        else:
+            with open(args.zeros, "rb") as fh:
+                is_store = fh.read(len(MAGIC)) == MAGIC
+            if not is_store:
+                with import_text_table(args.zeros, path, FLOAT64) as store:
+                    if "dropped_from" in store.provenance:
+                        raise SystemExit(
+                            f"{args.zeros}: zero #{store.provenance['dropped_from']} "
+                            "contradicts the zero count N(t)")
+                args.zeros = path
+        start = time.perf_counter()
+        acc = zero_statistics(args.zeros, args.workers, args.chunk)
+        elapsed = time.perf_counter() - start
+    mean = acc.spacing_sum / acc.spacings
+    var = acc.spacing_sum2 / acc.spacings - mean ** 2
+
+    print(f"\nZeros: {acc.count:,} with {acc.gamma_min:.6f} ≤ γ ≤ "
+          f"{acc.gamma_max:.6f} ({elapsed:.2f} s, {args.workers} workers)")
+    print(f"Mean raw spacing: {(acc.gamma_max - acc.gamma_min) / (acc.count - 1):.10f}")
+    print(f"Unfolded spacings: mean {mean:.6f}, variance {var:.6f} "
+          f"(GUE 0.180), minimum {acc.min_spacing:.6f}")
+
+    edges = acc.spacing_edges()
+    emp, gue, wig = acc.spacing_cdf(), gue_spacing_cdf(edges), wigner_cdf(edges)
+    print(f"\n{'s':>6} {'P(≤s) zeros':>13} {'GUE':>10} {'Wigner':>10}")
+    for s in (0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5):
+        i = int(round(s / edges[1]))
+        print(f"{s:>6.2f} {emp[i]:>13.5f} {gue[i]:>10.5f} {wig[i]:>10.5f}")
+    print(f"Kolmogorov distance to GUE:    {np.abs(emp - gue).max():.5f}")
+    print(f"Kolmogorov distance to Wigner: {np.abs(emp - wig).max():.5f}")
+
+    u, r2 = acc.pair_correlation()
+    print(f"\n{'u':>6} {'R₂ zeros':>10} {'1-(sin πu/πu)²':>16}")
+    for target in (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5):
+        lo = np.searchsorted(u, target - 0.05)
+        hi = np.searchsorted(u, target + 0.05)
+        print(f"{target:>6.2f} {r2[lo:hi].mean():>10.4f} "
+              f"{montgomery(u[lo:hi]).mean():>16.4f}")
+
+    sigma2 = acc.number_variance()
+    gue_sigma2 = gue_number_variance(acc.lengths)
+    print(f"\n{'L':>6} {'Σ²(L) zeros':>12} {'GUE':>10}")
+    for i in range(0, acc.lengths.size, 4):
+        print(f"{acc.lengths[i]:>6.2f} {sigma2[i]:>12.4f} {gue_sigma2[i]:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
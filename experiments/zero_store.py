@@ -0,0 +1,440 @@
+"""
+MEMORY-MAPPED ZERO STORE
+========================
+
+Binary, append-only storage for ordinates γ_n of zeros 1/2 + iγ_n.
+
+File layout (little endian):
+
+    [0, 4096)    header: magic, version, ordinate kind, count, index of the
+                 first zero, height range, absolute precision, and a JSON
+                 provenance record (source, generator, parameters)
+    [4096, ...)  ordinates, ascending, either float64 or double-double
+                 (hi, lo) pairs whose sum carries ≈ 32 significant digits
+
+The zero with index n sits at a fixed offset, so lookup by index is O(1);
+lookup by height is a binary search touching O(log n) pages.  The data are
+memory-mapped, so opening a store of 10^8 zeros reads 4 KiB and nothing is
+loaded into RAM until it is touched.  Appends write the new ordinates
+first and the header count last, so an interrupted append leaves the
+store at its previous, consistent length.
+
+Both legacy text layouts in outputs/ import directly.  The recorded
+precision follows from the digits the table really carries (float64
+padding such as 14.134725142000001 is not counted) unless --precision
+gives it, and every index is checked against the zero count
+
+    N(t) = θ(t)/π + 1 + S(t),    |S(t)| ≤ 0.112 log t + 0.278 log log t + 2.51
+
+(Trudgian's unconditional bound on S).  A table is imported only up to
+the first zero whose index disagrees with N(γ_n); both legacy tables go
+wrong after zero #100 and are cut there.
+
+    python zero_store.py import ../outputs/riemann_10000_ultimate_report.txt zeros.rzs
+    python zero_store.py info zeros.rzs
+"""
+
+import argparse
+import json
+import os
+import struct
+from decimal import Decimal
+
+import numpy as np
+
+MAGIC = b"RZSTORE1"
+VERSION = 1
+HEADER_SIZE = 4096
+FLOAT64, DOUBLE_DOUBLE = 1, 2
+
+# magic, version, kind, count, first index, t_min, t_max, precision, len(json)
+HEADER = struct.Struct("<8sIIQqdddI")
+COUNT_OFFSET = 16
+DTYPES = {
+    FLOAT64: np.dtype("<f8"),
+    DOUBLE_DOUBLE: np.dtype([("hi", "<f8"), ("lo", "<f8")]),
+}
+
+# =============================================================================
+# THE STORE
+# =============================================================================
+
+class ZeroStore:
+    """Memory-mapped table of zero ordinates with O(1) access by index"""
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.writable = mode != "r"
+        self._file = open(path, "r+b" if self.writable else "rb")
+        raw = self._file.read(HEADER_SIZE)
+        (magic, version, self.kind, self.count, self.first_index, self.t_min,
+         self.t_max, self.precision, size) = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} zero store")
+        self.provenance = json.loads(raw[HEADER.size:HEADER.size + size])
+        self.dtype = DTYPES[self.kind]
+        self._map()
+
+    @classmethod
+    def create(cls, path, kind=FLOAT64, first_index=1, precision=np.nan,
+               provenance=None):
+        """Create an empty store; provenance is any JSON-serializable dict"""
+        blob = json.dumps(provenance or {}, sort_keys=True).encode()
+        if HEADER.size + len(blob) > HEADER_SIZE:
+            raise ValueError("provenance record does not fit in the header")
+        header = HEADER.pack(MAGIC, VERSION, kind, 0, first_index, np.nan,
+                             np.nan, precision, len(blob)) + blob
+        with open(path, "wb") as fh:
+            fh.write(header.ljust(HEADER_SIZE, b"\0"))
+        return cls(path, "r+")
+
+    def _map(self):
+        if self.count:
+            self._data = np.memmap(self._file, dtype=self.dtype, mode="r",
+                                   offset=HEADER_SIZE, shape=(self.count,))
+        else:
+            self._data = np.empty(0, dtype=self.dtype)
+        self._hi = self._data["hi"] if self.kind == DOUBLE_DOUBLE else self._data
+
+    def close(self):
+        self._data = self._hi = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    # -------------------------------------------------------------------------
+    # Lookup
+    # -------------------------------------------------------------------------
+
+    @property
+    def last_index(self):
+        return self.first_index + self.count - 1
+
+    def _position(self, n):
+        pos = np.asarray(n) - self.first_index
+        if np.any((pos < 0) | (pos >= self.count)):
+            raise IndexError(f"zero index outside [{self.first_index}, "
+                             f"{self.last_index}]")
+        return pos
+
+    def ordinate(self, n):
+        """γ_n as float64 for zero index n (scalar or array)"""
+        return self._hi[self._position(n)]
+
+    def ordinate_dd(self, n):
+        """γ_n as a double-double pair (hi, lo); lo = 0 for float64 stores"""
+        pos = self._position(n)
+        if self.kind == DOUBLE_DOUBLE:
+            return self._data["hi"][pos], self._data["lo"][pos]
+        return self._data[pos], np.zeros_like(self._data[pos])
+
+    def ordinates(self, start=None, stop=None):
+        """Memory-mapped float64 view of γ_n for start ≤ n < stop"""
+        lo = 0 if start is None else self._position(start)
+        hi = self.count if stop is None else self._position(stop - 1) + 1
+        return self._hi[lo:hi]
+
+    def chunks(self, size=1 << 20, start=None, stop=None):
+        """Iterate over the ordinates in float64 blocks of `size` zeros"""
+        view = self.ordinates(start, stop)
+        for lo in range(0, view.size, size):
+            yield np.array(view[lo:lo + size])
+
+    def index_of_height(self, t):
+        """Index of the first stored zero above height t (binary search)
+
+        Works on scalars or arrays of heights and only touches the
+        O(log n) pages visited by the search.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        lo = np.zeros(t.shape, dtype=np.int64)
+        hi = np.full(t.shape, self.count, dtype=np.int64)
+        active = lo < hi
+        while np.any(active):
+            mid = (lo + hi) // 2
+            right = active & (self._hi[np.where(active, mid, 0)] <= t)
+            lo = np.where(right, mid + 1, lo)
+            hi = np.where(active & ~right, mid, hi)
+            active = lo < hi
+        return lo + self.first_index
+
+    # -------------------------------------------------------------------------
+    # Growth
+    # -------------------------------------------------------------------------
+
+    def append(self, hi, lo=None, precision=None):
+        """Append ascending ordinates (and double-double low parts)
+
+        precision, if given, is the error bound of the new zeros; the
+        store's precision is widened to it.
+        """
+        if not self.writable:
+            raise PermissionError(f"{self.path} was opened read-only")
+        hi = np.ascontiguousarray(hi, dtype=np.float64).ravel()
+        if hi.size == 0:
+            return
+        if np.any(np.diff(hi) < 0) or (self.count and hi[0] < self.t_max):
+            raise ValueError("ordinates must be ascending and above t_max")
+        if lo is not None and self.kind != DOUBLE_DOUBLE:
+            raise ValueError(f"{self.path} stores float64 ordinates only, "
+                             "low parts would be dropped")
+        if self.kind == DOUBLE_DOUBLE:
+            rows = np.empty(hi.size, dtype=self.dtype)
+            rows["hi"] = hi
+            rows["lo"] = 0.0 if lo is None else lo
+        else:
+            rows = hi.astype(self.dtype)
+        self._file.seek(HEADER_SIZE + self.count * self.dtype.itemsize)
+        self._file.write(rows.tobytes())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        # Only now publish the new length, height range and precision
+        t_min = hi[0] if self.count == 0 else self.t_min
+        self.count += hi.size
+        self.t_min, self.t_max = t_min, hi[-1]
+        if precision is not None:
+            self.precision = float(np.fmax(self.precision, precision))
+        self._file.seek(COUNT_OFFSET)
+        self._file.write(struct.pack("<Qqddd", self.count, self.first_index,
+                                     self.t_min, self.t_max, self.precision))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._map()
+
+# =============================================================================
+# IMPORTERS FOR THE LEGACY TEXT TABLES
+# =============================================================================
+
+def read_text_table(path):
+    """(indices, ordinate strings) from either legacy text layout
+
+    riemann_10000_results.txt holds "n,t" lines after a two-line title;
+    riemann_10000_ultimate_report.txt holds "    n, t" lines after its
+    DETAILED ZERO LIST heading.  Both are recognized automatically.
+    """
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    if any(line.startswith("DETAILED ZERO LIST") for line in lines):
+        start = next(i for i, line in enumerate(lines)
+                     if line.startswith("DETAILED ZERO LIST"))
+        lines = lines[start + 1:]
+    indices, values = [], []
+    for line in lines:
+        parts = line.split(",")
+        if len(parts) != 2 or not parts[0].strip().isdigit():
+            continue
+        indices.append(int(parts[0]))
+        values.append(parts[1].strip())
+    return np.array(indices, dtype=np.int64), values
+
+
+def count_residuals(first_index, ordinates):
+    """S(γ_n) implied by the indices: n - 1/2 - (θ(γ_n)/π + 1)
+
+    Uses the Riemann-von Mangoldt form θ(t)/π + 1 = (t/2π) log(t/2πe) + 7/8
+    + O(1/t), which is far more accurate than an index check needs.
+    """
+    t = np.asarray(ordinates, dtype=np.float64)
+    n = first_index + np.arange(t.size)
+    smooth = t / (2 * np.pi) * np.log(t / (2 * np.pi * np.e)) + 0.875
+    return n - 0.5 - smooth
+
+
+def s_bound(t):
+    """Trudgian's bound |S(t)| ≤ 0.112 log t + 0.278 log log t + 2.51"""
+    log_t = np.log(np.asarray(t, dtype=np.float64))
+    return 0.112 * log_t + 0.278 * np.log(log_t) + 2.51
+
+
+def first_inconsistent(first_index, ordinates, block=1 << 20):
+    """Position of the first ordinate whose index contradicts N(t), or None
+
+    Indices run first_index, first_index + 1, ...; ordinates may be a
+    memory-mapped array and are checked in blocks.
+    """
+    for lo in range(0, len(ordinates), block):
+        t = np.asarray(ordinates[lo:lo + block], dtype=np.float64)
+        bad = np.abs(count_residuals(first_index + lo, t)) > s_bound(t)
+        if bad.any():
+            return lo + int(np.argmax(bad))
+    return None
+
+
+def split_decimal(values):
+    """Decimal strings → double-double (hi, lo) arrays"""
+    hi = np.array([float(v) for v in values])
+    lo = np.array([float(Decimal(v) - Decimal(h)) for v, h in zip(values, hi)])
+    return hi, lo
+
+
+def significant_decimals(values):
+    """Decimals the strings really carry
+
+    A float64 printed with more digits than it holds ends in padding such
+    as 14.134725142000001 or 21.022039638999999; such a value counts only
+    the decimals of its shortest round-trip form.  Strings with more
+    digits than any float64 (double-double output) count in full.  The
+    table's count is the largest over its values, since true trailing
+    zeros shorten some.
+    """
+    digits = 0
+    for v in values:
+        printed = len(v.partition(".")[2])
+        if f"{float(v):.{printed}f}" == v:
+            printed = min(printed, len(repr(float(v)).partition(".")[2]))
+        digits = max(digits, printed)
+    return digits
+
+
+def import_text_table(path, store_path, kind=DOUBLE_DOUBLE, precision=None):
+    """Convert a legacy text table into a new zero store
+
+    Rows from the first zero whose index contradicts the zero count on are
+    dropped and recorded in the provenance.  precision defaults to half a
+    unit in the last significant decimal of the table.
+    """
+    indices, values = read_text_table(path)
+    if indices.size == 0:
+        raise ValueError(f"no zeros found in {path}")
+    if np.any(np.diff(indices) != 1):
+        raise ValueError(f"{path}: zero indices are not consecutive")
+    hi, lo = split_decimal(values)
+    provenance = {"source": os.path.basename(path), "format": "text"}
+    bad = first_inconsistent(int(indices[0]), hi)
+    if bad == 0:
+        raise ValueError(f"{path}: zero {indices[0]} at t = {values[0]} "
+                         f"contradicts the zero count N(t)")
+    if bad is not None:
+        provenance["dropped_from"] = int(indices[bad])
+        provenance["dropped"] = int(indices.size - bad)
+        indices, values, hi, lo = indices[:bad], values[:bad], hi[:bad], lo[:bad]
+    if precision is None:
+        digits = significant_decimals(values)
+        precision = 0.5 * 10.0 ** -digits
+        if kind == FLOAT64:
+            precision = max(precision, 0.5 * np.spacing(hi.max()))
+        provenance["digits"] = digits
+    store = ZeroStore.create(store_path, kind, int(indices[0]), precision,
+                             provenance)
+    # A float64 store keeps only hi; its precision allows for that
+    store.append(hi, lo if kind == DOUBLE_DOUBLE else None)
+    return store
+
+
+def append_zeros(path, first_index, hi, lo=None, kind=FLOAT64,
+                 precision=np.nan, provenance=None):
+    """Append zeros n = first_index, ... to the store at path, creating it
+
+    The new zeros must continue the stored index range without a gap and
+    have the store's kind; the store's precision is widened to theirs.
+    """
+    if os.path.exists(path):
+        store = ZeroStore(path, "r+")
+        if store.kind != kind:
+            store.close()
+            names = {FLOAT64: "float64", DOUBLE_DOUBLE: "double-double"}
+            raise ValueError(f"{path} holds {names[store.kind]} zeros, "
+                             f"cannot append {names[kind]} ones")
+        if store.count and first_index != store.last_index + 1:
+            store.close()
+            raise ValueError(f"{path} ends at zero {store.last_index}, "
+                             f"cannot append from zero {first_index}")
+    else:
+        store = ZeroStore.create(path, kind, first_index, precision, provenance)
+    with store:
+        store.append(hi, lo, precision)
+        return store.last_index
+
+
+def open_zeros(path):
+    """Float64 ordinates from a zero store or a text table
+
+    Raises ValueError unless the indices are consecutive and every one
+    agrees with the zero count N(t).
+    """
+    with open(path, "rb") as fh:
+        is_store = fh.read(len(MAGIC)) == MAGIC
+    if is_store:
+        store = ZeroStore(path)
+        first, zeros = store.first_index, store.ordinates()
+    else:
+        indices, values = read_text_table(path)
+        first = int(indices[0]) if indices.size else 1
+        zeros = np.array([float(v) for v in values])
+        if np.any(np.diff(indices) != 1):
+            raise ValueError(f"{path}: zero indices are not consecutive")
+    if len(zeros) == 0:
+        raise ValueError(f"no zeros found in {path}")
+    bad = first_inconsistent(first, zeros)
+    if bad is not None:
+        raise ValueError(
+            f"{path}: zero #{first + bad} at t = {zeros[bad]:.6f} contradicts "
+            f"the zero count N(t); the table is only usable through zero "
+            f"#{first + bad - 1} (zero_store.py import keeps that prefix)")
+    return zeros
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="convert a text table into a store")
+    imp.add_argument("source")
+    imp.add_argument("store")
+    imp.add_argument("--float64", action="store_true",
+                     help="store plain float64 instead of double-double")
+    imp.add_argument("--precision", type=float,
+                     help="absolute precision of the table (default: half a "
+                          "unit in its last significant decimal)")
+    info = sub.add_parser("info", help="print the store header")
+    info.add_argument("store")
+    get = sub.add_parser("get", help="print zeros by index")
+    get.add_argument("store")
+    get.add_argument("index", type=int, nargs="+")
+    find = sub.add_parser("find", help="count stored zeros up to heights")
+    find.add_argument("store")
+    find.add_argument("height", type=float, nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        kind = FLOAT64 if args.float64 else DOUBLE_DOUBLE
+        with import_text_table(args.source, args.store, kind,
+                               args.precision) as store:
+            print(f"Imported {len(store):,} zeros "
+                  f"(n = {store.first_index} ... {store.last_index}) "
+                  f"into {args.store}, precision ±{store.precision:.1e}")
+            if "dropped" in store.provenance:
+                print(f"Dropped {store.provenance['dropped']:,} zeros from "
+                      f"#{store.provenance['dropped_from']:,} on: their "
+                      f"indices contradict the zero count N(t)")
+        return
+
+    with ZeroStore(args.store) as store:
+        if args.command == "info":
+            kind = "double-double" if store.kind == DOUBLE_DOUBLE else "float64"
+            print(f"Zeros:      {len(store):,} ({kind})")
+            print(f"Indices:    {store.first_index:,} ... {store.last_index:,}")
+            print(f"Heights:    {store.t_min:.9f} ... {store.t_max:.9f}")
+            print(f"Precision:  ±{store.precision:.1e}")
+            print(f"Provenance: {json.dumps(store.provenance)}")
+        elif args.command == "get":
+            hi, lo = store.ordinate_dd(np.array(args.index))
+            for n, h, l in zip(args.index, hi, lo):
+                print(f"{n},{Decimal(float(h)) + Decimal(float(l)):.20f}")
+        elif args.command == "find":
+            for t, n in zip(args.height, store.index_of_height(args.height)):
+                print(f"N_stored({t}) = {n - store.first_index:,}")
+
+
+if __name__ == "__main__":
+    main()